@@ -0,0 +1,25 @@
+-- AlterTable
+ALTER TABLE "Translation" ADD COLUMN     "sourceHash" BYTEA;
+
+-- CreateIndex (btree indexes store NULLs, so it also serves the "sourceHash" IS NULL
+-- probes of the translator and scripts/backfill_source_hash.py)
+CREATE UNIQUE INDEX "Translation_sourceHash_targetLang_key" ON "Translation"("sourceHash", "targetLang");
+
+-- Hand-written: Prisma cannot express triggers or functions in schema.prisma, but it
+-- does not introspect them either, so `prisma migrate dev` sees no drift from them.
+-- Keep the digest in sync for rows written outside the Python translator.
+-- Must match gemini_translator.source_digest(): SHA-256 of the NFC-normalized UTF-8 text.
+-- Rows whose texts collide after NFC normalization must be merged before the backfill
+-- (scripts/backfill_source_hash.py checks for them first).
+CREATE OR REPLACE FUNCTION "Translation_set_sourceHash"() RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW."sourceHash" IS NULL OR (TG_OP = 'UPDATE' AND NEW."sourceText" IS DISTINCT FROM OLD."sourceText") THEN
+        NEW."sourceHash" := sha256(convert_to(normalize(NEW."sourceText", NFC), 'UTF8'));
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER "Translation_sourceHash_trigger"
+BEFORE INSERT OR UPDATE OF "sourceText" ON "Translation"
+FOR EACH ROW EXECUTE FUNCTION "Translation_set_sourceHash"();
@@ -0,0 +1,26 @@
+-- CreateTable
+CREATE TABLE "TranslationJob" (
+    "id" TEXT NOT NULL,
+    "sourceText" TEXT NOT NULL,
+    "targetLang" TEXT NOT NULL,
+    "category" TEXT NOT NULL DEFAULT 'general',
+    "priority" INTEGER NOT NULL DEFAULT 0,
+    "status" TEXT NOT NULL DEFAULT 'pending',
+    "attempts" INTEGER NOT NULL DEFAULT 0,
+    "leasedBy" TEXT,
+    "leaseExpiresAt" TIMESTAMP(3),
+    "lastError" TEXT,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "TranslationJob_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "TranslationJob_sourceText_targetLang_key" ON "TranslationJob"("sourceText", "targetLang");
+
+-- CreateIndex
+CREATE INDEX "TranslationJob_status_targetLang_priority_createdAt_idx" ON "TranslationJob"("status", "targetLang", "priority", "createdAt");
+
+-- CreateIndex
+CREATE INDEX "TranslationJob_leaseExpiresAt_idx" ON "TranslationJob"("leaseExpiresAt");
@@ -0,0 +1,2 @@
+-- CreateIndex (incremental discovery: English sources changed since a watermark)
+CREATE INDEX "Translation_targetLang_updatedAt_idx" ON "Translation"("targetLang", "updatedAt");
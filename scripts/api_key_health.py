@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+API Key Health Tracking
+=======================
+
+Error classification, per-key circuit breakers and jittered backoff for the
+Gemini translator.
+
+Errors are classified as:
+- quota:     the key's daily quota is spent (open the key's breaker until midnight)
+- rate:      short-term rate limit (open briefly, honoring the server's retry delay)
+- transient: 5xx, timeouts and connection errors (retry with backoff)
+- fatal:     retrying cannot help; an invalid or revoked key is taken out of
+             rotation, any other fatal error (bad request, unknown model) is raised
+
+A breaker opens after repeated failures, stays open for a cool-down that grows
+each time it re-opens, then lets a single trial request through (half-open).
+Senders claim that trial with `begin_request`; until it has been answered the
+key stays closed to everyone else.
+"""
+
+import random
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+QUOTA = 'quota'
+RATE = 'rate'
+TRANSIENT = 'transient'
+FATAL = 'fatal'
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+RETRY_IN_PATTERN = re.compile(r'retry in ([\d.]+)\s*s', re.IGNORECASE)
+RETRY_DELAY_PATTERN = re.compile(r'retry_?delay\W+(?:seconds\W+)?(\d+(?:\.\d+)?)', re.IGNORECASE)
+STATUS_PATTERN = re.compile(r'^\s*(\d{3})\b')
+
+# How often callers re-check a key whose half-open trial is still in flight
+TRIAL_POLL_INTERVAL = 1.0
+
+@dataclass
+class ClassifiedError:
+    """What went wrong with a request and what to do about it"""
+    kind: str
+    retry_after: Optional[float] = None  # server-provided delay in seconds
+    key_scoped: bool = True  # the failure is specific to the API key used
+    status: Optional[int] = None
+
+def _status_code(error: Exception) -> Optional[int]:
+    """HTTP status of an error (google.api_core exceptions expose it as `code`)"""
+    for attr in ('status', 'code', 'status_code'):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    match = STATUS_PATTERN.match(str(error))
+    return int(match.group(1)) if match else None
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """Server-provided retry delay, from an attribute, RetryInfo details or the message"""
+    retry_after = getattr(error, 'retry_after', None)
+    if isinstance(retry_after, (int, float)):
+        return float(retry_after)
+    
+    message = str(error)
+    for pattern in (RETRY_IN_PATTERN, RETRY_DELAY_PATTERN):
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+def classify_error(error: Exception) -> ClassifiedError:
+    """Classify a failed Gemini request"""
+    status = _status_code(error)
+    message = str(error).lower()
+    retry_after = parse_retry_after(error)
+    
+    if status == 429 or 'resource_exhausted' in message or 'quota' in message:
+        if 'perday' in message or 'per day' in message or 'requests_per_day' in message:
+            return ClassifiedError(QUOTA, retry_after, status=status)
+        return ClassifiedError(RATE, retry_after, status=status)
+    
+    if status in (401, 403) or 'api key not valid' in message or 'permission denied' in message:
+        return ClassifiedError(FATAL, status=status)
+    
+    if status in (400, 404) or 'not found' in message or 'invalid argument' in message:
+        return ClassifiedError(FATAL, key_scoped=False, status=status)
+    
+    # 5xx, timeouts, dropped connections and anything unrecognised
+    return ClassifiedError(TRANSIENT, retry_after, status=status)
+
+def backoff_delay(attempt: int, base: float = 1.0, multiplier: float = 2.0, cap: float = 60.0,
+                  retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff that never undercuts the server's retry delay"""
+    delay = random.uniform(0, min(cap, base * multiplier ** attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after + random.uniform(0, base))
+    return delay
+
+def seconds_until_midnight(now: Optional[datetime] = None) -> float:
+    """Seconds until the next local midnight, when daily quotas reset"""
+    now = now or datetime.now()
+    tomorrow = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    return (tomorrow - now).total_seconds()
+
+class CircuitBreaker:
+    """Per-key circuit breaker with growing cool-downs"""
+    
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 60.0, max_cooldown: float = 1800.0,
+                 clock: Callable[[], float] = time.monotonic, wall_clock: Callable[[], datetime] = datetime.now):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self.wall_clock = wall_clock  # local time, for quota resets at midnight
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.disabled = False
+        self.trial_in_flight = False
+    
+    def _open(self, duration: float) -> None:
+        self.state = OPEN
+        self.open_until = max(self.open_until, self.clock() + duration)
+    
+    def allow_request(self) -> bool:
+        """Whether a request may be sent with this key now"""
+        if self.disabled:
+            return False
+        if self.state == OPEN and self.clock() >= self.open_until:
+            self.state = HALF_OPEN  # let one trial request through
+        if self.state == HALF_OPEN:
+            return not self.trial_in_flight
+        return self.state != OPEN
+    
+    def begin_request(self) -> bool:
+        """Claim the right to send now; False while another request holds the half-open trial
+        
+        The caller that claimed the trial (state is HALF_OPEN once this returns
+        True) must call `end_request` when its request is over.
+        """
+        if self.state == HALF_OPEN:
+            if self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+        return True
+    
+    def end_request(self) -> None:
+        """Release a claimed trial, whatever became of the request"""
+        self.trial_in_flight = False
+    
+    def retry_in(self) -> float:
+        """Seconds until the breaker will let a request through again"""
+        if self.disabled:
+            return float('inf')
+        if self.state == HALF_OPEN and self.trial_in_flight:
+            return TRIAL_POLL_INTERVAL
+        if self.state != OPEN:
+            return 0.0
+        return max(self.open_until - self.clock(), 0.0)
+    
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+    
+    def record_failure(self, error: ClassifiedError) -> None:
+        """Update the breaker after a failed request"""
+        if error.kind == FATAL:
+            if not error.key_scoped:
+                return  # the request is bad, not the key
+            self.disabled = True
+            self.state = OPEN
+            return
+        
+        if error.kind == QUOTA:
+            self._open(max(error.retry_after or 0.0, seconds_until_midnight(self.wall_clock())))
+            return
+        
+        if error.kind == RATE:
+            self._open(error.retry_after if error.retry_after is not None else self.base_cooldown)
+            return
+        
+        # Transient: trip after repeated failures, or immediately if a half-open trial failed
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.trips += 1
+            self.failures = 0
+            self._open(min(self.base_cooldown * 2 ** (self.trips - 1), self.max_cooldown))
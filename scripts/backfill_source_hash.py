@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Translation sourceHash Backfill
+===============================
+
+Fills `Translation."sourceHash"` for rows created before the
+`add_translation_source_hash` migration. Rows are processed in small id-ordered
+batches so the table stays available; the translator keeps falling back to
+text comparison until no NULL digests remain.
+
+The digest is taken over the NFC-normalized text, so two existing rows whose
+texts differ only in normalization (e.g. a precomposed "é" and "e" + U+0301)
+would get the same digest and violate the unique (sourceHash, targetLang)
+index halfway through. Such collisions are looked up first: by default they
+are reported and nothing is written; `--merge-duplicates` keeps the best row
+of each group (approved, highest quality, most used, newest), adds the usage
+counts of the others to it, moves their history over and deletes them.
+
+Usage:
+    python backfill_source_hash.py
+    python backfill_source_hash.py --merge-duplicates
+    python backfill_source_hash.py --batch-size 5000 --pause 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+# Add the current directory to path for imports
+sys.path.append(str(Path(__file__).parent))
+
+from gemini_translator import create_db_pool, source_digest
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class DigestCollisionError(Exception):
+    """Rows whose source texts only differ in Unicode normalization"""
+
+async def find_collisions(conn) -> List:
+    """Groups of rows of one language whose texts are equal after NFC normalization, best row first"""
+    return await conn.fetch(
+        """
+        SELECT "targetLang",
+               array_agg(id ORDER BY ("status" = 'approved') DESC, "qualityScore" DESC,
+                         "usageCount" DESC, "updatedAt" DESC) AS ids,
+               array_agg("sourceText" ORDER BY ("status" = 'approved') DESC, "qualityScore" DESC,
+                         "usageCount" DESC, "updatedAt" DESC) AS texts
+        FROM "Translation"
+        GROUP BY normalize("sourceText", NFC), "targetLang"
+        HAVING COUNT(*) > 1
+        """
+    )
+
+async def merge_collisions(conn, groups: List) -> int:
+    """Fold every colliding row into the best row of its group; returns the number of rows deleted"""
+    deleted = 0
+    async with conn.transaction():
+        for group in groups:
+            keep, duplicates = group['ids'][0], group['ids'][1:]
+            await conn.execute(
+                """
+                UPDATE "Translation"
+                SET "usageCount" = "usageCount" + (
+                        SELECT COALESCE(SUM("usageCount"), 0) FROM "Translation" WHERE id = ANY($2::text[])
+                    ),
+                    "sourceHash" = NULL
+                WHERE id = $1
+                """,
+                keep, duplicates
+            )
+            await conn.execute(
+                'UPDATE "TranslationHistory" SET "translationId" = $1 WHERE "translationId" = ANY($2::text[])',
+                keep, duplicates
+            )
+            result = await conn.execute('DELETE FROM "Translation" WHERE id = ANY($1::text[])', duplicates)
+            deleted += int(result.split()[-1])
+    return deleted
+
+async def backfill(database_url: str, batch_size: int = 1000, pause: float = 0.0,
+                   merge_duplicates: bool = False) -> int:
+    """Compute and store missing digests, returning the number of rows updated"""
+    pool = await create_db_pool(database_url, max_size=1)
+    updated = 0
+    started = time.time()
+    
+    try:
+        async with pool.acquire() as conn:
+            groups = await find_collisions(conn)
+            if groups:
+                print(f"⚠️ {len(groups)} groups of rows share a text after NFC normalization:")
+                for group in groups:
+                    texts = ', '.join(ascii(text) for text in group['texts'])
+                    print(f"   {group['targetLang']}: {', '.join(group['ids'])} ({texts})")
+                if not merge_duplicates:
+                    raise DigestCollisionError(
+                        f"{len(groups)} digest collisions; merge them with --merge-duplicates"
+                    )
+                deleted = await merge_collisions(conn, groups)
+                print(f"🧹 Merged {len(groups)} groups, deleted {deleted} duplicate rows")
+            
+            remaining = await conn.fetchval('SELECT COUNT(*) FROM "Translation" WHERE "sourceHash" IS NULL')
+            print(f"🔢 {remaining} rows without sourceHash")
+            
+            last_id = ''
+            while True:
+                rows = await conn.fetch(
+                    """
+                    SELECT id, "sourceText" FROM "Translation"
+                    WHERE "sourceHash" IS NULL AND id > $1
+                    ORDER BY id
+                    LIMIT $2
+                    """,
+                    last_id, batch_size
+                )
+                if not rows:
+                    break
+                
+                ids = [row['id'] for row in rows]
+                digests = [source_digest(row['sourceText']) for row in rows]
+                
+                result = await conn.execute(
+                    """
+                    UPDATE "Translation" AS t
+                    SET "sourceHash" = v.digest
+                    FROM unnest($1::text[], $2::bytea[]) AS v(id, digest)
+                    WHERE t.id = v.id AND t."sourceHash" IS NULL
+                    """,
+                    ids, digests
+                )
+                updated += int(result.split()[-1])
+                last_id = ids[-1]
+                
+                rate = updated / max(time.time() - started, 1e-6)
+                print(f"📈 {updated}/{remaining} rows ({rate:.0f} rows/s)")
+                
+                if pause:
+                    await asyncio.sleep(pause)
+            
+            left = await conn.fetchval('SELECT COUNT(*) FROM "Translation" WHERE "sourceHash" IS NULL')
+    finally:
+        await pool.close()
+    
+    if left:
+        print(f"⚠️ {left} rows still without sourceHash (written concurrently) - run again")
+    else:
+        print("✅ Backfill complete - translator lookups will use sourceHash")
+    
+    return updated
+
+async def main():
+    """CLI interface for the backfill"""
+    parser = argparse.ArgumentParser(description='Backfill Translation.sourceHash')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per UPDATE (default: 1000)')
+    parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches')
+    parser.add_argument('--merge-duplicates', action='store_true',
+                        help='Merge rows whose texts collide after NFC normalization instead of stopping')
+    
+    args = parser.parse_args()
+    
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("❌ Error: DATABASE_URL environment variable is required")
+        sys.exit(1)
+    
+    try:
+        await backfill(database_url, args.batch_size, args.pause, args.merge_duplicates)
+    except DigestCollisionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Batch Size Auto-Tuner
+=====================
+
+Feedback controller for the number of texts sent per API request. Under a
+daily request cap, throughput is the number of texts that come back usable per
+request, so the batch should be as large as the model answers reliably.
+
+After each request it looks at:
+- yield:      translations returned / texts requested
+- alignment:  whether the response had one line (or array item) per text
+- truncation: finishReason MAX_TOKENS, or output tokens close to the limit
+- latency:    time the request itself took (rate-limit waits excluded)
+
+Additive increase, multiplicative decrease: the size grows by GROW_STEP after
+CLEAN_STREAK_TO_GROW clean, full-sized batches, shrinks by SHRINK_FACTOR after
+a truncated, misaligned or low-yield batch, and always stays within bounds.
+The learned size is persisted per language (or language set for fan-out
+requests) in `batch_tuning.json`.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULT_STATE_FILE = Path(__file__).parent / 'batch_tuning.json'
+
+MIN_BATCH_SIZE = 3
+MAX_BATCH_SIZE = 50
+GROW_STEP = 2
+SHRINK_FACTOR = 0.7
+CLEAN_STREAK_TO_GROW = 3
+# A batch counts as evidence for growing only if it was close to the current size
+FULL_BATCH_RATIO = 0.8
+MIN_CLEAN_YIELD = 0.95
+# Slow requests and output close to maxOutputTokens stop growth
+LATENCY_CEILING = 60.0
+OUTPUT_TOKEN_HEADROOM = 0.75
+EMA_WEIGHT = 0.2
+
+@dataclass
+class BatchOutcome:
+    """What one API request returned"""
+    requested: int
+    returned: int = 0
+    aligned: bool = True
+    truncated: bool = False
+    latency: float = 0.0
+    output_tokens: int = 0
+    replayed: bool = False
+    
+    @property
+    def yield_ratio(self) -> float:
+        return self.returned / self.requested if self.requested else 1.0
+
+@dataclass
+class TunerState:
+    """Learned batch size and running averages for one language key"""
+    size: int
+    batches: int = 0
+    clean_streak: int = 0
+    avg_yield: float = 1.0
+    avg_latency: float = 0.0
+    avg_output_tokens: float = 0.0
+
+class BatchSizeTuner:
+    """Grows the batch while results stay clean and shrinks it after failures"""
+    
+    def __init__(self, initial_size: int = 10, min_size: int = MIN_BATCH_SIZE, max_size: int = MAX_BATCH_SIZE,
+                 max_output_tokens: int = 8000, path: Optional[Path] = DEFAULT_STATE_FILE):
+        self.initial_size = initial_size
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_output_tokens = max_output_tokens
+        self.path = Path(path) if path else None
+        self.states: Dict[str, TunerState] = {}
+        self._load()
+    
+    def _load(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, values in data.items():
+            try:
+                self.states[key] = TunerState(**values)
+            except TypeError:
+                continue
+    
+    def save(self) -> None:
+        """Persist the learned sizes (atomically)"""
+        if not self.path:
+            return
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({key: vars(state) for key, state in self.states.items()}, f, indent=2)
+        os.replace(tmp_path, self.path)
+    
+    def _clamp(self, size: int) -> int:
+        return max(self.min_size, min(self.max_size, size))
+    
+    def _state(self, key: str) -> TunerState:
+        if key not in self.states:
+            self.states[key] = TunerState(size=self._clamp(self.initial_size))
+        return self.states[key]
+    
+    def size(self, key: str) -> int:
+        """Current batch size for a language (or 'pt+es' for a fan-out set)"""
+        return self._clamp(self._state(key).size)
+    
+    def record(self, key: str, outcome: BatchOutcome) -> int:
+        """Feed back one request's outcome; returns the new batch size"""
+        state = self._state(key)
+        if outcome.requested == 0:
+            return state.size
+        
+        state.batches += 1
+        state.avg_yield += EMA_WEIGHT * (outcome.yield_ratio - state.avg_yield)
+        if not outcome.replayed:
+            state.avg_latency += EMA_WEIGHT * (outcome.latency - state.avg_latency)
+            state.avg_output_tokens += EMA_WEIGHT * (outcome.output_tokens - state.avg_output_tokens)
+        
+        failed = outcome.truncated or not outcome.aligned or outcome.yield_ratio < MIN_CLEAN_YIELD
+        near_limit = (
+            outcome.output_tokens >= self.max_output_tokens * OUTPUT_TOKEN_HEADROOM
+            or outcome.latency >= LATENCY_CEILING
+        )
+        
+        if failed:
+            # Shrink below what just failed, so the next batch has a fair chance
+            state.size = self._clamp(int(min(state.size, outcome.requested) * SHRINK_FACTOR))
+            state.clean_streak = 0
+        elif near_limit or outcome.requested < state.size * FULL_BATCH_RATIO:
+            # Clean, but either at the edge or too small to say anything about a larger batch
+            state.clean_streak = 0
+        else:
+            state.clean_streak += 1
+            if state.clean_streak >= CLEAN_STREAK_TO_GROW:
+                state.size = self._clamp(state.size + GROW_STEP)
+                state.clean_streak = 0
+        
+        return state.size
+    
+    def summary(self) -> str:
+        """One line per language key, for logs"""
+        return '\n'.join(
+            f"{key}: {state.size} texts/request "
+            f"(yield {state.avg_yield:.0%}, {state.avg_latency:.1f}s, {state.avg_output_tokens:.0f} output tokens, "
+            f"{state.batches} batches)"
+            for key, state in sorted(self.states.items())
+        )
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Bloom Filter
+============
+
+Compact set-membership filter used by the translator as a negative cache of
+the (source text, target language) pairs that already have an approved
+translation. "Not present" answers are exact; "present" answers are wrong at
+most `error_rate` of the time and must be confirmed against the database.
+
+At the default 1% error rate a filter takes about 1.2 MB per million entries.
+"""
+
+import hashlib
+import math
+
+class BloomFilter:
+    """Fixed-size Bloom filter over byte-string keys (double hashing on BLAKE2b)"""
+    
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, key: bytes):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+    
+    def add(self, key: bytes) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, key: bytes) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+    
+    @property
+    def size_bytes(self) -> int:
+        return len(self.bits)
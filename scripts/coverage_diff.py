@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Translation Coverage Diff
+=========================
+
+Compares the UI strings in the extractor index (`ui_strings_index.json`) with
+the Translation table, for every target language in one streamed pass:
+
+- missing:  UI string with no row for a language
+- stale:    UI string whose rows for a language are none approved; the
+            translator treats them as missing and translates them again
+- orphaned: row whose source text is no longer anywhere in the UI
+
+Masked templates (category `template`) are not UI strings and are skipped.
+
+Both sides are reduced to hashed keys: the first 16 bytes of the source
+digest, i.e. the `sourceHash` column, so backfilled rows send no text over
+the wire. The UI side is one dict entry per distinct string, and coverage is
+one byte per string and language, so hundreds of thousands of strings in many
+languages fit in a few tens of MB. Translation rows are streamed with a server
+side cursor and never held.
+
+The diff is JSON Lines, one line per text (or per orphaned row), and can be
+fed straight into the shared job queue with `--enqueue`:
+
+    {"op": "orphaned", "lang": "pt", "id": "clx..."}
+    {"op": "missing", "text": "Client Added", "langs": ["pt", "es"]}
+    {"op": "stale", "text": "Save changes", "langs": ["fr"]}
+
+Usage:
+    python coverage_diff.py --output coverage.jsonl
+    python coverage_diff.py --rescan --languages pt es --enqueue
+    python coverage_diff.py --summary
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional, TextIO
+
+# Add the current directory to path for imports
+sys.path.append(str(Path(__file__).parent))
+
+from gemini_translator import LANGUAGE_NAMES, LOOKUP_BY_TEXT, create_db_pool, detect_lookup_mode, source_digest
+from ui_string_extractor import DEFAULT_INDEX_FILE, DEFAULT_SRC_DIR, UIStringIndex
+
+KEY_BYTES = 16
+
+# Per string and language coverage flags
+PRESENT = 1
+APPROVED = 2
+
+MISSING = 'missing'
+STALE = 'stale'
+ORPHANED = 'orphaned'
+
+# Texts per language sent to the job queue in one INSERT
+ENQUEUE_CHUNK = 5000
+
+def coverage_key(digest: bytes) -> bytes:
+    """Hashed key of a source text, from its full source digest"""
+    return bytes(digest[:KEY_BYTES])
+
+class UIStringSet:
+    """Distinct extracted UI strings, addressable by hashed key"""
+    
+    def __init__(self):
+        self.keys: Dict[bytes, int] = {}
+        self.texts: List[str] = []
+    
+    def add(self, text: str) -> None:
+        key = coverage_key(source_digest(text))
+        if key not in self.keys:
+            self.keys[key] = len(self.texts)
+            self.texts.append(text)
+    
+    @classmethod
+    def from_index(cls, index: UIStringIndex) -> 'UIStringSet':
+        strings = cls()
+        for entry in index.files.values():
+            for text in entry.strings:
+                strings.add(text)
+        return strings
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+
+@dataclass
+class CoverageSummary:
+    """Counts per language after a scan"""
+    ui_strings: int
+    rows_scanned: int = 0
+    covered: Dict[str, int] = field(default_factory=dict)
+    missing: Dict[str, int] = field(default_factory=dict)
+    stale: Dict[str, int] = field(default_factory=dict)
+    orphaned: Dict[str, int] = field(default_factory=dict)
+    
+    def format(self) -> str:
+        lines = [f"📚 {self.ui_strings} UI strings, {self.rows_scanned} translation rows scanned"]
+        for lang in self.covered:
+            coverage = self.covered[lang] / max(self.ui_strings, 1) * 100
+            lines.append(
+                f"   {lang}: {coverage:.1f}% covered, {self.missing[lang]} missing, "
+                f"{self.stale[lang]} stale, {self.orphaned[lang]} orphaned"
+            )
+        return '\n'.join(lines)
+
+class CoverageDiff:
+    """Set difference between the UI strings and the Translation rows of several languages"""
+    
+    def __init__(self, ui: UIStringSet, languages: List[str]):
+        self.ui = ui
+        self.languages = languages
+        self.flags: Dict[str, bytearray] = {lang: bytearray(len(ui)) for lang in languages}
+        self.orphaned: Dict[str, int] = {lang: 0 for lang in languages}
+        self.rows_scanned = 0
+    
+    def observe(self, digest: bytes, lang: str, approved: bool, row_id: str) -> Optional[Dict]:
+        """Fold one Translation row in; returns an orphan record if its source left the UI"""
+        flags = self.flags.get(lang)
+        if flags is None:
+            return None
+        
+        self.rows_scanned += 1
+        index = self.ui.keys.get(coverage_key(digest))
+        if index is None:
+            self.orphaned[lang] += 1
+            return {'op': ORPHANED, 'lang': lang, 'id': row_id}
+        
+        flags[index] |= PRESENT | (APPROVED if approved else 0)
+        return None
+    
+    def records(self) -> Iterator[Dict]:
+        """Missing and stale records, one per text, in extraction order"""
+        for index, text in enumerate(self.ui.texts):
+            missing, stale = [], []
+            for lang in self.languages:
+                flags = self.flags[lang][index]
+                if not flags:
+                    missing.append(lang)
+                elif not flags & APPROVED:
+                    stale.append(lang)
+            if missing:
+                yield {'op': MISSING, 'text': text, 'langs': missing}
+            if stale:
+                yield {'op': STALE, 'text': text, 'langs': stale}
+    
+    def summary(self) -> CoverageSummary:
+        summary = CoverageSummary(len(self.ui), self.rows_scanned)
+        for lang, flags in self.flags.items():
+            summary.missing[lang] = flags.count(0)
+            summary.stale[lang] = flags.count(PRESENT)
+            summary.covered[lang] = len(flags) - summary.missing[lang] - summary.stale[lang]
+            summary.orphaned[lang] = self.orphaned[lang]
+        return summary
+
+async def scan_translations(db_pool, diff: CoverageDiff) -> AsyncIterator[Dict]:
+    """Stream every Translation row of the diffed languages into `diff`, yielding orphans"""
+    async with db_pool.acquire() as conn:
+        if await detect_lookup_mode(conn) == LOOKUP_BY_TEXT:
+            columns = 'NULL::bytea AS digest, "sourceText" AS text'
+        else:
+            # Only un-backfilled rows need their text sent over
+            columns = '"sourceHash" AS digest, CASE WHEN "sourceHash" IS NULL THEN "sourceText" END AS text'
+        
+        async with conn.transaction():
+            async for row in conn.cursor(
+                f"""
+                SELECT id, {columns}, "targetLang", "status" = 'approved' AS approved
+                FROM "Translation"
+                WHERE "targetLang" = ANY($1::text[]) AND "category" <> 'template'
+                """,
+                diff.languages,
+                prefetch=10000
+            ):
+                digest = row['digest'] or source_digest(row['text'])
+                orphan = diff.observe(digest, row['targetLang'], row['approved'], row['id'])
+                if orphan is not None:
+                    yield orphan
+
+def write_record(record: Dict, out: TextIO) -> None:
+    out.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+async def enqueue_records(db_pool, records: Iterator[Dict], logger=None) -> int:
+    """Queue the missing and stale texts of a diff, in chunks"""
+    from translation_queue import TranslationQueue
+    
+    queue = TranslationQueue(db_pool, logger=logger)
+    pending: Dict[str, List[str]] = {}
+    added = 0
+    
+    for record in records:
+        for lang in record['langs']:
+            pending.setdefault(lang, []).append(record['text'])
+        if max(len(texts) for texts in pending.values()) >= ENQUEUE_CHUNK:
+            added += await queue.enqueue(pending, category='bulk_overnight')
+            pending = {}
+    
+    if pending:
+        added += await queue.enqueue(pending, category='bulk_overnight')
+    return added
+
+async def main():
+    """Main CLI interface"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    parser = argparse.ArgumentParser(description='Diff extracted UI strings against the Translation table')
+    parser.add_argument('--languages', nargs='+', help='Target languages (default: every supported language but en)')
+    parser.add_argument('--index', default=str(DEFAULT_INDEX_FILE), help='Extractor index (default: ui_strings_index.json)')
+    parser.add_argument('--src', default=str(DEFAULT_SRC_DIR), help='Source directory, for --rescan')
+    parser.add_argument('--rescan', action='store_true', help='Rescan the source tree first (in memory; the index file is left alone)')
+    parser.add_argument('--output', help='Write the diff to this file instead of stdout')
+    parser.add_argument('--enqueue', action='store_true', help='Queue missing and stale texts for translation workers')
+    parser.add_argument('--summary', action='store_true', help='Only print per-language counts')
+    
+    args = parser.parse_args()
+    
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("❌ Error: DATABASE_URL environment variable is required", file=sys.stderr)
+        sys.exit(1)
+    
+    index = UIStringIndex(Path(args.index), Path(args.src))
+    if args.rescan:
+        # Not saved: the index tracks which delta the overnight pipeline has consumed
+        index.update()
+    if not index.files:
+        print(f"❌ Error: extractor index {args.index} is empty; run ui_string_extractor.py or use --rescan",
+              file=sys.stderr)
+        sys.exit(1)
+    
+    languages = args.languages or [lang for lang in LANGUAGE_NAMES if lang != 'en']
+    diff = CoverageDiff(UIStringSet.from_index(index), languages)
+    
+    out = None
+    if not args.summary:
+        if args.output:
+            out = open(args.output, 'w', encoding='utf-8')
+        elif not args.enqueue:
+            out = sys.stdout
+    
+    db_pool = await create_db_pool(database_url, max_size=2)
+    try:
+        async for orphan in scan_translations(db_pool, diff):
+            if out is not None:
+                write_record(orphan, out)
+        
+        if out is not None:
+            for record in diff.records():
+                write_record(record, out)
+            out.flush()
+        
+        if args.enqueue:
+            added = await enqueue_records(db_pool, diff.records())
+            print(f"📥 Queued {added} new translation jobs", file=sys.stderr)
+    finally:
+        await db_pool.close()
+        if out is not None and out is not sys.stdout:
+            out.close()
+    
+    print(diff.summary().format(), file=sys.stderr)
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Translation Bundle Exporter
+===========================
+
+Compiles approved translations into one static, cacheable bundle per language
+so the frontend can load them without hitting the database.
+
+- JSON bundles map source text -> translated text
+- Binary bundles store 64-bit hashed keys in a sorted table followed by a
+  UTF-8 string blob, so lookups are a binary search over fixed-size records
+- Filenames are content-addressed (`translations.pt.3f9a1c2b7d4e.json`) and
+  can be served with immutable cache headers
+- `manifest.json` records each language's current file and `updatedAt`
+  watermark; only languages whose rows changed since the last export are
+  rebuilt
+- A replaced bundle is kept for a grace period (24 hours by default), so
+  clients and CDNs still holding the previous manifest can fetch it
+
+Usage:
+    python export_translation_bundles.py
+    python export_translation_bundles.py --languages pt es --format bin
+    python export_translation_bundles.py --force
+    python export_translation_bundles.py --grace-hours 72
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Add the current directory to path for imports
+sys.path.append(str(Path(__file__).parent))
+
+# quick_translate.py reads bundles through this module on its fast path, so the
+# database and asyncio imports are deferred to the code that exports them.
+
+DEFAULT_OUTPUT_DIR = Path(__file__).resolve().parent.parent / 'public' / 'locales'
+MANIFEST_NAME = 'manifest.json'
+
+# How long a replaced bundle stays on disk after the manifest stops referencing it
+DEFAULT_GRACE_PERIOD = timedelta(hours=24)
+
+BUNDLE_MAGIC = b'AVTB'
+BUNDLE_VERSION = 1
+HEADER = struct.Struct('<4sHI')  # magic, version, entry count
+ENTRY = struct.Struct('<QII')  # key hash, value offset, value length
+
+def key_hash(text: str) -> int:
+    """64-bit bundle key: the first 8 bytes of SHA-256 over the UTF-8 source text"""
+    return int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'little')
+
+def encode_json_bundle(lang: str, rows: Iterable[Tuple[str, str]]) -> bytes:
+    """Encode a compact JSON bundle"""
+    translations = dict(rows)
+    return json.dumps(
+        {'lang': lang, 'count': len(translations), 'translations': translations},
+        ensure_ascii=False,
+        separators=(',', ':'),
+        sort_keys=True,
+    ).encode('utf-8')
+
+def encode_binary_bundle(rows: Iterable[Tuple[str, str]]) -> bytes:
+    """Encode a binary bundle with hashed keys"""
+    entries: Dict[int, bytes] = {}
+    for source_text, translated_text in rows:
+        entries[key_hash(source_text)] = translated_text.encode('utf-8')
+    
+    table = bytearray()
+    blob = bytearray()
+    for hashed in sorted(entries):
+        value = entries[hashed]
+        table += ENTRY.pack(hashed, len(blob), len(value))
+        blob += value
+    
+    return HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(entries)) + bytes(table) + bytes(blob)
+
+class BinaryBundle:
+    """Memory-mapped reader for binary bundles"""
+    
+    def __init__(self, path: Path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, version, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+            raise ValueError(f"{path} is not a version {BUNDLE_VERSION} translation bundle")
+        
+        self._table_start = HEADER.size
+        self._blob_start = HEADER.size + self.count * ENTRY.size
+        self._keys = _EntryKeys(self)
+    
+    def _entry(self, index: int) -> Tuple[int, int, int]:
+        return ENTRY.unpack_from(self._map, self._table_start + index * ENTRY.size)
+    
+    def get(self, source_text: str) -> Optional[str]:
+        """Look up the translation of a source text"""
+        hashed = key_hash(source_text)
+        index = bisect.bisect_left(self._keys, hashed)
+        if index == self.count:
+            return None
+        
+        found, offset, length = self._entry(index)
+        if found != hashed:
+            return None
+        
+        start = self._blob_start + offset
+        return self._map[start:start + length].decode('utf-8')
+    
+    def close(self) -> None:
+        self._map.close()
+
+class _EntryKeys:
+    """Sequence view over a bundle's sorted key column (for bisect)"""
+    
+    def __init__(self, bundle: BinaryBundle):
+        self._bundle = bundle
+    
+    def __len__(self) -> int:
+        return self._bundle.count
+    
+    def __getitem__(self, index: int) -> int:
+        return self._bundle._entry(index)[0]
+
+def load_manifest_entry(lang: str, output_dir: Path = DEFAULT_OUTPUT_DIR) -> Tuple[Optional[Dict], Optional[str]]:
+    """A language's manifest entry and the time of the export that wrote the manifest"""
+    try:
+        with open(Path(output_dir) / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None, None
+    return manifest.get('languages', {}).get(lang), manifest.get('generatedAt')
+
+def load_bundle(lang: str, output_dir: Path = DEFAULT_OUTPUT_DIR):
+    """Open a language's current bundle from the manifest (anything with `.get(text)`), or None"""
+    output_dir = Path(output_dir)
+    entry, _ = load_manifest_entry(lang, output_dir)
+    
+    path = output_dir / entry['file'] if entry else None
+    if path is None or not path.exists():
+        return None
+    
+    if entry.get('format') == 'bin':
+        return BinaryBundle(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['translations']
+
+class TranslationBundleExporter:
+    """Exports per-language bundles, rebuilding only languages that changed"""
+    
+    def __init__(self, database_url: str, output_dir: Path = DEFAULT_OUTPUT_DIR, bundle_format: str = 'json',
+                 grace_period: timedelta = DEFAULT_GRACE_PERIOD):
+        self.database_url = database_url
+        self.output_dir = Path(output_dir)
+        self.bundle_format = bundle_format
+        self.grace_period = grace_period
+        self.manifest_path = self.output_dir / MANIFEST_NAME
+        self.db_pool = None
+    
+    def load_manifest(self) -> Dict:
+        """Load the manifest written by the previous export"""
+        if self.manifest_path.exists():
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'languages': {}}
+    
+    def save_manifest(self, manifest: Dict) -> None:
+        manifest['generatedAt'] = datetime.now().isoformat()
+        tmp_path = self.manifest_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+    
+    async def fetch_language_state(self, languages: Optional[List[str]]) -> Dict[str, Dict]:
+        """Current `updatedAt` watermark and row count per language, in one query"""
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT "targetLang", MAX("updatedAt") AS watermark, COUNT(*) AS rows
+                FROM "Translation"
+                WHERE "status" = 'approved' AND "targetLang" <> 'en' AND "category" <> 'template'
+                AND ($1::text[] IS NULL OR "targetLang" = ANY($1::text[]))
+                GROUP BY "targetLang"
+                """,
+                languages
+            )
+        
+        return {
+            row['targetLang']: {'watermark': row['watermark'].isoformat(), 'rows': row['rows']}
+            for row in rows
+        }
+    
+    async def fetch_rows(self, lang: str) -> List[Tuple[str, str]]:
+        """All approved translations for one language"""
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT "sourceText", "translatedText" FROM "Translation"
+                WHERE "targetLang" = $1 AND "status" = 'approved' AND "category" <> 'template'
+                ORDER BY "sourceText"
+                """,
+                lang
+            )
+        return [(row['sourceText'], row['translatedText']) for row in rows]
+    
+    def write_bundle(self, lang: str, rows: List[Tuple[str, str]]) -> Tuple[str, str]:
+        """Write a content-addressed bundle file and return (filename, digest)"""
+        if self.bundle_format == 'bin':
+            payload = encode_binary_bundle(rows)
+        else:
+            payload = encode_json_bundle(lang, rows)
+        
+        digest = hashlib.sha256(payload).hexdigest()
+        filename = f"translations.{lang}.{digest[:12]}.{self.bundle_format}"
+        path = self.output_dir / filename
+        
+        if not path.exists():
+            tmp_path = path.with_suffix(path.suffix + '.tmp')
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, path)
+        
+        return filename, digest
+    
+    async def export(self, languages: Optional[List[str]] = None, force: bool = False) -> Dict[str, str]:
+        """Rebuild stale bundles and return {lang: filename} for the ones written"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        manifest = self.load_manifest()
+        previous = manifest.setdefault('languages', {})
+        retired = manifest.setdefault('retired', {})  # replaced file -> when it was replaced
+        
+        if self.db_pool is None:
+            from gemini_translator import create_db_pool
+            self.db_pool = await create_db_pool(self.database_url)
+        
+        state = await self.fetch_language_state(languages)
+        rebuilt = {}
+        
+        for lang, current in sorted(state.items()):
+            entry = previous.get(lang)
+            unchanged = (
+                entry is not None
+                and entry.get('format') == self.bundle_format
+                and entry.get('watermark') == current['watermark']
+                and entry.get('rows') == current['rows']  # catches deletions
+                and (self.output_dir / entry['file']).exists()
+            )
+            if unchanged and not force:
+                print(f"⏭️  {lang}: up to date ({current['rows']} rows)")
+                continue
+            
+            rows = await self.fetch_rows(lang)
+            filename, digest = self.write_bundle(lang, rows)
+            
+            if entry and entry.get('file') != filename:
+                retired.setdefault(entry['file'], datetime.now().isoformat())
+            retired.pop(filename, None)
+            
+            previous[lang] = {
+                'file': filename,
+                'sha256': digest,
+                'format': self.bundle_format,
+                'watermark': current['watermark'],
+                'rows': current['rows'],
+            }
+            rebuilt[lang] = filename
+            print(f"📦 {lang}: {len(rows)} translations -> {filename}")
+        
+        self.save_manifest(manifest)
+        self.prune_retired(manifest)
+        return rebuilt
+    
+    def prune_retired(self, manifest: Dict) -> None:
+        """Delete replaced bundles once their grace period is over"""
+        retired = manifest.get('retired', {})
+        cutoff = datetime.now() - self.grace_period
+        expired = [filename for filename, retired_at in retired.items()
+                   if datetime.fromisoformat(retired_at) < cutoff]
+        if not expired:
+            return
+        
+        # The manifest stops listing them before they are deleted
+        for filename in expired:
+            del retired[filename]
+        self.save_manifest(manifest)
+        for filename in expired:
+            (self.output_dir / filename).unlink(missing_ok=True)
+        print(f"🧹 Removed {len(expired)} bundle(s) replaced more than {self.grace_period} ago")
+    
+    async def close(self) -> None:
+        if self.db_pool:
+            await self.db_pool.close()
+            self.db_pool = None
+
+async def main():
+    """CLI interface for bundle export"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    parser = argparse.ArgumentParser(description='Export per-language translation bundles')
+    parser.add_argument('--languages', nargs='+', help='Languages to export (default: all)')
+    parser.add_argument('--output-dir', default=str(DEFAULT_OUTPUT_DIR), help='Output directory (default: public/locales)')
+    parser.add_argument('--format', choices=['json', 'bin'], default='json', help='Bundle format (default: json)')
+    parser.add_argument('--force', action='store_true', help='Rebuild every bundle regardless of watermarks')
+    parser.add_argument('--grace-hours', type=float, default=DEFAULT_GRACE_PERIOD.total_seconds() / 3600,
+                        help='Hours a replaced bundle is kept for clients holding the old manifest (default: 24)')
+    
+    args = parser.parse_args()
+    
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("❌ Error: DATABASE_URL environment variable is required")
+        sys.exit(1)
+    
+    exporter = TranslationBundleExporter(database_url, Path(args.output_dir), args.format,
+                                         timedelta(hours=args.grace_hours))
+    
+    try:
+        rebuilt = await exporter.export(args.languages, args.force)
+        print(f"✅ Rebuilt {len(rebuilt)} bundle(s) in {exporter.output_dir}")
+    finally:
+        await exporter.close()
+
+if __name__ == '__main__':
+    import asyncio
+    asyncio.run(main())
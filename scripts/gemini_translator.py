@@ -14,26 +14,45 @@ Usage:
     python gemini_translator.py --target-lang pt --batch-size 10 --source-lang en
     python gemini_translator.py --translate-missing --target-lang pt
     python gemini_translator.py --text "Hello World" --target-lang pt
+    python gemini_translator.py --reparse-journal --target-lang pt
 """
 
 import asyncio
 import asyncpg
+import hashlib
 import json
 import logging
 import os
 import re
+import sqlite3
 import sys
 import time
-from datetime import datetime, timedelta
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple
 import argparse
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 # Third-party imports
-import google.generativeai as genai
 from dotenv import load_dotenv
 
+from batch_tuner import BatchOutcome, BatchSizeTuner
+from bloom_filter import BloomFilter
+from api_key_health import (
+    FATAL, HALF_OPEN, QUOTA, TRIAL_POLL_INTERVAL, CircuitBreaker, backoff_delay, classify_error, seconds_until_midnight
+)
+from placeholder_masking import TEMPLATE_CATEGORY, MaskedText, group_by_template, mask, unmask
+from prompt_compiler import PromptCompiler
+from response_journal import MULTI, SINGLE, ResponseJournal
+from text_stream import iter_input_texts
+from translation_qa import BASE_SCORE, QualityReport, assess_batch, summarize as summarize_quality
+from translation_logging import CACHED, TEMPLATE, TRANSLATED, BatchLog, setup_logging
+from translation_snapshot import TranslationSnapshot
+from usage_aggregator import UsageAggregator
+from virtual_clock import SYSTEM_CLOCK, SystemClock
+
 # Load environment variables
 load_dotenv()
 
@@ -55,29 +74,117 @@ class TranslationRequest:
     category: str = 'general'
     context: Optional[str] = None
 
+@dataclass
+class PackedBatch:
+    """One batch after its cache probes: the texts still needing the API, ready for a request"""
+    size: int
+    log: BatchLog
+    texts: List[str] = field(default_factory=list)
+    requests: Dict[str, TranslationRequest] = field(default_factory=dict)
+    templates: Dict[str, str] = field(default_factory=dict)  # translated templates, saved with the batch
+    followers: List[Tuple[TranslationRequest, BatchLog]] = field(default_factory=list)  # later texts sharing a template
+
+GEMINI_MODEL = 'gemini-2.5-flash'
+
+GENERATION_CONFIG = {
+    'temperature': 0.1,  # Low temperature for consistent translations
+    'maxOutputTokens': 8000,
+    'candidateCount': 1
+}
+
+# Streaming --file mode: texts held between output flushes, and recently
+# resolved translations kept to answer repeats without a lookup
+FILE_WINDOW_FACTOR = 20
+FILE_RECENT_CACHE_SIZE = 10000
+
+# translate_batch: batches probed and packed ahead of the API request in flight
+PIPELINE_DEPTH = 2
+
+# Seconds the local snapshot is read without an incremental refresh from Postgres
+SNAPSHOT_MAX_AGE = 300.0
+
+# --retranslate-flagged: a row whose re-translation did not score higher gets this tag
+# once per attempt, and is left for human review after MAX_RETRANSLATE_ATTEMPTS
+RETRANSLATE_ATTEMPT_TAG = 'qa-retry'
+MAX_RETRANSLATE_ATTEMPTS = 3
+
+LANGUAGE_NAMES = {
+    'pt': 'European Portuguese (Portugal)',
+    'es': 'Spanish', 
+    'fr': 'French',
+    'de': 'German',
+    'it': 'Italian',
+    'en': 'English'
+}
+
+# How Translation rows are matched on their source text (see prisma migration
+# 20251112090000_add_translation_source_hash and backfill_source_hash.py)
+LOOKUP_BY_TEXT = 'text'      # sourceHash column not migrated yet
+LOOKUP_HYBRID = 'hybrid'     # column exists, backfill still running
+LOOKUP_BY_HASH = 'hash'      # every row carries a sourceHash
+
+def source_digest(text: str) -> bytes:
+    """Stable content digest of a source text (SHA-256 of its NFC-normalized UTF-8 form)"""
+    return hashlib.sha256(unicodedata.normalize('NFC', text).encode('utf-8')).digest()
+
+def utc_now() -> datetime:
+    """Current time as naive UTC, the way Prisma and the app store DateTime columns
+    
+    Snapshot and discovery watermarks compare `updatedAt` across writers, so
+    rows written here must not be stamped in the host's local time.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+async def detect_lookup_mode(conn: asyncpg.Connection) -> str:
+    """Decide whether Translation rows can be matched by sourceHash"""
+    has_column = await conn.fetchval(
+        """
+        SELECT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'Translation' AND column_name = 'sourceHash'
+        )
+        """
+    )
+    if not has_column:
+        return LOOKUP_BY_TEXT
+    
+    pending = await conn.fetchval(
+        'SELECT EXISTS (SELECT 1 FROM "Translation" WHERE "sourceHash" IS NULL)'
+    )
+    return LOOKUP_HYBRID if pending else LOOKUP_BY_HASH
+
+async def create_db_pool(database_url: str, max_size: int = 5) -> asyncpg.Pool:
+    """Create the connection pool used by the translator and its companion scripts"""
+    return await asyncpg.create_pool(
+        database_url,
+        min_size=1,
+        max_size=max_size,
+        command_timeout=60
+    )
+
 class RateLimiter:
     """Smart rate limiter for Gemini API that respects free tier limits"""
     
-    def __init__(self, config: RateLimitConfig):
+    def __init__(self, config: RateLimitConfig, clock: SystemClock = SYSTEM_CLOCK,
+                 logger: Optional[logging.Logger] = None):
         self.config = config
+        self.clock = clock
+        self.logger = logger or logging.getLogger()
         self.request_times: List[float] = []
         self.daily_counts: Dict[str, int] = {}  # Track daily usage per API key
         self.last_request_time: float = 0
         
     async def wait_if_needed(self, api_key_hash: str) -> None:
         """Wait if necessary to respect rate limits"""
-        current_time = time.time()
+        current_time = self.clock.time()
         
         # Check daily limit
-        today = datetime.now().strftime('%Y-%m-%d')
+        today = self.clock.now().strftime('%Y-%m-%d')
         daily_key = f"{api_key_hash}:{today}"
         
         if self.daily_counts.get(daily_key, 0) >= self.config.requests_per_day:
-            logging.warning(f"Daily limit reached for API key. Waiting until tomorrow...")
-            # Calculate seconds until midnight
-            tomorrow = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-            wait_time = (tomorrow - datetime.now()).total_seconds()
-            await asyncio.sleep(wait_time)
+            self.logger.warning(f"Daily limit reached for API key. Waiting until tomorrow...")
+            await self.clock.sleep(seconds_until_midnight(self.clock.now()))
             return
         
         # Check per-minute limit
@@ -86,82 +193,231 @@ class RateLimiter:
         
         if len(self.request_times) >= self.config.requests_per_minute:
             wait_time = self.config.min_delay_between_requests
-            logging.info(f"Rate limit reached. Waiting {wait_time}s...")
-            await asyncio.sleep(wait_time)
+            self.logger.info(f"Rate limit reached. Waiting {wait_time}s...")
+            await self.clock.sleep(wait_time)
             return
         
         # Minimum delay between requests
         time_since_last = current_time - self.last_request_time
         if time_since_last < self.config.min_delay_between_requests:
             wait_time = self.config.min_delay_between_requests - time_since_last
-            logging.info(f"Enforcing minimum delay: {wait_time:.1f}s")
-            await asyncio.sleep(wait_time)
+            self.logger.info(f"Enforcing minimum delay: {wait_time:.1f}s")
+            await self.clock.sleep(wait_time)
+    
+    def remaining_today(self, api_key_hash: str) -> int:
+        """Requests left today for an API key"""
+        today = self.clock.now().strftime('%Y-%m-%d')
+        used = self.daily_counts.get(f"{api_key_hash}:{today}", 0)
+        return max(self.config.requests_per_day - used, 0)
+    
+    def mark_exhausted(self, api_key_hash: str) -> None:
+        """Record that the server reported a key's daily quota as spent"""
+        today = self.clock.now().strftime('%Y-%m-%d')
+        self.daily_counts[f"{api_key_hash}:{today}"] = self.config.requests_per_day
     
     def record_request(self, api_key_hash: str) -> None:
         """Record a successful request"""
-        current_time = time.time()
+        current_time = self.clock.time()
         self.request_times.append(current_time)
         self.last_request_time = current_time
         
-        today = datetime.now().strftime('%Y-%m-%d')
+        today = self.clock.now().strftime('%Y-%m-%d')
         daily_key = f"{api_key_hash}:{today}"
         self.daily_counts[daily_key] = self.daily_counts.get(daily_key, 0) + 1
 
 class GeminiTranslator:
     """Main translator class that handles Gemini API interactions and database operations"""
     
-    def __init__(self, database_url: str, api_keys: List[str]):
+    def __init__(self, database_url: str, api_keys: List[str], max_concurrency: int = 4,
+                 clock: SystemClock = SYSTEM_CLOCK):
         self.database_url = database_url
         self.api_keys = [key for key in api_keys if key and key.strip()]
         self.current_key_index = 0
-        self.rate_limiter = RateLimiter(RateLimitConfig())
+        self.keys_rotated = 0
+        # Waits and quota days follow this clock; a VirtualClock lets a simulation run a day in seconds
+        self.clock = clock
+        self.rate_limiter = RateLimiter(RateLimitConfig(), clock)
         self.db_pool: Optional[asyncpg.Pool] = None
+        self.lookup_mode = LOOKUP_BY_TEXT
         
-        # Setup logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('translation.log'),
-                logging.StreamHandler()
-            ]
-        )
+        # Setup logging (a no-op if the CLI already chose a mode, see translation_logging.py)
+        setup_logging('translation.log')
         self.logger = logging.getLogger(__name__)
         
         if not self.api_keys:
             raise ValueError("No valid API keys provided")
+        
+        self.key_breakers = [CircuitBreaker(clock=clock.monotonic, wall_clock=clock.now) for _ in self.api_keys]
             
-        # Configure Gemini
-        self._setup_gemini()
+        # Native async transport with a keep-alive session per key, created on first use
+        self.max_concurrency = max_concurrency
+        self._transport = None
+        
+        # Cache hits are counted in memory and written behind in batches
+        self.usage = UsageAggregator(logger=self.logger)
+        
+        # Local SQLite copy of approved translations, consulted before Postgres
+        self.snapshot = TranslationSnapshot()
+        self.snapshot_ok = False
+        self._snapshot_checked_at = float('-inf')
+        
+        # Optional negative cache of existing pairs (see load_existence_filter)
+        self.existence_filter: Optional[BloomFilter] = None
+        self.filter_skips = 0
+        
+        # Translated placeholder templates, keyed by (template, language)
+        self.template_translations: Dict[Tuple[str, str], str] = {}
+        
+        # Raw responses, kept on disk so a paid response survives a crash before it is saved
+        self.journal = ResponseJournal(GEMINI_MODEL)
+        
+        # Optional feedback control of texts per request (see enable_batch_tuning)
+        self.batch_tuner: Optional[BatchSizeTuner] = None
+        
+        # Compact prompt templates, compiled once per language, and billed tokens per request
+        self.prompts = PromptCompiler(LANGUAGE_NAMES)
+    
+    def enable_batch_tuning(self, initial_size: int) -> None:
+        """Let observed outcomes drive the batch size, starting new languages at `initial_size`"""
+        self.batch_tuner = BatchSizeTuner(initial_size, max_output_tokens=GENERATION_CONFIG['maxOutputTokens'])
+    
+    def cap_batch_size(self, size: int) -> None:
+        """Keep tuned sizes at or below `size`, e.g. the batch size a run was planned with"""
+        if self.batch_tuner is not None:
+            self.batch_tuner.max_size = max(self.batch_tuner.min_size, min(self.batch_tuner.max_size, size))
+    
+    @staticmethod
+    def tuning_key(target_langs: List[str]) -> str:
+        return '+'.join(sorted(target_langs))
+    
+    def batch_size_for(self, target_langs: List[str], default: int) -> int:
+        """Texts per request for these languages: the learned size if tuning is on, else `default`"""
+        if self.batch_tuner is None:
+            return default
+        return self.batch_tuner.size(self.tuning_key(target_langs))
+    
+    def _record_outcome(self, target_langs: List[str], outcome: BatchOutcome) -> None:
+        """Feed a request's outcome to the batch tuner and persist what it learned"""
+        key = self.tuning_key(target_langs)
+        previous = self.batch_tuner.size(key)
+        size = self.batch_tuner.record(key, outcome)
+        if size != previous:
+            self.logger.info(
+                f"Batch size for {key}: {previous} -> {size} "
+                f"({outcome.returned}/{outcome.requested} returned, aligned={outcome.aligned}, "
+                f"truncated={outcome.truncated}, {outcome.latency:.1f}s)"
+            )
+        try:
+            self.batch_tuner.save()
+        except OSError as e:
+            self.logger.warning(f"Could not save batch tuning state: {e}")
     
-    def _setup_gemini(self) -> None:
-        """Setup Gemini AI with the first available API key"""
-        genai.configure(api_key=self.api_keys[self.current_key_index])
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+    @property
+    def transport(self):
+        """API transport; aiohttp is only imported once a request is actually sent"""
+        if self._transport is None:
+            from gemini_transport import GeminiTransport
+            self._transport = GeminiTransport(GEMINI_MODEL, max_concurrency=self.max_concurrency)
+        return self._transport
     
-    def _get_api_key_hash(self) -> str:
-        """Get a hash of the current API key for rate limiting"""
-        return str(hash(self.api_keys[self.current_key_index]))
+    def _get_api_key_hash(self, key_index: Optional[int] = None) -> str:
+        """Get a hash of the current (or given) API key for rate limiting"""
+        if key_index is None:
+            key_index = self.current_key_index
+        return str(hash(self.api_keys[key_index]))
+    
+    def remaining_quotas(self) -> List[int]:
+        """Requests left today for each configured API key"""
+        return [
+            self.rate_limiter.remaining_today(self._get_api_key_hash(index))
+            for index in range(len(self.api_keys))
+        ]
+    
+    def _use_api_key(self, key_index: int) -> None:
+        """Switch to a specific API key (used by the scheduler)"""
+        self.current_key_index = key_index % len(self.api_keys)
+    
+    def _key_available(self, key_index: int) -> bool:
+        """Whether a key's circuit breaker is closed and it has daily quota left"""
+        return (
+            self.key_breakers[key_index].allow_request()
+            and self.rate_limiter.remaining_today(self._get_api_key_hash(key_index)) > 0
+        )
+    
+    def _any_quota_left(self) -> bool:
+        """Whether any key that is not disabled still has daily quota"""
+        return any(
+            not breaker.disabled and self.rate_limiter.remaining_today(self._get_api_key_hash(key_index)) > 0
+            for key_index, breaker in enumerate(self.key_breakers)
+        )
     
     def _rotate_api_key(self) -> bool:
-        """Rotate to next API key if available"""
-        if len(self.api_keys) <= 1:
-            return False
-            
-        self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-        self._setup_gemini()
-        self.logger.info(f"Rotated to API key #{self.current_key_index + 1}")
-        return True
+        """Rotate to the next healthy API key with quota left, if any"""
+        for offset in range(1, len(self.api_keys)):
+            key_index = (self.current_key_index + offset) % len(self.api_keys)
+            if self._key_available(key_index):
+                self._use_api_key(key_index)
+                self.keys_rotated += 1
+                self.logger.info(f"Rotated to API key #{self.current_key_index + 1}")
+                return True
+        return False
+    
+    async def _acquire_healthy_key(self) -> None:
+        """Switch to a usable key, waiting for the soonest breaker to half-open if none is"""
+        if self._key_available(self.current_key_index) or self._rotate_api_key():
+            return
+        
+        if all(breaker.disabled for breaker in self.key_breakers):
+            raise RuntimeError("All API keys have been disabled after fatal errors")
+        
+        waits = [
+            (breaker.retry_in(), key_index)
+            for key_index, breaker in enumerate(self.key_breakers)
+            if not breaker.disabled
+            and self.rate_limiter.remaining_today(self._get_api_key_hash(key_index)) > 0
+        ]
+        if not waits:
+            return  # Every key is out of daily quota; the rate limiter waits for midnight
+        
+        wait_time, key_index = min(waits)
+        self.logger.warning(f"All API keys are cooling down. Waiting {wait_time:.0f}s for key #{key_index + 1}...")
+        await self.clock.sleep(wait_time)
+        self._use_api_key(key_index)
     
     async def _init_database(self) -> None:
         """Initialize database connection pool"""
         if self.db_pool is None:
-            self.db_pool = await asyncpg.create_pool(
-                self.database_url,
-                min_size=1,
-                max_size=5,
-                command_timeout=60
-            )
+            self.db_pool = await create_db_pool(self.database_url)
+            async with self.db_pool.acquire() as conn:
+                self.lookup_mode = await detect_lookup_mode(conn)
+            self.usage.start(self.db_pool)
+            if self.lookup_mode != LOOKUP_BY_HASH:
+                self.logger.info(f"Translation lookups by source text ({self.lookup_mode} mode)")
+            await self._refresh_snapshot()
+    
+    async def _refresh_snapshot(self) -> None:
+        """Bring the local snapshot up to date with rows changed since its watermark"""
+        self._snapshot_checked_at = self.clock.monotonic()
+        try:
+            async with self.db_pool.acquire() as conn:
+                applied = await self.snapshot.refresh(conn)
+            self.snapshot_ok = True
+            if applied:
+                self.logger.info(f"Local snapshot refreshed with {applied} changed translations")
+        except sqlite3.Error as e:
+            self.snapshot_ok = False
+            self.logger.warning(f"Local snapshot unavailable, using the database only: {e}")
+    
+    async def _snapshot_lookup(self, source_text: str, target_lang: str) -> Optional[str]:
+        """Answer from the local snapshot, which is refreshed before the first read and then every SNAPSHOT_MAX_AGE"""
+        if not self.db_pool:
+            await self._init_database()
+        elif self.clock.monotonic() - self._snapshot_checked_at > SNAPSHOT_MAX_AGE:
+            await self._refresh_snapshot()
+        
+        if not self.snapshot_ok:
+            return None
+        return self.snapshot.get(source_text, target_lang)
     
     async def _close_database(self) -> None:
         """Close database connection pool"""
@@ -169,132 +425,417 @@ class GeminiTranslator:
             await self.db_pool.close()
             self.db_pool = None
     
+    async def close(self) -> None:
+        """Flush usage counts, then close API sessions and the database pool"""
+        await self.usage.stop()
+        if self._transport is not None:
+            await self._transport.close()
+        await self._close_database()
+        self.snapshot.close()
+    
+    @staticmethod
+    def _existence_key(source_text: str, target_lang: str) -> bytes:
+        return source_digest(source_text) + target_lang.encode('utf-8')
+    
+    async def load_existence_filter(self, error_rate: float = 0.01) -> None:
+        """Build a Bloom filter of approved (source text, language) pairs with one streamed scan
+        
+        Afterwards a probe the filter rules out skips the database entirely.
+        Rows inserted by other writers after the scan are not in the filter;
+        those texts are re-translated and their rows updated on save.
+        """
+        if not self.db_pool:
+            await self._init_database()
+        
+        if self.lookup_mode == LOOKUP_BY_TEXT:
+            columns = 'NULL::bytea AS digest, "sourceText" AS text'
+        else:
+            # Only un-backfilled rows need their text sent over
+            columns = '"sourceHash" AS digest, CASE WHEN "sourceHash" IS NULL THEN "sourceText" END AS text'
+        
+        async with self.db_pool.acquire() as conn:
+            total = await conn.fetchval('SELECT COUNT(*) FROM "Translation" WHERE "status" = \'approved\'')
+            # Headroom for the rows this run adds
+            existence_filter = BloomFilter(int(total * 1.2) + 10000, error_rate)
+            
+            async with conn.transaction():
+                async for row in conn.cursor(
+                    f'SELECT {columns}, "targetLang" FROM "Translation" WHERE "status" = \'approved\'',
+                    prefetch=10000
+                ):
+                    digest = row['digest'] or source_digest(row['text'])
+                    existence_filter.add(digest + row['targetLang'].encode('utf-8'))
+        
+        self.existence_filter = existence_filter
+        self.logger.info(
+            f"Existence filter loaded: {existence_filter.count} translations in "
+            f"{existence_filter.size_bytes / 1_000_000:.1f} MB"
+        )
+    
+    def source_match_sql(self, left: str, right: str) -> str:
+        """SQL condition matching two Translation-shaped relations on their source text"""
+        column = '"sourceHash"' if self.lookup_mode == LOOKUP_BY_HASH else '"sourceText"'
+        return f'{left}.{column} = {right}.{column}'
+    
     async def _translation_exists(self, source_text: str, target_lang: str) -> Optional[str]:
-        """Check if translation already exists in database"""
+        """Check if translation already exists in the local snapshot or the database"""
+        cached = await self._snapshot_lookup(source_text, target_lang)
+        if cached is not None:
+            return cached
+        
+        if self.existence_filter is not None and \
+                self._existence_key(source_text, target_lang) not in self.existence_filter:
+            self.filter_skips += 1
+            return None
+        
         if not self.db_pool:
             await self._init_database()
+        
+        if self.lookup_mode == LOOKUP_BY_HASH:
+            source_match = '"sourceHash" = $1'
+            source_key = source_digest(source_text)
+        elif self.lookup_mode == LOOKUP_HYBRID:
+            source_match = '("sourceHash" = $1 OR ("sourceHash" IS NULL AND "sourceText" = $3))'
+            source_key = source_digest(source_text)
+        else:
+            source_match = '"sourceText" = $1'
+            source_key = source_text
+        
+        args = [source_key, target_lang]
+        if self.lookup_mode == LOOKUP_HYBRID:
+            args.append(source_text)
             
         async with self.db_pool.acquire() as conn:
             result = await conn.fetchrow(
-                """
+                f"""
                 SELECT "translatedText" FROM "Translation" 
-                WHERE "sourceText" = $1 AND "targetLang" = $2 
+                WHERE {source_match} AND "targetLang" = $2 
                 AND "status" = 'approved'
                 ORDER BY "qualityScore" DESC, "updatedAt" DESC 
                 LIMIT 1
                 """,
-                source_text, target_lang
+                *args
             )
             return result['translatedText'] if result else None
     
-    async def _save_translation(self, request: TranslationRequest, translated_text: str) -> str:
-        """Save translation to database"""
+    async def _save_translation(self, request: TranslationRequest, translated_text: str,
+                                quality: Optional[QualityReport] = None) -> str:
+        """Save translation to database, scored by the quality gate"""
         if not self.db_pool:
             await self._init_database()
             
         translation_id = f"tl_{int(time.time() * 1000000)}"  # Simple unique ID
         
+        hash_column, hash_value, hash_update = ', "sourceHash"', ', $16', ''
+        if self.lookup_mode == LOOKUP_BY_TEXT:
+            hash_column, hash_value, conflict_target = '', '', '"sourceText", "targetLang"'
+        elif self.lookup_mode == LOOKUP_HYBRID:
+            # Un-backfilled rows only match on text; fill in their digest in passing
+            conflict_target = '"sourceText", "targetLang"'
+            hash_update = ',\n                    "sourceHash" = EXCLUDED."sourceHash"'
+        else:
+            conflict_target = '"sourceHash", "targetLang"'
+        
+        now = utc_now()
+        args = [
+            translation_id, request.source_text, request.target_lang, translated_text,
+            GEMINI_MODEL, request.category, request.context, True, 'approved',
+            quality.score if quality else BASE_SCORE,
+            1, 1, now, now, quality.needs_review if quality else False
+        ]
+        if hash_column:
+            args.append(source_digest(request.source_text))
+        
         async with self.db_pool.acquire() as conn:
-            await conn.execute(
-                """
+            status = await conn.fetchval(
+                f"""
                 INSERT INTO "Translation" (
                     id, "sourceText", "targetLang", "translatedText", model, 
                     category, context, "isAutoTranslated", status, "qualityScore",
-                    "usageCount", version, "createdAt", "updatedAt"
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14)
-                ON CONFLICT ("sourceText", "targetLang") 
+                    "usageCount", version, "createdAt", "updatedAt", "needsReview"{hash_column}
+                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15{hash_value})
+                ON CONFLICT ({conflict_target}) 
                 DO UPDATE SET 
                     "translatedText" = $4,
+                    "qualityScore" = $10,
+                    "needsReview" = $15,
                     "updatedAt" = $14,
-                    "usageCount" = "Translation"."usageCount" + 1
+                    "usageCount" = "Translation"."usageCount" + 1{hash_update}
+                RETURNING status
                 """,
-                translation_id, request.source_text, request.target_lang, translated_text,
-                'gemini-2.5-flash', request.category, request.context, True, 'approved', 95,
-                1, 1, datetime.now(), datetime.now()
+                *args
             )
         
+        # An existing row keeps its status; one that is not approved must not be served locally
+        if status != 'approved':
+            self.snapshot.discard(request.source_text, request.target_lang)
+            return translation_id
+        
+        # Templates are only looked up by the translator itself, never served from the snapshot
+        if request.category != TEMPLATE_CATEGORY:
+            self.snapshot.put(request.source_text, request.target_lang, translated_text)
+        if self.existence_filter is not None:
+            self.existence_filter.add(self._existence_key(request.source_text, request.target_lang))
         return translation_id
     
-    async def _translate_with_gemini(self, texts: List[str], target_lang: str, source_lang: str = 'en') -> Dict[str, str]:
-        """Translate texts using Gemini API with smart batching"""
-        # Wait for rate limits
-        await self.rate_limiter.wait_if_needed(self._get_api_key_hash())
-        
-        # Create translation prompt
-        language_names = {
-            'pt': 'European Portuguese (Portugal)',
-            'es': 'Spanish', 
-            'fr': 'French',
-            'de': 'German',
-            'it': 'Italian',
-            'en': 'English'
-        }
-        
-        target_language = language_names.get(target_lang, target_lang)
-        source_language = language_names.get(source_lang, source_lang)
-        
-        # Batch texts for efficient translation
-        text_list = '\n'.join([f"{i+1}. {text}" for i, text in enumerate(texts)])
-        
-        prompt = f"""
-        Translate the following {source_language} texts to {target_language}. 
-        
-        IMPORTANT: If translating to Portuguese, use European Portuguese (Portugal) variant, NOT Brazilian Portuguese.
-        Use formal European Portuguese vocabulary and expressions.
-        
-        Maintain the same order and provide only the translations, one per line.
-        Keep technical terms, proper nouns, and formatting intact.
-        For UI elements, use appropriate localized terms for Portugal.
-        
-        Texts to translate:
-        {text_list}
+    def _check_quality(self, translations: Dict[str, str], target_lang: str) -> Dict[str, QualityReport]:
+        """Run the quality gate over a batch of translations, keyed by source text"""
+        pairs = list(translations.items())
+        reports = assess_batch(pairs, target_lang)
+        summary = summarize_quality(reports)
+        if summary:
+            self.logger.warning(f"QA ({target_lang}): {summary}")
+        return {source_text: report for (source_text, _), report in zip(pairs, reports)}
+    
+    async def _generate(self, prompt: str, kind: str, texts: List[str], target_langs: List[str],
+                        source_lang: str = 'en', replay: bool = True,
+                        outcome: Optional[BatchOutcome] = None) -> Optional[str]:
+        """Send a prompt to Gemini, respecting rate limits and key health, retrying on failure
         
-        Provide translations in the same order, one per line:
+        The raw response is journaled before it is returned. If this exact prompt
+        was answered before and never replayed, that response is used instead.
+        Latency, output tokens and truncation are filled into `outcome` if given.
         """
+        entry = self.journal.replayable(prompt) if replay else None
+        if entry is not None:
+            self.journal.mark_replayed(entry)
+            if outcome is not None:
+                outcome.replayed = True
+                outcome.output_tokens = entry.output_tokens
+            self.logger.info(f"Replaying journaled response from {entry.recorded_at} ({len(texts)} texts, no API call)")
+            return entry.response
         
-        max_retries = self.rate_limiter.config.max_retries
-        retry_delay = 1.0
+        # Wait for a healthy key and rate limits
+        await self._acquire_healthy_key()
+        await self.rate_limiter.wait_if_needed(self._get_api_key_hash())
+        
+        config = self.rate_limiter.config
+        max_retries = config.max_retries
         
         for attempt in range(max_retries + 1):
+            # Half-open keys take one trial request at a time; others wait or use another key
+            while not self.key_breakers[self.current_key_index].begin_request():
+                await self._acquire_healthy_key()
+                if not self._key_available(self.current_key_index):
+                    await self.clock.sleep(TRIAL_POLL_INTERVAL)
+            breaker = self.key_breakers[self.current_key_index]
+            trial = breaker.state == HALF_OPEN
             try:
-                response = await asyncio.to_thread(
-                    self.model.generate_content, 
-                    prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=0.1,  # Low temperature for consistent translations
-                        max_output_tokens=8000,
-                        candidate_count=1
-                    )
+                started = self.clock.monotonic()
+                response = await self.transport.generate(
+                    self.api_keys[self.current_key_index], prompt, GENERATION_CONFIG
                 )
+                if outcome is not None:
+                    outcome.latency = self.clock.monotonic() - started
+                    outcome.output_tokens = response.output_tokens
+                    outcome.truncated = response.finish_reason == 'MAX_TOKENS'
+                
+                # Billed whether or not the text turns out usable
+                self.prompts.record(self.tuning_key(target_langs), len(texts), response.prompt_tokens, response.output_tokens)
+                self.logger.info(f"Tokens: {response.prompt_tokens} input, {response.output_tokens} output for {len(texts)} texts")
+                
+                if response.finish_reason == 'MAX_TOKENS':
+                    self.logger.warning("Gemini response was truncated at the output token limit")
                 
                 if response.text:
                     # Record successful request
+                    breaker.record_success()
                     self.rate_limiter.record_request(self._get_api_key_hash())
-                    
-                    # Parse response
-                    translations = self._parse_translation_response(response.text, texts)
-                    
-                    self.logger.info(f"Successfully translated {len(translations)} texts")
-                    return translations
+                    self._journal_response(prompt, response, kind, texts, target_langs, source_lang)
+                    return response.text
                 else:
                     self.logger.warning("Empty response from Gemini API")
                     
             except Exception as e:
-                self.logger.error(f"Translation attempt {attempt + 1} failed: {e}")
+                error = classify_error(e)
+                self.logger.error(f"Translation attempt {attempt + 1} failed ({error.kind}): {e}")
                 
-                if attempt < max_retries:
-                    if "quota" in str(e).lower() or "limit" in str(e).lower():
-                        # Try rotating API key
-                        if self._rotate_api_key():
-                            self.logger.info("Rotated API key due to quota limit")
-                            continue
-                    
-                    await asyncio.sleep(retry_delay)
-                    retry_delay *= self.rate_limiter.config.retry_delay_multiplier
-                else:
+                breaker.record_failure(error)
+                if error.kind == QUOTA:
+                    self.rate_limiter.mark_exhausted(self._get_api_key_hash())
+                
+                # Retrying a bad request (unknown model, invalid prompt) only wastes quota
+                if attempt == max_retries or (error.kind == FATAL and not error.key_scoped):
                     raise e
+                
+                # Take a struggling key out of rotation straight away if another one is healthy
+                if not self._key_available(self.current_key_index) and self._rotate_api_key():
+                    continue
+                
+                # Backing off would only lead to a wait for midnight or a retry on the spent key
+                if error.kind == QUOTA and not self._any_quota_left():
+                    self.logger.warning("Every API key is out of daily quota; giving up on this request")
+                    raise e
+                
+                await self.clock.sleep(backoff_delay(
+                    attempt, multiplier=config.retry_delay_multiplier, retry_after=error.retry_after
+                ))
+                await self._acquire_healthy_key()
+            
+            finally:
+                if trial:
+                    breaker.end_request()
         
-        return {}
+        return None
+    
+    def _journal_response(self, prompt: str, response, kind: str, texts: List[str],
+                          target_langs: List[str], source_lang: str) -> None:
+        """Append a raw response to the journal; a full disk must not cost the response itself"""
+        try:
+            self.journal.record(
+                prompt, response.text, kind, texts, target_langs, source_lang,
+                response.prompt_tokens, response.output_tokens
+            )
+        except OSError as e:
+            self.logger.warning(f"Could not journal response: {e}")
+    
+    async def _translate_with_gemini(self, texts: List[str], target_lang: str, source_lang: str = 'en',
+                                     replay: bool = True, translated_templates: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Translate texts using Gemini API with smart batching
+        
+        Translated templates are saved here, or filled into `translated_templates` for the caller to save.
+        """
+        # Mask placeholders; texts sharing a template are translated once
+        groups = group_by_template(texts)
+        templates = list(groups)
+        prompt = self.prompts.single(templates, source_lang, target_lang)
+        
+        outcome = BatchOutcome(requested=len(texts)) if self.batch_tuner else None
+        response_text = await self._generate(prompt, SINGLE, texts, [target_lang], source_lang, replay, outcome)
+        if not response_text:
+            if outcome is not None:
+                self._record_outcome([target_lang], outcome)
+            return {}
+        
+        # Parse response
+        sink = {target_lang: translated_templates} if translated_templates is not None else None
+        translations = (await self._apply_response(response_text, SINGLE, texts, [target_lang], source_lang,
+                                                   sink))[target_lang]
+        
+        if outcome is not None:
+            # Lines are matched to texts by position, so an extra or missing line misaligns the batch
+            outcome.aligned = sum(1 for line in response_text.splitlines() if line.strip()) == len(templates)
+            outcome.returned = len(translations)
+            self._record_outcome([target_lang], outcome)
+        
+        self.logger.info(f"Successfully translated {len(translations)} texts ({len(templates)} unique templates)")
+        return translations
+    
+    async def _translate_multi_with_gemini(self, texts: List[str], target_langs: List[str],
+                                           source_lang: str = 'en') -> Dict[str, Dict[str, str]]:
+        """Translate texts into several languages with a single API request"""
+        groups = group_by_template(texts)
+        templates = list(groups)
+        prompt = self.prompts.multi(templates, source_lang, target_langs)
+        
+        outcome = BatchOutcome(requested=len(texts)) if self.batch_tuner else None
+        response_text = await self._generate(prompt, MULTI, texts, target_langs, source_lang, outcome=outcome)
+        if not response_text:
+            if outcome is not None:
+                self._record_outcome(target_langs, outcome)
+            return {lang: {} for lang in target_langs}
+        
+        translations = await self._apply_response(response_text, MULTI, texts, target_langs, source_lang)
+        
+        if outcome is not None:
+            # Judged by the weakest language; a language dropped by the parser was misaligned
+            outcome.returned = min(len(lang_translations) for lang_translations in translations.values())
+            outcome.aligned = all(translations.values())
+            self._record_outcome(target_langs, outcome)
+        
+        counts = ', '.join(f"{lang}: {len(translations[lang])}" for lang in target_langs)
+        self.logger.info(f"Successfully translated {len(texts)} texts into {len(target_langs)} languages ({counts})")
+        return translations
+    
+    async def _apply_response(self, response_text: str, kind: str, texts: List[str], target_langs: List[str],
+                              source_lang: str, translated_templates: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, Dict[str, str]]:
+        """Parse a raw response into per-language translations of the original texts
+        
+        Its templates are saved, unless `translated_templates` is given: then each
+        language's translated templates are filled into it instead.
+        """
+        groups = group_by_template(texts)
+        templates = list(groups)
+        
+        if kind == MULTI:
+            template_translations = self._parse_multi_translation_response(response_text, templates, target_langs)
+        else:
+            template_translations = {target_langs[0]: self._parse_translation_response(response_text, templates)}
+        
+        translations = {}
+        for lang in target_langs:
+            translations[lang] = self._restore_placeholders(groups, template_translations[lang])
+            if translated_templates is not None:
+                translated_templates[lang].update(template_translations[lang])
+            else:
+                await self._save_templates(groups, template_translations[lang], lang, source_lang)
+        return translations
+    
+    def _restore_placeholders(self, groups: Dict[str, List[MaskedText]],
+                              template_translations: Dict[str, str]) -> Dict[str, str]:
+        """Expand translated templates back into one translation per text, dropping any that lost a placeholder"""
+        translations = {}
+        for template, members in groups.items():
+            translated = template_translations.get(template)
+            if translated is None:
+                continue
+            for masked in members:
+                restored = unmask(translated, masked.tokens)
+                if restored is None:
+                    self.logger.warning(f"Placeholders lost in translation of '{masked.text}': '{translated}'")
+                    continue
+                translations[masked.text] = restored
+        return translations
+    
+    async def _save_templates(self, groups: Dict[str, List[MaskedText]], template_translations: Dict[str, str],
+                              target_lang: str, source_lang: str) -> None:
+        """Store translated templates that pass the quality gate, so later variants of the same string need no API call"""
+        candidates = {}
+        for template, members in groups.items():
+            translated = template_translations.get(template)
+            if translated is not None and members[0].is_templated and unmask(translated, members[0].tokens) is not None:
+                candidates[template] = translated
+        if not candidates:
+            return
+        
+        reports = self._check_quality(candidates, target_lang)
+        for template, translated in candidates.items():
+            report = reports[template]
+            if report.needs_review:
+                self.logger.warning(f"Template '{template}' flagged by QA ({', '.join(report.issues)}), not reused")
+                continue
+            
+            self.template_translations[(template, target_lang)] = translated
+            try:
+                request = TranslationRequest(template, target_lang, source_lang, TEMPLATE_CATEGORY)
+                await self._save_translation(request, translated, report)
+            except Exception as e:
+                self.logger.warning(f"Could not save template '{template}': {e}")
+    
+    async def _translation_from_template(self, source_text: str, target_lang: str) -> Optional[str]:
+        """Translation of a templated text derived from an already translated sibling template"""
+        masked = mask(source_text)
+        if not masked.is_templated:
+            return None
+        
+        key = (masked.template, target_lang)
+        translated = self.template_translations.get(key)
+        if translated is None:
+            translated = await self._translation_exists(masked.template, target_lang)
+            if translated is None:
+                return None
+            self.template_translations[key] = translated
+        return unmask(translated, masked.tokens)
+    
+    async def _fill_from_template(self, request: TranslationRequest) -> Optional[str]:
+        """Save a templated text's translation derived from its template, without an API call"""
+        derived = await self._translation_from_template(request.source_text, request.target_lang)
+        if derived is None:
+            return None
+        
+        reports = self._check_quality({request.source_text: derived}, request.target_lang)
+        await self._save_translation(request, derived, reports[request.source_text])
+        return derived
     
     def _parse_translation_response(self, response: str, original_texts: List[str]) -> Dict[str, str]:
         """Parse Gemini's translation response"""
@@ -309,6 +850,118 @@ class GeminiTranslator:
         
         return translations
     
+    def _parse_multi_translation_response(self, response: str, original_texts: List[str],
+                                          target_langs: List[str]) -> Dict[str, Dict[str, str]]:
+        """Parse a fan-out response, dropping any language whose output is missing or misaligned"""
+        payload = response.strip()
+        if payload.startswith('```'):
+            payload = re.sub(r'^```(?:json)?\s*|\s*```$', '', payload)
+        
+        try:
+            data = json.loads(payload)
+        except json.JSONDecodeError as e:
+            self.logger.warning(f"Could not parse fan-out response as JSON: {e}")
+            data = {}
+        
+        translations = {}
+        for lang in target_langs:
+            values = data.get(lang) if isinstance(data, dict) else None
+            if not isinstance(values, list) or len(values) != len(original_texts):
+                self.logger.warning(f"Fan-out response has no aligned output for {lang}")
+                translations[lang] = {}
+                continue
+            
+            translations[lang] = {
+                text: str(value).strip()
+                for text, value in zip(original_texts, values)
+                if isinstance(value, str) and value.strip()
+            }
+        
+        return translations
+    
+    async def translate_batch_multi(self, texts: List[str], target_langs: List[str], source_lang: str = 'en',
+                                    batch_size: int = 10, category: str = 'general') -> Tuple[Dict[str, Dict[str, str]], Dict[str, List[str]]]:
+        """Translate texts into all target languages, one request per batch for every language
+        
+        Returns the translations per language and, per language, the texts whose
+        output was missing so the caller can re-queue them.
+        """
+        results = {lang: {} for lang in target_langs}
+        missing = {lang: [] for lang in target_langs}
+        
+        self.logger.info(f"Processing {len(texts)} texts for {source_lang} -> {', '.join(target_langs)} (fan-out)")
+        
+        i = 0
+        while i < len(texts):
+            batch = texts[i:i + self.batch_size_for(target_langs, batch_size)]
+            i += len(batch)
+            
+            # One summary per language, as translate_batch logs for single-language batches
+            logs = {lang: BatchLog(self.logger, lang, source_lang) for lang in target_langs}
+            try:
+                await self._translate_multi_batch(batch, target_langs, source_lang, category, results, missing, logs)
+            finally:
+                for log in logs.values():
+                    log.close()
+        
+        return results, missing
+    
+    async def _translate_multi_batch(self, batch: List[str], target_langs: List[str], source_lang: str, category: str,
+                                     results: Dict[str, Dict[str, str]], missing: Dict[str, List[str]],
+                                     logs: Dict[str, BatchLog]) -> None:
+        """One fan-out batch: cache and template lookups per language, then a single request for the rest"""
+        # Check for existing translations per language
+        needed_langs = {}
+        for text in batch:
+            for lang in target_langs:
+                existing = await self._translation_exists(text, lang)
+                if existing:
+                    results[lang][text] = existing
+                    self.usage.record_hit(text, lang)
+                    logs[lang].item(CACHED, text, existing)
+                    continue
+                
+                derived = await self._fill_from_template(TranslationRequest(text, lang, source_lang, category))
+                if derived:
+                    results[lang][text] = derived
+                    logs[lang].item(TEMPLATE, text, derived)
+                else:
+                    needed_langs.setdefault(text, []).append(lang)
+        
+        texts_to_translate = [text for text in batch if text in needed_langs]
+        if not texts_to_translate:
+            return
+        
+        langs_to_request = [lang for lang in target_langs if any(lang in needed_langs[text] for text in texts_to_translate)]
+        self.logger.info(f"Translating {len(texts_to_translate)} new texts into {', '.join(langs_to_request)}...")
+        
+        try:
+            translations = await self._translate_multi_with_gemini(texts_to_translate, langs_to_request, source_lang)
+        except Exception as e:
+            self.logger.error(f"Fan-out batch translation failed: {e}")
+            translations = {lang: {} for lang in langs_to_request}
+        
+        reports = {
+            lang: self._check_quality(
+                {text: translated for text, translated in translations.get(lang, {}).items()
+                 if lang in needed_langs.get(text, ())}, lang)
+            for lang in langs_to_request
+        }
+        
+        # Split back out into one Translation row per language
+        for text in texts_to_translate:
+            for lang in needed_langs[text]:
+                translated_text = translations.get(lang, {}).get(text)
+                if translated_text is None:
+                    missing[lang].append(text)
+                    logs[lang].failed(1)
+                    continue
+                
+                request = TranslationRequest(text, lang, source_lang, category)
+                await self._save_translation(request, translated_text, reports[lang].get(text))
+                results[lang][text] = translated_text
+                logs[lang].item(TRANSLATED, text, translated_text)
+    
     async def translate_batch(self, requests: List[TranslationRequest], batch_size: int = 10) -> Dict[str, str]:
         """Translate a batch of requests efficiently"""
         results = {}
@@ -325,47 +978,158 @@ class GeminiTranslator:
             target_lang, source_lang = lang_key.split(':')
             
             self.logger.info(f"Processing {len(lang_requests)} requests for {source_lang} -> {target_lang}")
-            
-            # Process in batches
-            for i in range(0, len(lang_requests), batch_size):
-                batch = lang_requests[i:i + batch_size]
-                
-                # Check for existing translations
-                texts_to_translate = []
-                batch_requests_map = {}
-                
-                for req in batch:
-                    existing = await self._translation_exists(req.source_text, target_lang)
-                    if existing:
-                        results[req.source_text] = existing
-                        self.logger.info(f"Using cached translation: '{req.source_text}' -> '{existing}'")
-                    else:
-                        texts_to_translate.append(req.source_text)
-                        batch_requests_map[req.source_text] = req
-                
-                # Translate new texts
-                if texts_to_translate:
-                    self.logger.info(f"Translating {len(texts_to_translate)} new texts...")
-                    
+            await self._run_batch_pipeline(lang_requests, target_lang, source_lang, batch_size, results)
+        
+        return results
+    
+    async def _run_batch_pipeline(self, requests: List[TranslationRequest], target_lang: str, source_lang: str,
+                                  batch_size: int, results: Dict[str, str]) -> None:
+        """Probe, translate and save batches as overlapping stages joined by bounded queues
+        
+        While one request waits on the rate limiter or the API, the next batches are
+        probed against the cache and the previous one is saved, so the API slot never
+        waits on local work. The probe stage runs at most PIPELINE_DEPTH batches ahead.
+        
+        A text whose template is already requested by an earlier batch still in the
+        pipeline is not requested again; it is filled in once that batch is saved.
+        """
+        packed: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_DEPTH)
+        answered: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_DEPTH * 2)
+        in_flight: Dict[str, PackedBatch] = {}  # template -> batch requesting it, until that batch is saved
+        
+        async def probe_stage() -> None:
+            i = 0
+            while i < len(requests):
+                batch = requests[i:i + self.batch_size_for([target_lang], batch_size)]
+                i += len(batch)
+                await packed.put(await self._probe_batch(batch, target_lang, source_lang, results, in_flight))
+            await packed.put(None)
+        
+        async def request_stage() -> None:
+            while True:
+                batch = await packed.get()
+                if batch is None:
+                    break
+                translations = None
+                if batch.texts:
+                    self.logger.info(f"Translating {len(batch.texts)} new texts...")
                     try:
                         translations = await self._translate_with_gemini(
-                            texts_to_translate, target_lang, source_lang
+                            batch.texts, target_lang, source_lang, translated_templates=batch.templates
                         )
-                        
-                        # Save and record results
-                        for source_text, translated_text in translations.items():
-                            if source_text in batch_requests_map:
-                                req = batch_requests_map[source_text]
-                                await self._save_translation(req, translated_text)
-                                results[source_text] = translated_text
-                                self.logger.info(f"Translated: '{source_text}' -> '{translated_text}'")
-                    
                     except Exception as e:
                         self.logger.error(f"Batch translation failed: {e}")
-                        for text in texts_to_translate:
-                            results[text] = text  # Fallback to original text
+                await answered.put((batch, translations))
+            await answered.put(None)
         
-        return results
+        async def save_stage() -> None:
+            while True:
+                item = await answered.get()
+                if item is None:
+                    break
+                await self._save_batch(*item, target_lang, source_lang, results, in_flight)
+        
+        stages = [asyncio.create_task(stage()) for stage in (probe_stage, request_stage, save_stage)]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            # A failing stage must not leave the others blocked on a queue
+            for task in stages:
+                task.cancel()
+    
+    async def _probe_batch(self, batch: List[TranslationRequest], target_lang: str, source_lang: str,
+                           results: Dict[str, str], in_flight: Dict[str, PackedBatch]) -> PackedBatch:
+        """Answer what the cache and known templates can, leave texts whose template is in flight
+        to the batch requesting it, and pack the rest for one API request"""
+        packed = PackedBatch(len(batch), BatchLog(self.logger, target_lang, source_lang))
+        
+        for req in batch:
+            existing = await self._translation_exists(req.source_text, target_lang)
+            if existing:
+                results[req.source_text] = existing
+                self.usage.record_hit(req.source_text, target_lang)
+                packed.log.item(CACHED, req.source_text, existing)
+                continue
+            
+            derived = await self._fill_from_template(req)
+            if derived:
+                results[req.source_text] = derived
+                packed.log.item(TEMPLATE, req.source_text, derived)
+                continue
+            
+            template = mask(req.source_text).template
+            leader = in_flight.get(template)
+            if leader is not None and leader is not packed:
+                leader.followers.append((req, packed.log))
+                continue
+            
+            in_flight[template] = packed
+            packed.texts.append(req.source_text)
+            packed.requests[req.source_text] = req
+        
+        return packed
+    
+    async def _save_batch(self, batch: PackedBatch, translations: Optional[Dict[str, str]], target_lang: str,
+                          source_lang: str, results: Dict[str, str], in_flight: Dict[str, PackedBatch]) -> None:
+        """Check and store one answered batch and its templates, then fill in the texts later batches left to it
+        
+        Without a response (or if saving fails) texts keep their original.
+        """
+        saved = {}
+        if translations is None:
+            for text in batch.texts:
+                results[text] = text  # Fallback to original text
+        else:
+            try:
+                translations = {
+                    source_text: translated_text for source_text, translated_text in translations.items()
+                    if source_text in batch.requests
+                }
+                reports = self._check_quality(translations, target_lang)
+                
+                for source_text, translated_text in translations.items():
+                    await self._save_translation(batch.requests[source_text], translated_text, reports[source_text])
+                    results[source_text] = translated_text
+                    saved[source_text] = translated_text
+                    batch.log.item(TRANSLATED, source_text, translated_text)
+                
+                await self._save_templates(group_by_template(batch.texts), batch.templates, target_lang, source_lang)
+            
+            except Exception as e:
+                self.logger.error(f"Batch translation failed: {e}")
+                for text in batch.texts:
+                    results[text] = text  # Fallback to original text
+        
+        # Repeats were just saved; other variants are derived from this batch's template
+        while batch.followers:
+            req, log = batch.followers.pop(0)
+            if req.source_text in saved:
+                results[req.source_text] = saved[req.source_text]
+                log.item(CACHED, req.source_text, saved[req.source_text])
+                continue
+            
+            masked = mask(req.source_text)
+            template = batch.templates.get(masked.template)
+            derived = unmask(template, masked.tokens) if template is not None else None
+            if derived is None:
+                results[req.source_text] = req.source_text  # Fallback to original text
+                continue
+            
+            try:
+                reports = self._check_quality({req.source_text: derived}, target_lang)
+                await self._save_translation(req, derived, reports[req.source_text])
+            except Exception as e:
+                self.logger.error(f"Could not save '{req.source_text}': {e}")
+                results[req.source_text] = req.source_text  # Fallback to original text
+                continue
+            results[req.source_text] = derived
+            log.item(TEMPLATE, req.source_text, derived)
+        
+        for template in [template for template, leader in in_flight.items() if leader is batch]:
+            del in_flight[template]
+        
+        batch.log.failed(batch.size - sum(batch.log.counts.values()))
+        batch.log.close()
     
     async def translate_missing_from_db(self, target_lang: str = 'pt', limit: int = 100) -> int:
         """Find and translate missing translations from database"""
@@ -377,14 +1141,14 @@ class GeminiTranslator:
             # This would need to be adapted based on your specific needs
             # For now, let's get a list of source texts that don't have translations
             results = await conn.fetch(
-                """
-                SELECT DISTINCT "sourceText" 
-                FROM "Translation" 
-                WHERE "targetLang" = 'en' 
-                AND "sourceText" NOT IN (
-                    SELECT "sourceText" 
-                    FROM "Translation" 
-                    WHERE "targetLang" = $1
+                f"""
+                SELECT DISTINCT t1."sourceText" 
+                FROM "Translation" t1 
+                WHERE t1."targetLang" = 'en' 
+                AND NOT EXISTS (
+                    SELECT 1 
+                    FROM "Translation" t2 
+                    WHERE t2."targetLang" = $1 AND {self.source_match_sql('t2', 't1')}
                 )
                 LIMIT $2
                 """,
@@ -411,6 +1175,187 @@ class GeminiTranslator:
         
         return len(requests)
     
+    async def audit_translations(self, target_lang: str, batch_size: int = 15) -> int:
+        """Score existing auto-translations with the quality gate (no API calls); returns rows flagged"""
+        if not self.db_pool:
+            await self._init_database()
+        
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT id, "sourceText", "translatedText", "qualityScore", "needsReview" FROM "Translation"
+                WHERE "targetLang" = $1 AND "isAutoTranslated" = true AND "reviewedAt" IS NULL
+                AND "status" = 'approved'
+                ORDER BY "createdAt", id
+                """,
+                target_lang
+            )
+            
+            updates = []
+            flagged = 0
+            for i in range(0, len(rows), batch_size):
+                batch = rows[i:i + batch_size]
+                reports = assess_batch([(row['sourceText'], row['translatedText']) for row in batch], target_lang)
+                for row, report in zip(batch, reports):
+                    flagged += report.needs_review
+                    if (row['qualityScore'], row['needsReview']) != (report.score, report.needs_review):
+                        updates.append((row['id'], report.score, report.needs_review))
+            
+            # Scores only: updatedAt is left alone so snapshots and bundles are not rebuilt
+            await conn.executemany(
+                'UPDATE "Translation" SET "qualityScore" = $2, "needsReview" = $3 WHERE id = $1',
+                updates
+            )
+        
+        self.logger.info(f"Audited {len(rows)} {target_lang} translations: {flagged} flagged, {len(updates)} rescored")
+        return flagged
+    
+    async def retranslate_flagged(self, target_lang: str, limit: int = 100, batch_size: int = 10) -> int:
+        """Re-translate rows the quality gate flagged, keeping a new version only if it scores higher"""
+        if not self.db_pool:
+            await self._init_database()
+        
+        async with self.db_pool.acquire() as conn:
+            # $1 language, $2 limit, $3 attempt tag, $4 attempt limit
+            rows = await conn.fetch(
+                """
+                SELECT id, "sourceText", "translatedText", "qualityScore", version FROM (
+                    SELECT id, "sourceText", "translatedText", "qualityScore", version, "usageCount",
+                        coalesce(cardinality(array_positions(tags, $3)), 0) AS attempts
+                    FROM "Translation"
+                    WHERE "targetLang" = $1 AND "needsReview" = true AND "isAutoTranslated" = true
+                    AND "reviewedAt" IS NULL
+                ) flagged
+                WHERE attempts < $4
+                ORDER BY attempts, "usageCount" DESC, "qualityScore"
+                LIMIT $2
+                """,
+                target_lang, limit, RETRANSLATE_ATTEMPT_TAG, MAX_RETRANSLATE_ATTEMPTS
+            )
+        
+        self.logger.info(f"Re-translating {len(rows)} flagged {target_lang} translations")
+        improved = 0
+        
+        for i in range(0, len(rows), batch_size):
+            batch = {row['sourceText']: row for row in rows[i:i + batch_size]}
+            try:
+                # A replayed response is the one that produced the flagged rows
+                translations = await self._translate_with_gemini(list(batch), target_lang, replay=False)
+            except Exception as e:
+                self.logger.error(f"Re-translation batch failed: {e}")
+                continue
+            
+            translations = {text: translated for text, translated in translations.items() if text in batch}
+            reports = self._check_quality(translations, target_lang)
+            
+            async with self.db_pool.acquire() as conn:
+                unimproved = []
+                for source_text, row in batch.items():
+                    translated_text = translations.get(source_text)
+                    if translated_text is None or reports[source_text].score <= row['qualityScore']:
+                        unimproved.append(row['id'])
+                        continue
+                    
+                    report = reports[source_text]
+                    await self._replace_translation(
+                        conn, row, target_lang, translated_text, report,
+                        f"QA re-translation ({row['qualityScore']} -> {report.score})"
+                    )
+                    improved += 1
+                
+                # Counted in tags, leaving updatedAt alone so snapshots and bundles are not rebuilt
+                await conn.execute(
+                    'UPDATE "Translation" SET tags = array_append(tags, $2) WHERE id = ANY($1::text[])',
+                    unimproved, RETRANSLATE_ATTEMPT_TAG
+                )
+        
+        self.logger.info(f"Improved {improved}/{len(rows)} flagged translations")
+        return improved
+    
+    async def _replace_translation(self, conn, row, target_lang: str, translated_text: str,
+                                   report: QualityReport, reason: str) -> None:
+        """Overwrite a row's translation, bumping its version and recording the change in TranslationHistory"""
+        now = utc_now()
+        async with conn.transaction():
+            status = await conn.fetchval(
+                """
+                UPDATE "Translation" SET "translatedText" = $2, "qualityScore" = $3,
+                    "needsReview" = $4, version = $5, model = $6, "updatedAt" = $7,
+                    tags = array_remove(tags, $8)
+                WHERE id = $1
+                RETURNING status
+                """,
+                row['id'], translated_text, report.score, report.needs_review,
+                row['version'] + 1, GEMINI_MODEL, now, RETRANSLATE_ATTEMPT_TAG
+            )
+            await conn.execute(
+                """
+                INSERT INTO "TranslationHistory" (
+                    id, "translationId", "oldTranslatedText", "newTranslatedText",
+                    "changedBy", "changeReason", version, "createdAt"
+                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                """,
+                f"th_{int(time.time() * 1000000)}", row['id'], row['translatedText'], translated_text,
+                'gemini_translator', reason, row['version'] + 1, now
+            )
+        
+        if status == 'approved':
+            self.snapshot.put(row['sourceText'], target_lang, translated_text)
+        else:
+            self.snapshot.discard(row['sourceText'], target_lang)
+    
+    async def reparse_journal(self, target_lang: Optional[str] = None) -> Tuple[int, int]:
+        """Re-parse journaled responses with the current parser (no API calls)
+        
+        Texts the old parse dropped are saved; unreviewed auto-translations are
+        replaced where the new parse scores higher. Returns (added, improved).
+        """
+        if not self.db_pool:
+            await self._init_database()
+        
+        added = improved = 0
+        entries = list(self.journal.entries(target_lang))
+        self.logger.info(f"Re-parsing {len(entries)} journaled responses")
+        
+        for entry in entries:
+            translations = await self._apply_response(
+                entry.response, entry.kind, entry.texts, entry.target_langs, entry.source_lang
+            )
+            
+            for lang, lang_translations in translations.items():
+                if (target_lang and lang != target_lang) or not lang_translations:
+                    continue
+                reports = self._check_quality(lang_translations, lang)
+                
+                async with self.db_pool.acquire() as conn:
+                    rows = await conn.fetch(
+                        """
+                        SELECT id, "sourceText", "translatedText", "qualityScore", version,
+                               "isAutoTranslated", "reviewedAt"
+                        FROM "Translation"
+                        WHERE "targetLang" = $1 AND "sourceText" = ANY($2::text[])
+                        """,
+                        lang, list(lang_translations)
+                    )
+                    existing = {row['sourceText']: row for row in rows}
+                    
+                    for source_text, translated_text in lang_translations.items():
+                        row, report = existing.get(source_text), reports[source_text]
+                        if row is None:
+                            request = TranslationRequest(source_text, lang, entry.source_lang)
+                            await self._save_translation(request, translated_text, report)
+                            added += 1
+                        elif (row['isAutoTranslated'] and row['reviewedAt'] is None
+                              and row['translatedText'] != translated_text and report.score > row['qualityScore']):
+                            await self._replace_translation(
+                                conn, row, lang, translated_text, report,
+                                f"Journal re-parse ({row['qualityScore']} -> {report.score})"
+                            )
+                            improved += 1
+        
+        self.logger.info(f"Journal re-parse: {added} translations added, {improved} improved")
+        return added, improved
+    
     async def translate_single(self, text: str, target_lang: str, source_lang: str = 'en') -> str:
         """Translate a single text"""
         request = TranslationRequest(
@@ -421,6 +1366,115 @@ class GeminiTranslator:
         
         results = await self.translate_batch([request])
         return results.get(text, text)
+    
+    async def translate_file(self, input_path: Path, output_path: Path, target_lang: str, source_lang: str = 'en',
+                             batch_size: int = 10, json_key: Optional[str] = None) -> Tuple[int, int]:
+        """Stream a text or JSON file through the translator, one output line per input text
+        
+        Memory stays bounded by the window and the recent-translation cache.
+        Output is appended in input order as each window completes, and a
+        `.progress` sidecar records how far it got so a re-run resumes there.
+        Returns (texts written, texts translated by the API).
+        """
+        progress_path = output_path.with_name(output_path.name + '.progress')
+        progress = self._load_file_progress(progress_path, input_path, target_lang)
+        skip = progress.get('items', 0)
+        
+        if skip and output_path.exists():
+            os.truncate(output_path, progress['output_bytes'])
+            self.logger.info(f"Resuming {input_path} after {skip} texts")
+        else:
+            skip = 0
+            output_path.write_bytes(b'')
+        
+        recent: 'OrderedDict[str, str]' = OrderedDict()
+        window: List[str] = []
+        resolved: Dict[str, str] = {}
+        pending: Dict[str, None] = {}
+        consumed = skip
+        written = 0
+        translated = 0
+        
+        with open(output_path, 'ab') as out:
+            async def flush() -> None:
+                nonlocal consumed, written, translated
+                if pending:
+                    requests = [TranslationRequest(text, target_lang, source_lang) for text in pending]
+                    results = await self.translate_batch(requests, batch_size)
+                    for text in pending:
+                        if results.get(text, text) != text:
+                            resolved[text] = results[text]
+                            translated += 1
+                
+                out.write(''.join(f"{recent.get(text) or resolved.get(text, text)}\n" for text in window).encode('utf-8'))
+                out.flush()
+                consumed += len(window)
+                written += len(window)
+                self._save_file_progress(progress_path, input_path, target_lang, consumed, out.tell())
+                
+                for text, translation in resolved.items():
+                    recent[text] = translation
+                    recent.move_to_end(text)
+                while len(recent) > FILE_RECENT_CACHE_SIZE:
+                    recent.popitem(last=False)
+                window.clear()
+                resolved.clear()
+                pending.clear()
+            
+            for index, text in enumerate(iter_input_texts(input_path, json_key)):
+                if index < skip:
+                    continue
+                
+                window.append(text)
+                if text in recent:
+                    recent.move_to_end(text)
+                elif text not in resolved and text not in pending:
+                    # Dedupe on the fly: each distinct text is looked up once per window
+                    existing = await self._translation_exists(text, target_lang)
+                    if existing:
+                        resolved[text] = existing
+                        self.usage.record_hit(text, target_lang)
+                    else:
+                        pending[text] = None
+                
+                request_size = self.batch_size_for([target_lang], batch_size)
+                if len(pending) >= request_size or len(window) >= request_size * FILE_WINDOW_FACTOR:
+                    await flush()
+            
+            if window:
+                await flush()
+        
+        progress_path.unlink(missing_ok=True)
+        return written, translated
+    
+    @staticmethod
+    def _input_fingerprint(input_path: Path) -> Dict:
+        """Size and modification time, to tell whether the input changed since a run was interrupted"""
+        stat = os.stat(input_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    
+    def _load_file_progress(self, progress_path: Path, input_path: Path, target_lang: str) -> Dict:
+        """Progress of an interrupted --file run over the same, unchanged input and language"""
+        if not progress_path.exists():
+            return {}
+        try:
+            with open(progress_path, 'r', encoding='utf-8') as f:
+                progress = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if progress.get('input') != str(input_path) or progress.get('target_lang') != target_lang:
+            return {}
+        if progress.get('fingerprint') != self._input_fingerprint(input_path):
+            self.logger.warning(f"{input_path} changed since the interrupted run, starting over")
+            return {}
+        return progress
+    
+    def _save_file_progress(self, progress_path: Path, input_path: Path, target_lang: str, items: int, output_bytes: int) -> None:
+        tmp_path = progress_path.with_name(progress_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'input': str(input_path), 'fingerprint': self._input_fingerprint(input_path),
+                       'target_lang': target_lang, 'items': items, 'output_bytes': output_bytes}, f)
+        os.replace(tmp_path, progress_path)
 
 async def main():
     """Main CLI interface"""
@@ -431,9 +1485,19 @@ async def main():
     parser.add_argument('--batch-size', type=int, default=10, help='Batch size for translations')
     parser.add_argument('--translate-missing', action='store_true', help='Translate missing entries from database')
     parser.add_argument('--limit', type=int, default=100, help='Limit for missing translations')
-    parser.add_argument('--file', help='File containing texts to translate (one per line)')
+    parser.add_argument('--audit', action='store_true', help='Score existing auto-translations with the QA gate')
+    parser.add_argument('--retranslate-flagged', action='store_true', help='Re-translate rows flagged by the QA gate')
+    parser.add_argument('--reparse-journal', action='store_true', help='Re-parse journaled API responses for --target-lang (no API calls)')
+    parser.add_argument('--file', help='File containing texts to translate (one per line, or a JSON array)')
+    parser.add_argument('--json-key', help='Array field to read from a JSON --file (default: texts, missingTexts or criticalTerms)')
+    parser.add_argument('--auto-batch', action='store_true', help='Tune the batch size per language from observed results, starting at --batch-size')
+    parser.add_argument('--max-concurrency', type=int, default=4, help='Maximum API requests in flight')
+    parser.add_argument('--fast-log', action='store_true', help='Log from a background thread, one summary line per batch')
+    parser.add_argument('--log-sample', type=float, default=0.0, help='With --fast-log, share of per-item lines still logged at DEBUG')
+    parser.add_argument('--log-json', action='store_true', help='Write log records as JSON lines')
     
     args = parser.parse_args()
+    setup_logging('translation.log', args.fast_log, args.log_json, args.log_sample)
     
     # Get configuration
     database_url = os.getenv('DATABASE_URL')
@@ -454,7 +1518,9 @@ async def main():
         sys.exit(1)
     
     # Initialize translator
-    translator = GeminiTranslator(database_url, api_keys)
+    translator = GeminiTranslator(database_url, api_keys, args.max_concurrency)
+    if args.auto_batch:
+        translator.enable_batch_tuning(args.batch_size)
     
     try:
         if args.text:
@@ -468,35 +1534,41 @@ async def main():
                 print(f"Error: File {args.file} not found")
                 sys.exit(1)
             
-            with open(args.file, 'r', encoding='utf-8') as f:
-                texts = [line.strip() for line in f if line.strip()]
-            
-            requests = [
-                TranslationRequest(text, args.target_lang, args.source_lang)
-                for text in texts
-            ]
-            
-            results = await translator.translate_batch(requests, args.batch_size)
+            # Most probes are certain misses; rule them out without a query
+            await translator.load_existence_filter()
             
-            # Output results
-            output_file = f"{Path(args.file).stem}_translated.txt"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                for text in texts:
-                    f.write(f"{results.get(text, text)}\n")
+            # Streamed in input order; an interrupted run resumes where it stopped
+            output_file = Path(f"{Path(args.file).stem}_translated.txt")
+            written, translated = await translator.translate_file(
+                Path(args.file), output_file, args.target_lang, args.source_lang,
+                args.batch_size, args.json_key
+            )
             
-            print(f"Translated {len(results)} texts. Output saved to {output_file}")
+            print(f"Wrote {written} texts ({translated} newly translated). Output saved to {output_file}")
             
         elif args.translate_missing:
             # Translate missing from database
             count = await translator.translate_missing_from_db(args.target_lang, args.limit)
             print(f"Translated {count} missing texts")
             
+        elif args.audit:
+            flagged = await translator.audit_translations(args.target_lang)
+            print(f"Flagged {flagged} translations for review")
+            
+        elif args.retranslate_flagged:
+            improved = await translator.retranslate_flagged(args.target_lang, args.limit, args.batch_size)
+            print(f"Improved {improved} flagged translations")
+            
+        elif args.reparse_journal:
+            added, improved = await translator.reparse_journal(args.target_lang)
+            print(f"Re-parsed journal: {added} translations added, {improved} improved")
+            
         else:
-            print("Error: Please specify --text, --file, or --translate-missing")
+            print("Error: Please specify --text, --file, --translate-missing, --audit, --retranslate-flagged or --reparse-journal")
             parser.print_help()
     
     finally:
-        await translator._close_database()
+        await translator.close()
 
 if __name__ == '__main__':
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Async Gemini Transport
+======================
+
+Native async REST client for `generateContent`, used by the translator instead
+of running the blocking SDK call in a worker thread.
+
+- One persistent keep-alive HTTP session per API key
+- Real connect/total timeouts; cancelling the awaiting task aborts the request
+- An explicit semaphore bounds the number of requests in flight
+- Errors carry the HTTP status and the server's retry delay (RetryInfo or
+  Retry-After) so api_key_health.classify_error can act on them
+"""
+
+import asyncio
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import aiohttp
+
+API_BASE_URL = 'https://generativelanguage.googleapis.com/v1beta'
+RETRY_DELAY_PATTERN = re.compile(r'^([\d.]+)s$')
+
+class GeminiAPIError(Exception):
+    """A non-2xx response from the Gemini API"""
+    
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"{status} {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+@dataclass
+class GeminiResponse:
+    """Text and token usage of a generateContent response"""
+    text: str
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    finish_reason: Optional[str] = None
+
+def _parse_error(status: int, body: Dict, headers) -> GeminiAPIError:
+    error = body.get('error', {}) if isinstance(body, dict) else {}
+    message = error.get('message') or f"HTTP {status}"
+    retry_after = None
+    
+    for detail in error.get('details', []):
+        detail_type = detail.get('@type', '')
+        if detail_type.endswith('RetryInfo'):
+            match = RETRY_DELAY_PATTERN.match(detail.get('retryDelay', ''))
+            if match:
+                retry_after = float(match.group(1))
+        elif detail_type.endswith('QuotaFailure'):
+            # Quota ids distinguish per-day from per-minute limits
+            quota_ids = [violation.get('quotaId', '') for violation in detail.get('violations', [])]
+            message += f" [quota: {', '.join(filter(None, quota_ids))}]"
+    
+    header_value = headers.get('Retry-After') if headers is not None else None
+    if retry_after is None and header_value and header_value.replace('.', '', 1).isdigit():
+        retry_after = float(header_value)
+    
+    return GeminiAPIError(status, message, retry_after)
+
+class GeminiTransport:
+    """Async generateContent client with per-key keep-alive sessions"""
+    
+    def __init__(self, model: str, max_concurrency: int = 4, timeout: float = 120.0, connect_timeout: float = 10.0):
+        self.model = model
+        self.url = f"{API_BASE_URL}/models/{model}:generateContent"
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+    
+    def _session(self, api_key: str) -> aiohttp.ClientSession:
+        session = self._sessions.get(api_key)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=75),
+                headers={'x-goog-api-key': api_key, 'Content-Type': 'application/json'},
+                timeout=self.timeout,
+            )
+            self._sessions[api_key] = session
+        return session
+    
+    async def generate(self, api_key: str, prompt: str, generation_config: Dict) -> GeminiResponse:
+        """Send one generateContent request"""
+        payload = {
+            'contents': [{'role': 'user', 'parts': [{'text': prompt}]}],
+            'generationConfig': generation_config,
+        }
+        
+        async with self._semaphore:
+            async with self._session(api_key).post(self.url, json=payload) as response:
+                try:
+                    body = await response.json(content_type=None)
+                except (aiohttp.ContentTypeError, ValueError):
+                    body = {}
+                
+                if response.status >= 400:
+                    raise _parse_error(response.status, body, response.headers)
+        
+        candidates = body.get('candidates') or [{}]
+        parts = candidates[0].get('content', {}).get('parts', [])
+        usage = body.get('usageMetadata', {})
+        
+        return GeminiResponse(
+            text=''.join(part.get('text', '') for part in parts),
+            prompt_tokens=usage.get('promptTokenCount', 0),
+            output_tokens=usage.get('candidatesTokenCount', 0),
+            finish_reason=candidates[0].get('finishReason'),
+        )
+    
+    async def close(self) -> None:
+        """Close every keep-alive session"""
+        sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            await session.close()
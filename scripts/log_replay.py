@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Log Replay Load Generator
+=========================
+
+Turns the translator's own logs (`translation.log`, `logs/*.log`,
+`overnight_translation_*.log`) into a workload trace and replays it through
+GeminiTranslator with a stubbed model backend. A batching or scheduling change
+can then be tried against a real night's traffic before it is deployed.
+
+The trace keeps, for every translate_batch call:
+- when it arrived (seconds after the first call) and its language pair
+- the texts answered from cache and the texts sent to the API
+- per API request: the failed attempts (full error message, so quota, rate and
+  fatal errors classify as they did) and the latency of the successful one
+
+Replay reproduces the arrival pattern, latencies and errors, optionally sped up
+by `--speed`, against a throwaway SQLite snapshot seeded with the recorded
+cache hits. Nothing touches Postgres or the real API. Recorded errors and
+latencies are handed out in their original order, one per request the
+translator makes; once they run out, requests succeed with the median latency.
+Rate-limit delays, breaker cool-downs and server retry delays are divided by
+the speed-up. Backoff jitter is not, and a replay that spends every key's daily
+quota waits for local midnight just as the recorded run did.
+
+With `--virtual-clock` the replay runs on simulated time instead (see
+virtual_clock.py): every wait, jitter and midnight quota reset included,
+completes instantly and the report shows the recorded night's real timings.
+
+Usage:
+    python log_replay.py logs/translation.log --dump-trace trace.json
+    python log_replay.py logs/*.log --speed 60 --batch-size 15
+    python log_replay.py --trace trace.json --speed 60 --auto-batch
+    python log_replay.py --trace trace.json --virtual-clock
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import statistics
+import sys
+import tempfile
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+# Add the current directory to path for imports
+sys.path.append(str(Path(__file__).parent))
+
+from virtual_clock import SYSTEM_CLOCK, SystemClock, VirtualClock
+
+RECORD_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - (\w+) - (.*)$')
+PROCESSING_PATTERN = re.compile(r'^Processing (\d+) requests for (\S+) -> (\S+)')
+CACHED_PATTERN = re.compile(r"^Using cached translation: '(.*)' -> '(.*)'$", re.DOTALL)
+TRANSLATING_PATTERN = re.compile(r'^Translating (\d+) new texts')
+ATTEMPT_FAILED_PATTERN = re.compile(r'^Translation attempt (\d+) failed(?: \(\w+\))?: (.*)$', re.DOTALL)
+WAIT_PATTERN = re.compile(r'^(?:Enforcing minimum delay: |Rate limit reached\. Waiting )([\d.]+)s')
+SUCCESS_PATTERN = re.compile(r'^Successfully translated (\d+) texts')
+TRANSLATED_PATTERN = re.compile(r"^Translated: '(.*)' -> '(.*)'$", re.DOTALL)
+BATCH_FAILED_PATTERN = re.compile(r'^Batch translation failed: ')
+
+# Latencies longer than the transport timeout are log gaps, not requests
+MAX_LATENCY = 120.0
+DEFAULT_LATENCY = 2.0
+
+@dataclass
+class TraceCall:
+    """One API request: its failed attempts and, if it succeeded, its latency"""
+    errors: List[str] = field(default_factory=list)
+    latency: Optional[float] = None
+    returned: int = 0
+
+@dataclass
+class TraceBatch:
+    """One translate_batch call as seen in the log"""
+    offset: float
+    target_lang: str
+    source_lang: str
+    requested: int
+    cached: Dict[str, str] = field(default_factory=dict)
+    translated: Dict[str, str] = field(default_factory=dict)
+    calls: List[TraceCall] = field(default_factory=list)
+    
+    def texts(self, index: int) -> List[str]:
+        """Every text of the call; texts the log never named get stable stand-ins"""
+        known = list(self.cached) + list(self.translated)
+        unnamed = [f"Replay text {index}.{i}" for i in range(max(self.requested - len(known), 0))]
+        return known + unnamed
+
+def read_records(path: Path):
+    """(timestamp, level, message) per log record, with continuation lines folded in"""
+    record = None
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = RECORD_PATTERN.match(line.rstrip('\n'))
+            if match:
+                if record:
+                    yield record
+                stamp = datetime.strptime(match.group(1), '%Y-%m-%d %H:%M:%S,%f')
+                record = [stamp, match.group(2), match.group(3)]
+            elif record:
+                record[2] += '\n' + line.rstrip('\n')
+    if record:
+        yield record
+
+def parse_logs(paths: List[Path]) -> List[TraceBatch]:
+    """Build a workload trace from translator logs, ordered by arrival"""
+    records = sorted(
+        (record for path in paths for record in read_records(path)),
+        key=lambda record: record[0]
+    )
+    if not records:
+        return []
+    
+    start = None
+    batches: List[TraceBatch] = []
+    batch: Optional[TraceBatch] = None
+    call: Optional[TraceCall] = None
+    call_mark = None  # when the current attempt was (re)sent, as far as the log shows
+    
+    for stamp, _, message in records:
+        match = PROCESSING_PATTERN.match(message)
+        if match:
+            start = start or stamp
+            batch = TraceBatch((stamp - start).total_seconds(), match.group(3), match.group(2), int(match.group(1)))
+            batches.append(batch)
+            call = None
+            continue
+        if batch is None:
+            continue
+        
+        if CACHED_PATTERN.match(message):
+            text, translated = CACHED_PATTERN.match(message).groups()
+            batch.cached[text] = translated
+        elif TRANSLATING_PATTERN.match(message):
+            call = TraceCall()
+            batch.calls.append(call)
+            call_mark = stamp
+        elif call is None:
+            continue
+        elif WAIT_PATTERN.match(message):
+            call_mark = stamp + timedelta(seconds=float(WAIT_PATTERN.match(message).group(1)))
+        elif ATTEMPT_FAILED_PATTERN.match(message):
+            call.errors.append(ATTEMPT_FAILED_PATTERN.match(message).group(2))
+            call_mark = stamp
+        elif SUCCESS_PATTERN.match(message):
+            latency = (stamp - call_mark).total_seconds()
+            call.latency = min(max(latency, 0.0), MAX_LATENCY)
+            call.returned = int(SUCCESS_PATTERN.match(message).group(1))
+        elif TRANSLATED_PATTERN.match(message):
+            text, translated = TRANSLATED_PATTERN.match(message).groups()
+            batch.translated[text] = translated
+        elif BATCH_FAILED_PATTERN.match(message):
+            call = None
+    
+    return batches
+
+def save_trace(batches: List[TraceBatch], path: Path) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([asdict(batch) for batch in batches], f, indent=2, ensure_ascii=False)
+
+def load_trace(path: Path) -> List[TraceBatch]:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    batches = []
+    for item in data:
+        calls = [TraceCall(**call) for call in item.pop('calls', [])]
+        batches.append(TraceBatch(**item, calls=calls))
+    return batches
+
+class ReplayError(Exception):
+    """A recorded API failure, re-raised with its original message"""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+# Failed attempts are answered quickly, as the API does
+ERROR_LATENCY = 0.2
+
+class ReplayTransport:
+    """Stand-in for GeminiTransport that answers from the recorded trace
+    
+    Each new prompt takes the next recorded request. Retries of the same
+    prompt walk through that request's recorded failures and then succeed
+    after its recorded latency. A request that never succeeded keeps failing.
+    """
+    
+    def __init__(self, batches: List[TraceBatch], speed: float = 1.0, clock: SystemClock = SYSTEM_CLOCK):
+        from gemini_transport import GeminiResponse
+        from api_key_health import parse_retry_after
+        
+        self._response_class = GeminiResponse
+        self._parse_retry_after = parse_retry_after
+        self.speed = speed
+        self.clock = clock
+        self.calls: Deque[TraceCall] = deque(call for batch in batches for call in batch.calls)
+        latencies = [call.latency for call in self.calls if call.latency is not None]
+        self.fallback_latency = statistics.median(latencies) if latencies else DEFAULT_LATENCY
+        self._prompt: Optional[str] = None
+        self._call: Optional[TraceCall] = None
+        self._attempt = 0
+        self.requests = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+    
+    async def generate(self, api_key: str, prompt: str, generation_config: Dict):
+        if prompt != self._prompt:
+            self._prompt = prompt
+            self._call = self.calls.popleft() if self.calls else TraceCall(latency=self.fallback_latency)
+            self._attempt = 0
+        
+        call, attempt = self._call, self._attempt
+        self._attempt += 1
+        self.requests += 1
+        
+        if attempt < len(call.errors) or (call.errors and call.latency is None):
+            error = call.errors[min(attempt, len(call.errors) - 1)]
+            await self._wait(ERROR_LATENCY)
+            self.errors += 1
+            retry_after = self._parse_retry_after(Exception(error))
+            raise ReplayError(error, retry_after / self.speed if retry_after else None)
+        
+        # A request without an outcome (the log ends mid-request) is assumed to succeed
+        await self._wait(call.latency if call.latency is not None else self.fallback_latency)
+        return self._response_class(
+            text=self._answer(prompt), prompt_tokens=len(prompt) // 4, output_tokens=len(prompt) // 8, finish_reason='STOP'
+        )
+    
+    async def _wait(self, latency: float) -> None:
+        delay = latency / self.speed
+        self.busy_seconds += delay
+        await self.clock.sleep(delay)
+    
+    @staticmethod
+    def _answer(prompt: str) -> str:
+        """A well-formed response to a translation prompt: each text tagged with its language"""
+        texts = re.findall(r'^\d+\. (.*)$', prompt, re.MULTILINE)
+        if 'JSON object' in prompt:
+            langs = re.findall(r'^\s*- (\w+): ', prompt, re.MULTILINE)
+            return json.dumps({lang: [f"[{lang}] {text}" for text in texts] for lang in langs}, ensure_ascii=False)
+        lang = re.search(r' text to (.+?)\.$', prompt, re.MULTILINE)
+        tag = lang.group(1) if lang else 'translated'
+        return '\n'.join(f"{i + 1}. [{tag}] {text}" for i, text in enumerate(texts))
+    
+    async def close(self) -> None:
+        pass
+
+def offline_translator(workdir: Path, keys: int, transport, clock: SystemClock = SYSTEM_CLOCK):
+    """GeminiTranslator wired to a stand-in transport, a scratch snapshot and no Postgres"""
+    from gemini_translator import GeminiTranslator, GEMINI_MODEL
+    from response_journal import ResponseJournal
+    from translation_logging import setup_logging
+    from translation_snapshot import TranslationSnapshot
+    
+    class OfflineTranslator(GeminiTranslator):
+        async def _init_database(self) -> None:
+            pass
+        
+        async def _translation_exists(self, source_text: str, target_lang: str) -> Optional[str]:
+            return self.snapshot.get(source_text, target_lang)
+        
+        async def _save_translation(self, request, translated_text: str, quality=None) -> str:
+            self.snapshot.put(request.source_text, request.target_lang, translated_text)
+            return ''
+    
+    # Console only, unless the caller configured logging: the translator would open translation.log here
+    setup_logging()
+    translator = OfflineTranslator('offline://', [f"offline-key-{i + 1}" for i in range(keys)], clock=clock)
+    translator.snapshot.close()
+    translator.snapshot = TranslationSnapshot(workdir / 'snapshot.db')
+    translator.journal = ResponseJournal(GEMINI_MODEL, workdir / 'journal.jsonl')
+    translator._transport = transport
+    return translator
+
+def build_translator(batches: List[TraceBatch], workdir: Path, speed: float, keys: int,
+                     clock: SystemClock = SYSTEM_CLOCK):
+    """Offline translator answering from the trace, with limits scaled to the replay speed"""
+    from api_key_health import CircuitBreaker
+    from gemini_translator import RateLimitConfig, RateLimiter
+    
+    translator = offline_translator(workdir, keys, ReplayTransport(batches, speed, clock), clock)
+    
+    for batch in batches:
+        for text, translated in batch.cached.items():
+            translator.snapshot.put(text, batch.target_lang, translated)
+    if speed == 1.0:
+        return translator
+    
+    # Sped up on the wall clock: rate-limit delays and breaker cool-downs shrink with the replay
+    translator.key_breakers = [
+        CircuitBreaker(cooldown=60.0 / speed, max_cooldown=1800.0 / speed, clock=clock.monotonic, wall_clock=clock.now)
+        for _ in range(keys)
+    ]
+    defaults = RateLimitConfig()
+    translator.rate_limiter = RateLimiter(RateLimitConfig(
+        requests_per_minute=max(int(defaults.requests_per_minute * speed), 1),
+        requests_per_day=defaults.requests_per_day,
+        min_delay_between_requests=defaults.min_delay_between_requests / speed,
+        retry_delay_multiplier=defaults.retry_delay_multiplier,
+        max_retries=defaults.max_retries,
+    ), clock)
+    return translator
+
+async def replay(batches: List[TraceBatch], speed: float = 1.0, batch_size: int = 10,
+                 auto_batch: bool = False, keys: int = 4, virtual_clock: bool = False) -> Dict:
+    """Replay a trace through the translator and return what happened"""
+    from gemini_translator import TranslationRequest
+    
+    clock = SYSTEM_CLOCK
+    if virtual_clock:
+        # Simulated time needs no speed-up: waits cost nothing, so every delay keeps its real length
+        clock, speed = VirtualClock(), 1.0
+    
+    with tempfile.TemporaryDirectory(prefix='log_replay_') as workdir:
+        translator = build_translator(batches, Path(workdir), speed, keys, clock)
+        if auto_batch:
+            translator.enable_batch_tuning(batch_size)
+            translator.batch_tuner.path = None  # learned sizes from a replay are not kept
+        
+        wall_started = time.monotonic()
+        started = clock.monotonic()
+        translated = failed = 0
+        lag = 0.0
+        try:
+            for index, batch in enumerate(batches):
+                # Reproduce the recorded arrival pattern; a replay that falls behind just continues
+                due = started + batch.offset / speed
+                wait = due - clock.monotonic()
+                if wait > 0:
+                    await clock.sleep(wait)
+                else:
+                    lag = max(lag, -wait)
+                
+                texts = batch.texts(index)
+                requests = [TranslationRequest(text, batch.target_lang, batch.source_lang) for text in texts]
+                try:
+                    results = await translator.translate_batch(requests, batch_size)
+                except Exception as e:
+                    translator.logger.error(f"Replayed batch {index + 1} failed: {e}")
+                    results = {}
+                for text in texts:
+                    if results.get(text, text) != text or text in batch.cached:
+                        translated += 1
+                    else:
+                        failed += 1
+        finally:
+            await translator.close()
+        
+        transport = translator._transport
+        simulated = clock.monotonic() - started
+        return {
+            'batches': len(batches),
+            'texts': sum(len(batch.texts(index)) for index, batch in enumerate(batches)),
+            'recorded_requests': sum(len(batch.calls) + sum(len(call.errors) for call in batch.calls) for batch in batches),
+            'recorded_duration': batches[-1].offset if batches else 0.0,
+            'requests': transport.requests,
+            'errors': transport.errors,
+            'translated': translated,
+            'failed': failed,
+            'keys_rotated': translator.keys_rotated,
+            'elapsed': time.monotonic() - wall_started,
+            'simulated_duration': simulated * speed,
+            'max_lag': lag * speed,
+            'busy_seconds': transport.busy_seconds * speed,
+        }
+
+def format_report(result: Dict) -> str:
+    return f"""
+🔁 LOG REPLAY
+{'=' * 40}
+Batches: {result['batches']} ({result['texts']} texts)
+Recorded: {result['recorded_requests']} API attempts over {result['recorded_duration']:.0f}s
+Replayed: {result['requests']} API attempts ({result['errors']} injected errors) over {result['simulated_duration']:.0f}s simulated
+✅ Translated or cached: {result['translated']}
+❌ Failed: {result['failed']}
+🔑 Keys rotated: {result['keys_rotated']}
+⏱️ Backend busy: {result['busy_seconds']:.0f}s, worst arrival lag: {result['max_lag']:.0f}s
+⚡ Wall time: {result['elapsed']:.1f}s
+"""
+
+async def main():
+    """Main CLI interface"""
+    parser = argparse.ArgumentParser(description='Replay recorded translator logs against a stubbed model backend')
+    parser.add_argument('logs', nargs='*', help='Translator log files to build the trace from')
+    parser.add_argument('--trace', help='Replay a trace saved with --dump-trace instead of parsing logs')
+    parser.add_argument('--dump-trace', help='Write the parsed trace to this JSON file and exit')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed-up factor (default: 1 = real time)')
+    parser.add_argument('--batch-size', type=int, default=10, help='Batch size the translator uses during replay')
+    parser.add_argument('--auto-batch', action='store_true', help='Replay with batch size auto-tuning')
+    parser.add_argument('--keys', type=int, default=4, help='Number of stand-in API keys')
+    parser.add_argument('--virtual-clock', action='store_true',
+                        help='Run on simulated time: no real waiting, quota resets included (ignores --speed)')
+    args = parser.parse_args()
+    
+    # Configure logging before the translator does, so replays never append to translation.log
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler()]
+    )
+    
+    if args.trace:
+        batches = load_trace(Path(args.trace))
+    elif args.logs:
+        batches = parse_logs([Path(path) for path in args.logs])
+    else:
+        parser.error('give log files or --trace')
+    
+    calls = sum(len(batch.calls) for batch in batches)
+    print(f"📜 Trace: {len(batches)} batches, {calls} API requests")
+    
+    if args.dump_trace:
+        save_trace(batches, Path(args.dump_trace))
+        print(f"💾 Trace written to {args.dump_trace}")
+        return
+    if not batches:
+        print("Nothing to replay")
+        return
+    
+    result = await replay(batches, args.speed, args.batch_size, args.auto_batch, args.keys, args.virtual_clock)
+    print(format_report(result))
+
+if __name__ == '__main__':
+    asyncio.run(main())
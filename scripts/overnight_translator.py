@@ -29,31 +29,41 @@ import argparse
 # Add the current directory to path for imports
 sys.path.append(str(Path(__file__).parent))
 
-from gemini_translator import GeminiTranslator, TranslationRequest
+from gemini_translator import GeminiTranslator, TranslationRequest, source_digest
+from translation_planner import PlannerConfig, RunPlan, TranslationPlanner
+from translation_logging import setup_logging
+from translation_queue import DONE, FAILED, LEASED, PENDING, TranslationQueue
+from translation_scheduler import PendingItem, TranslationScheduler, load_critical_texts, load_screen_counts
+from ui_string_extractor import read_delta_stream
+from virtual_clock import SYSTEM_CLOCK, SystemClock
 import asyncpg
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Incremental discovery re-scans this far behind the watermark, so rows written by
+# transactions that committed late are not missed
+WATERMARK_OVERLAP = timedelta(minutes=10)
+# Full anti-join every so often, to pick up texts that failed or were deleted
+FULL_RECONCILE_INTERVAL = timedelta(days=7)
+
+def default_log_file() -> str:
+    """Log file of a run, named after its start time"""
+    return f"overnight_translation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+
 class OvernightTranslationManager:
     """Manages overnight batch translation operations"""
     
-    def __init__(self, database_url: str, api_keys: List[str], log_file: str = None):
+    def __init__(self, database_url: str, api_keys: List[str], log_file: str = None,
+                 clock: SystemClock = SYSTEM_CLOCK, translator: Optional[GeminiTranslator] = None):
         self.database_url = database_url
         self.api_keys = api_keys
-        self.translator = GeminiTranslator(database_url, api_keys)
-        
-        # Setup logging
-        log_file = log_file or f"overnight_translation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()
-            ]
-        )
+        self.clock = clock
+        
+        # Setup logging before the translator does, so the run logs to its own file
+        setup_logging(log_file or default_log_file())
         self.logger = logging.getLogger(__name__)
+        self.translator = translator or GeminiTranslator(database_url, api_keys, clock=clock)
         
         # Statistics tracking
         self.stats = {
@@ -72,8 +82,71 @@ class OvernightTranslationManager:
         # Progress file for resuming
         self.progress_file = Path("overnight_progress.json")
         
-    async def extract_texts_needing_translation(self, target_langs: List[str], limit: int = None) -> Dict[str, List[str]]:
-        """Extract texts that need translation from various sources"""
+        # Per-language discovery watermarks; advanced only once a run completes
+        self.watermark_file = Path("overnight_watermarks.json")
+        self.pending_watermarks = {}
+        # updatedAt of each text found by discovery, to hold the watermark back on failures
+        self.discovered_at = {}
+        
+    def load_watermarks(self) -> Dict[str, Dict[str, str]]:
+        """Watermarks from previous runs: {lang: {'watermark': iso, 'fullScanAt': iso}}"""
+        if self.watermark_file.exists():
+            try:
+                with open(self.watermark_file, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                self.logger.warning(f"Could not load watermark file, falling back to a full scan: {e}")
+        return {}
+    
+    async def hold_back_watermarks(self, texts_by_lang: Dict[str, List[str]]):
+        """Keep discovery from moving past texts this run did not save
+        
+        The watermark stops at the earliest unsaved text, so the next incremental scan
+        finds it again. It is not advanced at all if a text's age is unknown.
+        """
+        for lang, texts in texts_by_lang.items():
+            if lang not in self.pending_watermarks:
+                continue
+            
+            unsaved = [text for text in texts if await self.translator._translation_exists(text, lang) is None]
+            if not unsaved:
+                continue
+            
+            found_at = self.discovered_at.get(lang, {})
+            previous = self.load_watermarks().get(lang, {}).get('watermark')
+            earliest = min(found_at[text] for text in unsaved) if all(text in found_at for text in unsaved) else None
+            pending = self.pending_watermarks[lang]
+            # A full scan saw every missing text, so everything before the earliest unsaved one is done
+            full = 'fullScanAt' in pending or not previous
+            if earliest is not None and (full or earliest > datetime.fromisoformat(previous)):
+                pending['watermark'] = earliest.isoformat()
+            else:
+                del self.pending_watermarks[lang]
+            self.logger.info(f"⏸️ {len(unsaved)} {lang} texts were not saved; discovery watermark held back")
+    
+    def commit_watermarks(self):
+        """Persist the watermarks reached by this run's discovery"""
+        if not self.pending_watermarks:
+            return
+        
+        watermarks = self.load_watermarks()
+        for lang, entry in self.pending_watermarks.items():
+            watermarks.setdefault(lang, {}).update(entry)
+        
+        tmp_file = self.watermark_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(watermarks, f, indent=2)
+        os.replace(tmp_file, self.watermark_file)
+        self.pending_watermarks = {}
+    
+    async def extract_texts_needing_translation(self, target_langs: List[str], limit: int = None,
+                                                full_scan: bool = False) -> Dict[str, List[str]]:
+        """Extract texts that need translation from various sources
+        
+        Only English sources created or updated since the language's watermark are
+        checked, unless `full_scan` is set, there is no watermark yet, or the last
+        full reconciliation is older than FULL_RECONCILE_INTERVAL.
+        """
         self.logger.info("🔍 Extracting texts needing translation...")
         
         # Ensure database connection is initialized
@@ -81,29 +154,102 @@ class OvernightTranslationManager:
             await self.translator._init_database()
         
         texts_by_lang = {}
+        watermarks = self.load_watermarks()
         
         async with self.translator.db_pool.acquire() as conn:
+            # Upper bound of this scan, taken before it so later writes are seen next time
+            high_mark = await conn.fetchval(
+                """SELECT MAX("updatedAt") FROM "Translation" WHERE "targetLang" = 'en'"""
+            )
+            
             for lang in target_langs:
-                # Find English texts that don't have translations in target language
-                query = """
-                SELECT t1."sourceText"
-                FROM "Translation" t1
-                WHERE t1."targetLang" = 'en' 
-                AND t1."sourceText" NOT IN (
-                    SELECT t2."sourceText" 
-                    FROM "Translation" t2 
-                    WHERE t2."targetLang" = $1
-                )
-                ORDER BY LENGTH(t1."sourceText") ASC
-                """
+                entry = watermarks.get(lang, {})
+                watermark = datetime.fromisoformat(entry['watermark']) if entry.get('watermark') else None
+                last_full = datetime.fromisoformat(entry['fullScanAt']) if entry.get('fullScanAt') else None
+                incremental = (not full_scan and watermark is not None and last_full is not None
+                               and datetime.now() - last_full < FULL_RECONCILE_INTERVAL)
+                
+                if incremental:
+                    # English texts changed since the watermark that have no translation yet
+                    query = f"""
+                    SELECT t1."sourceText", t1."updatedAt"
+                    FROM "Translation" t1
+                    WHERE t1."targetLang" = 'en' AND t1."updatedAt" >= $2
+                    AND NOT EXISTS (
+                        SELECT 1 
+                        FROM "Translation" t2 
+                        WHERE t2."targetLang" = $1 AND {self.translator.source_match_sql('t2', 't1')}
+                    )
+                    ORDER BY t1."updatedAt" ASC
+                    """
+                    args = (lang, watermark - WATERMARK_OVERLAP)
+                else:
+                    # Find English texts that don't have translations in target language
+                    query = f"""
+                    SELECT t1."sourceText", t1."updatedAt"
+                    FROM "Translation" t1
+                    WHERE t1."targetLang" = 'en' 
+                    AND NOT EXISTS (
+                        SELECT 1 
+                        FROM "Translation" t2 
+                        WHERE t2."targetLang" = $1 AND {self.translator.source_match_sql('t2', 't1')}
+                    )
+                    ORDER BY LENGTH(t1."sourceText") ASC
+                    """
+                    args = (lang,)
                 
                 if limit:
                     query += f" LIMIT {limit}"
                 
-                results = await conn.fetch(query, lang)
+                results = await conn.fetch(query, *args)
                 texts_by_lang[lang] = [row['sourceText'] for row in results]
+                self.discovered_at[lang] = {row['sourceText']: row['updatedAt'] for row in results}
+                truncated = bool(limit) and len(results) >= limit
+                
+                # A truncated scan only covers sources up to the last one returned
+                if incremental:
+                    reached = results[-1]['updatedAt'] if truncated else high_mark
+                    if reached is not None and reached > watermark:
+                        self.pending_watermarks[lang] = {'watermark': reached.isoformat()}
+                elif not truncated and high_mark is not None:
+                    self.pending_watermarks[lang] = {
+                        'watermark': high_mark.isoformat(),
+                        'fullScanAt': datetime.now().isoformat()
+                    }
+                
+                scan = f"changed since {watermark:%Y-%m-%d %H:%M}" if incremental else "full scan"
+                self.logger.info(f"📋 Found {len(texts_by_lang[lang])} texts needing translation to {lang} ({scan})")
+        
+        return texts_by_lang
+    
+    async def extract_texts_from_delta(self, target_langs: List[str], texts: List[str], limit: int = None) -> Dict[str, List[str]]:
+        """Filter strings added to the UI (from ui_string_extractor.py) down to those missing per language"""
+        self.logger.info(f"🔍 Checking {len(texts)} newly extracted UI texts...")
+        
+        if not self.translator.db_pool:
+            await self.translator._init_database()
+        
+        texts = list(dict.fromkeys(texts))
+        digests = [source_digest(text) for text in texts]
+        texts_by_lang = {}
+        
+        async with self.translator.db_pool.acquire() as conn:
+            for lang in target_langs:
+                results = await conn.fetch(
+                    f"""
+                    SELECT s."sourceText"
+                    FROM unnest($1::text[], $3::bytea[]) WITH ORDINALITY AS s("sourceText", "sourceHash", position)
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM "Translation" t
+                        WHERE t."targetLang" = $2 AND {self.translator.source_match_sql('t', 's')}
+                    )
+                    ORDER BY s.position
+                    """,
+                    texts, lang, digests
+                )
+                texts_by_lang[lang] = [row['sourceText'] for row in results][:limit]
                 
-                self.logger.info(f"📋 Found {len(texts_by_lang[lang])} texts needing translation to {lang}")
+                self.logger.info(f"📋 Found {len(texts_by_lang[lang])} new UI texts needing translation to {lang}")
         
         return texts_by_lang
     
@@ -133,15 +279,14 @@ class OvernightTranslationManager:
         with open(self.progress_file, 'w') as f:
             json.dump(progress, f, indent=2, default=str)
     
-    def calculate_estimated_time(self, total_texts: int, keys_available: int) -> Tuple[int, str]:
-        """Calculate estimated completion time"""
-        # Each key can do 250 translations per day, 2 per minute
-        translations_per_hour = keys_available * 120  # 2 per minute * 60 minutes
-        hours_needed = total_texts / translations_per_hour
-        
-        completion_time = datetime.now() + timedelta(hours=hours_needed)
-        
-        return int(hours_needed), completion_time.strftime('%Y-%m-%d %H:%M:%S')
+    async def plan_run(self, texts_by_lang: Dict[str, List[str]], batch_size: int, fan_out: bool = False) -> RunPlan:
+        """Simulate the run on a virtual clock to estimate requests and completion times"""
+        planner = TranslationPlanner(PlannerConfig(
+            rate_limits=self.translator.rate_limiter.config,
+            batch_size=batch_size,
+            fan_out=fan_out
+        ))
+        return await planner.simulate(texts_by_lang, self.translator.remaining_quotas())
     
     async def process_language_batch(self, target_lang: str, texts: List[str], batch_size: int = 20) -> Dict[str, str]:
         """Process a batch of texts for a specific language"""
@@ -150,11 +295,14 @@ class OvernightTranslationManager:
         results = {}
         failed_texts = []
         
-        # Process in chunks
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            batch_num = (i // batch_size) + 1
-            total_batches = (len(texts) + batch_size - 1) // batch_size
+        # Process in chunks (sized by the batch tuner when --auto-batch is on)
+        i = 0
+        batch_num = 0
+        while i < len(texts):
+            size = self.translator.batch_size_for([target_lang], batch_size)
+            batch = texts[i:i + size]
+            batch_num += 1
+            total_batches = batch_num + (len(texts) - i - len(batch) + size - 1) // size
             
             self.logger.info(f"📦 Processing batch {batch_num}/{total_batches} ({len(batch)} texts)")
             
@@ -170,7 +318,7 @@ class OvernightTranslationManager:
                 ]
                 
                 # Translate batch
-                batch_results = await self.translator.translate_batch(requests, batch_size)
+                batch_results = await self.translator.translate_batch(requests, size)
                 results.update(batch_results)
                 
                 # Update statistics
@@ -199,9 +347,8 @@ class OvernightTranslationManager:
                 self.logger.error(f"❌ Batch {batch_num} failed: {e}")
                 failed_texts.extend(batch)
                 self.stats['failed_translations'] += len(batch)
-                
-                # Wait longer on batch failure
-                await asyncio.sleep(60)
+            
+            i += len(batch)
         
         # Update language stats
         self.stats['languages_processed'].add(target_lang)
@@ -211,6 +358,187 @@ class OvernightTranslationManager:
         
         return results
     
+    async def process_fan_out_batch(self, texts_by_lang: Dict[str, List[str]], batch_size: int = 20) -> Dict[str, Dict[str, str]]:
+        """Translate every language in one request per batch, re-queuing per-language gaps"""
+        target_langs = [lang for lang, texts in texts_by_lang.items() if texts]
+        needed = {lang: set(texts_by_lang[lang]) for lang in target_langs}
+        
+        # Union of source texts across languages, preserving discovery order
+        all_texts = list(dict.fromkeys(text for lang in target_langs for text in texts_by_lang[lang]))
+        self.logger.info(f"🌐 Fan-out: {len(all_texts)} unique texts for {', '.join(target_langs)}")
+        
+        results = {lang: {} for lang in target_langs}
+        requeue = {lang: [] for lang in target_langs}
+        
+        i = 0
+        batch_num = 0
+        while i < len(all_texts):
+            size = self.translator.batch_size_for(target_langs, batch_size)
+            batch = all_texts[i:i + size]
+            batch_num += 1
+            total_batches = batch_num + (len(all_texts) - i - len(batch) + size - 1) // size
+            i += len(batch)
+            batch_langs = [lang for lang in target_langs if any(text in needed[lang] for text in batch)]
+            
+            self.logger.info(f"📦 Processing fan-out batch {batch_num}/{total_batches} ({len(batch)} texts x {len(batch_langs)} languages)")
+            
+            try:
+                batch_results, missing = await self.translator.translate_batch_multi(
+                    batch, batch_langs, 'en', size, category='bulk_overnight'
+                )
+                self.stats['api_calls_made'] += 1
+                
+                for lang in batch_langs:
+                    results[lang].update(batch_results[lang])
+                    self.stats['newly_translated'] += sum(1 for text in batch if text in needed[lang] and text in batch_results[lang])
+                    requeue[lang].extend(text for text in missing[lang] if text in needed[lang])
+                
+            except Exception as e:
+                self.logger.error(f"❌ Fan-out batch {batch_num} failed: {e}")
+                for lang in batch_langs:
+                    requeue[lang].extend(text for text in batch if text in needed[lang])
+            
+            completed = i
+            self.logger.info(f"📈 Fan-out progress: {completed}/{len(all_texts)} ({(completed / len(all_texts)) * 100:.1f}%)")
+            
+            if batch_num % 5 == 0:
+                remaining_texts = {
+                    lang: requeue[lang] + [text for text in all_texts[completed:] if text in needed[lang]]
+                    for lang in target_langs
+                }
+                await self.save_progress(self.stats['newly_translated'], [], remaining_texts)
+        
+        # Re-queue languages whose output was missing through the single-language path
+        for lang in target_langs:
+            self.stats['languages_processed'].add(lang)
+            if requeue[lang]:
+                self.logger.info(f"🔁 Re-queuing {len(requeue[lang])} texts with missing {lang} output")
+                results[lang].update(await self.process_language_batch(lang, requeue[lang], batch_size))
+        
+        return results
+    
+    async def fetch_source_metadata(self, texts: List[str]) -> Dict[str, Tuple[str, int]]:
+        """Category and usage count of the English source rows, for prioritization"""
+        async with self.translator.db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT "sourceText", category, "usageCount"
+                FROM "Translation"
+                WHERE "targetLang" = 'en' AND "sourceText" = ANY($1::text[])
+                """,
+                texts
+            )
+        return {row['sourceText']: (row['category'], row['usageCount']) for row in rows}
+    
+    async def process_scheduled_batches(self, texts_by_lang: Dict[str, List[str]],
+                                        batch_size: int = 20) -> Tuple[Dict[str, Dict[str, str]], Dict[str, List[str]]]:
+        """Translate in priority order within today's remaining quota, returning deferred texts"""
+        all_texts = list(dict.fromkeys(text for texts in texts_by_lang.values() for text in texts))
+        metadata = await self.fetch_source_metadata(all_texts)
+        
+        items = []
+        for lang, texts in texts_by_lang.items():
+            for text in texts:
+                category, usage_count = metadata.get(text, ('general', 0))
+                items.append(PendingItem(text, lang, category, usage_count))
+        
+        scheduler = TranslationScheduler(load_critical_texts(), load_screen_counts(), batch_size)
+        key_quotas = self.translator.remaining_quotas()
+        scheduled, deferred = scheduler.plan(items, key_quotas)
+        
+        self.logger.info(f"🗓️ Scheduled {len(scheduled)} batches into {sum(key_quotas)} remaining requests")
+        for tier, counts in TranslationScheduler.summarize(scheduled, deferred).items():
+            if counts['scheduled'] or counts['deferred']:
+                self.logger.info(f"   {tier}: {counts['scheduled']} scheduled in {counts['batches']} batches, {counts['deferred']} deferred")
+        
+        results = {lang: {} for lang in texts_by_lang}
+        for batch in scheduled:
+            self.translator._use_api_key(batch.key_index)
+            results[batch.lang].update(await self.process_language_batch(batch.lang, batch.texts, batch_size))
+            self.stats['languages_processed'].add(batch.lang)
+        
+        deferred_by_lang = {}
+        for item in deferred:
+            deferred_by_lang.setdefault(item.lang, []).append(item.text)
+        
+        return results, deferred_by_lang
+    
+    async def enqueue_backlog(self, target_langs: List[str], max_translations: int = None,
+                              delta_texts: Optional[List[str]] = None, full_scan: bool = False) -> int:
+        """Discover the backlog and add it to the shared job queue instead of translating it here"""
+        await self.translator._init_database()
+        
+        if delta_texts is not None:
+            texts_by_lang = await self.extract_texts_from_delta(target_langs, delta_texts, max_translations)
+        else:
+            texts_by_lang = await self.extract_texts_needing_translation(target_langs, max_translations, full_scan)
+        
+        queue = TranslationQueue(self.translator.db_pool, logger=self.logger)
+        added = await queue.enqueue(texts_by_lang, category='bulk_overnight')
+        self.commit_watermarks()
+        counts = await queue.counts()
+        self.logger.info(
+            f"📥 Queued {added} new jobs ({counts.get(PENDING, 0)} pending, {counts.get(LEASED, 0)} leased, "
+            f"{counts.get(DONE, 0)} done, {counts.get(FAILED, 0)} failed)"
+        )
+        return added
+    
+    async def run_worker(self, target_langs: List[str], batch_size: int = 15, poll_interval: Optional[float] = None):
+        """Claim batches from the shared job queue and translate them until it is empty
+        
+        With `poll_interval`, keep waiting for new jobs instead of exiting when idle.
+        """
+        self.stats['start_time'] = self.clock.now()
+        await self.translator._init_database()
+        await self.translator.load_existence_filter()
+        
+        queue = TranslationQueue(self.translator.db_pool, logger=self.logger)
+        self.logger.info(f"👷 Worker {queue.worker_id} serving {', '.join(target_langs)}")
+        
+        # Like a planned run, never let --auto-batch grow requests past batch_size
+        self.translator.cap_batch_size(batch_size)
+        jobs = []
+        
+        try:
+            while True:
+                claimed = 0
+                for target_lang in target_langs:
+                    jobs = await queue.claim(target_lang, batch_size)
+                    if not jobs:
+                        continue
+                    claimed += len(jobs)
+                    self.stats['total_requested'] += len(jobs)
+                    
+                    async with queue.keep_alive(jobs):
+                        await self.process_language_batch(target_lang, [job.source_text for job in jobs], batch_size)
+                    
+                    # Only a saved translation completes a job; anything else is retried by some worker
+                    done, failed = [], []
+                    for job in jobs:
+                        saved = await self.translator._translation_exists(job.source_text, target_lang)
+                        (done if saved else failed).append(job)
+                    await queue.complete(done)
+                    await queue.fail(failed, 'no translation saved')
+                    jobs = []
+                
+                if claimed:
+                    continue
+                if poll_interval is None:
+                    self.logger.info("🎉 Job queue is empty")
+                    break
+                await self.clock.sleep(poll_interval)
+        
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            self.logger.info("⏹️ Worker interrupted, releasing its jobs")
+            await queue.release(jobs)
+            raise
+        
+        finally:
+            self.stats['end_time'] = self.clock.now()
+            self.stats['keys_rotated'] = self.translator.keys_rotated
+            self.logger.info(await self.generate_report())
+            await self.translator.close()
+    
     async def generate_report(self) -> str:
         """Generate detailed completion report"""
         duration = self.stats['end_time'] - self.stats['start_time']
@@ -244,21 +572,36 @@ Cache Hit Rate: {(self.stats['already_cached'] / max(self.stats['total_requested
 - Database now contains {self.stats['newly_translated']} new translations
 - Cache hit rate of {(self.stats['already_cached'] / max(self.stats['total_requested'], 1)) * 100:.1f}% shows good reuse
 - Consider running again tomorrow for any failed translations
+"""
+        
+        if self.translator.batch_tuner is not None and self.translator.batch_tuner.states:
+            report += f"""
+📐 LEARNED BATCH SIZES:
+{self.translator.batch_tuner.summary()}
+"""
+        
+        if self.translator.prompts.usage:
+            report += f"""
+🧮 TOKENS:
+{self.translator.prompts.summary()}
 """
         
         return report
     
-    async def run_overnight_batch(self, target_langs: List[str], max_translations: int = None, batch_size: int = 15):
+    async def run_overnight_batch(self, target_langs: List[str], max_translations: int = None, batch_size: int = 15,
+                                  delta_texts: Optional[List[str]] = None, fan_out: bool = False,
+                                  prioritize: bool = False, full_scan: bool = False):
         """Main overnight batch processing function"""
         
-        self.stats['start_time'] = datetime.now()
+        self.stats['start_time'] = self.clock.now()
         self.logger.info("🌙 Starting overnight batch translation...")
         self.logger.info(f"🎯 Target languages: {', '.join(target_langs)}")
         self.logger.info(f"🔑 API keys available: {len(self.api_keys)}")
         
         try:
-            # Initialize database connection
+            # Initialize database connection and the negative cache of existing translations
             await self.translator._init_database()
+            await self.translator.load_existence_filter()
             
             # Load previous progress if exists
             progress = await self.load_progress()
@@ -267,8 +610,10 @@ Cache Hit Rate: {(self.stats['already_cached'] / max(self.stats['total_requested
             if progress.get('remaining'):
                 texts_by_lang = progress['remaining']
                 self.logger.info("📁 Resuming from previous run...")
+            elif delta_texts is not None:
+                texts_by_lang = await self.extract_texts_from_delta(target_langs, delta_texts, max_translations)
             else:
-                texts_by_lang = await self.extract_texts_needing_translation(target_langs, max_translations)
+                texts_by_lang = await self.extract_texts_needing_translation(target_langs, max_translations, full_scan)
             
             # Calculate totals and estimates
             total_texts = sum(len(texts) for texts in texts_by_lang.values())
@@ -276,31 +621,46 @@ Cache Hit Rate: {(self.stats['already_cached'] / max(self.stats['total_requested
             
             if total_texts == 0:
                 self.logger.info("🎉 No translations needed - all texts are already translated!")
+                self.commit_watermarks()
                 return
             
+            if prioritize and fan_out:
+                self.logger.warning("⚠️ --prioritize and --fan-out cannot be combined; using --prioritize")
+            
             # Time estimation
-            hours_needed, completion_time = self.calculate_estimated_time(total_texts, len(self.api_keys))
-            self.logger.info(f"⏱️ Estimated completion: {hours_needed} hours (by {completion_time})")
+            plan = await self.plan_run(texts_by_lang, batch_size, fan_out and not prioritize)
+            for line in plan.format().splitlines():
+                self.logger.info(line)
             self.logger.info(f"📊 Total texts to process: {total_texts}")
             
+            # The plan (and the scheduler's quota packing) assume at most batch_size texts per request
+            self.translator.cap_batch_size(batch_size)
+            
             # Process each language
             all_results = {}
-            for target_lang, texts in texts_by_lang.items():
-                if not texts:
-                    continue
+            deferred_by_lang = {}
+            if prioritize:
+                all_results, deferred_by_lang = await self.process_scheduled_batches(texts_by_lang, batch_size)
+            elif fan_out and sum(1 for texts in texts_by_lang.values() if texts) > 1:
+                all_results = await self.process_fan_out_batch(texts_by_lang, batch_size)
+            else:
+                for target_lang, texts in texts_by_lang.items():
+                    if not texts:
+                        continue
+                        
+                    self.logger.info(f"\n🚀 Starting {target_lang} translations...")
                     
-                self.logger.info(f"\n🚀 Starting {target_lang} translations...")
-                
-                lang_results = await self.process_language_batch(
-                    target_lang, texts, batch_size
-                )
-                all_results[target_lang] = lang_results
-                
-                # Small delay between languages to be respectful
-                await asyncio.sleep(30)
+                    lang_results = await self.process_language_batch(
+                        target_lang, texts, batch_size
+                    )
+                    all_results[target_lang] = lang_results
+                    
+                    # Small delay between languages to be respectful
+                    await self.clock.sleep(30)
             
             # Final statistics
-            self.stats['end_time'] = datetime.now()
+            self.stats['end_time'] = self.clock.now()
+            self.stats['keys_rotated'] = self.translator.keys_rotated
             
             # Generate and display report
             report = await self.generate_report()
@@ -313,7 +673,15 @@ Cache Hit Rate: {(self.stats['already_cached'] / max(self.stats['total_requested
             
             self.logger.info(f"📄 Report saved to: {report_file}")
             
-            # Clean up progress file on success
+            # Discovery only moves forward past what was actually saved
+            await self.hold_back_watermarks(texts_by_lang)
+            self.commit_watermarks()
+            
+            # Deferred work is not resumed: the next run rediscovers it (the watermarks were
+            # held back for it) and re-ranks it together with anything new
+            if deferred_by_lang:
+                deferred_total = sum(len(texts) for texts in deferred_by_lang.values())
+                self.logger.info(f"⏭️ {deferred_total} lower-priority texts left for the next run to rediscover")
             if self.progress_file.exists():
                 self.progress_file.unlink()
             
@@ -330,7 +698,7 @@ Cache Hit Rate: {(self.stats['already_cached'] / max(self.stats['total_requested
             raise
             
         finally:
-            await self.translator._close_database()
+            await self.translator.close()
 
 async def main():
     """CLI interface for overnight batch translation"""
@@ -338,10 +706,24 @@ async def main():
     parser.add_argument('--languages', nargs='+', default=['pt'], help='Target languages (default: pt)')
     parser.add_argument('--max-translations', type=int, help='Maximum translations to process')
     parser.add_argument('--batch-size', type=int, default=15, help='Batch size for processing')
+    parser.add_argument('--auto-batch', action='store_true', help='Tune the batch size per language from observed results, starting at --batch-size')
     parser.add_argument('--resume', action='store_true', help='Resume from previous run')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be translated without actually doing it')
+    parser.add_argument('--prioritize', action='store_true', help="Translate critical and most-visible strings first within today's quota")
+    parser.add_argument('--fan-out', action='store_true', help='Translate into all languages with one request per batch')
+    parser.add_argument('--enqueue', action='store_true', help='Add the backlog to the shared job queue and exit')
+    parser.add_argument('--worker', action='store_true', help='Translate batches claimed from the shared job queue')
+    parser.add_argument('--poll', type=float, metavar='SECONDS', help='In worker mode, wait for new jobs instead of exiting when idle')
+    parser.add_argument('--full-scan', action='store_true', help='Check every English source instead of only those changed since the last run')
+    parser.add_argument('--from-delta', metavar='FILE', help="Only translate strings added in a ui_string_extractor.py delta stream ('-' for stdin)")
+    parser.add_argument('--fast-log', action='store_true', help='Log from a background thread, one summary line per batch')
+    parser.add_argument('--log-sample', type=float, default=0.0, help='With --fast-log, share of per-item lines still logged at DEBUG')
+    parser.add_argument('--log-json', action='store_true', help='Write log records as JSON lines')
     
     args = parser.parse_args()
+    if args.prioritize and args.fan_out:
+        parser.error('--prioritize and --fan-out cannot be combined: the scheduler packs single-language batches')
+    setup_logging(default_log_file(), args.fast_log, args.log_json, args.log_sample)
     
     # Get configuration
     database_url = os.getenv('DATABASE_URL')
@@ -373,12 +755,36 @@ async def main():
     if args.dry_run:
         print("🧪 DRY RUN MODE - No actual translations will be made")
     
+    # Read newly extracted UI strings if fed from the incremental extractor
+    delta_texts = None
+    if args.from_delta:
+        if args.from_delta == '-':
+            delta_texts = list(read_delta_stream(sys.stdin))
+        else:
+            with open(args.from_delta, 'r', encoding='utf-8') as f:
+                delta_texts = list(read_delta_stream(f))
+        print(f"🧩 UI delta: {len(delta_texts)} added texts")
+    
     # Initialize manager
     manager = OvernightTranslationManager(database_url, api_keys)
+    if args.auto_batch:
+        manager.translator.enable_batch_tuning(args.batch_size)
+    
+    if args.enqueue:
+        await manager.enqueue_backlog(args.languages, args.max_translations, delta_texts, args.full_scan)
+        await manager.translator.close()
+        return
+    
+    if args.worker:
+        await manager.run_worker(args.languages, args.batch_size, args.poll)
+        return
     
     if args.dry_run:
         # Just show what would be translated
-        texts_by_lang = await manager.extract_texts_needing_translation(args.languages, args.max_translations)
+        if delta_texts is not None:
+            texts_by_lang = await manager.extract_texts_from_delta(args.languages, delta_texts, args.max_translations)
+        else:
+            texts_by_lang = await manager.extract_texts_needing_translation(args.languages, args.max_translations, args.full_scan)
         total = sum(len(texts) for texts in texts_by_lang.values())
         
         print(f"\n📊 WOULD TRANSLATE:")
@@ -387,15 +793,20 @@ async def main():
         print(f"  Total: {total} translations")
         
         if total > 0:
-            hours, completion = manager.calculate_estimated_time(total, len(api_keys))
-            print(f"⏱️ Estimated time: {hours} hours")
-            print(f"🏁 Would complete by: {completion}")
+            plan = await manager.plan_run(texts_by_lang, args.batch_size, args.fan_out)
+            print(plan.format())
+        
+        await manager.translator.close()
     else:
         # Run actual translation
         await manager.run_overnight_batch(
             args.languages,
             args.max_translations,
-            args.batch_size
+            args.batch_size,
+            delta_texts,
+            args.fan_out,
+            args.prioritize,
+            args.full_scan
         )
 
 if __name__ == '__main__':
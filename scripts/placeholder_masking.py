@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Placeholder Masking
+===================
+
+Replaces interpolation tokens (`${item.name}`, `{count}`, `{{value}}`, `%s`)
+with short positional sentinels (`{0}`, `{1}`, ...) before texts go into a
+prompt, and puts them back afterwards.
+
+- The model never sees, translates or mangles the real expressions
+- Prompts carry `{0}` instead of long JS expressions
+- Texts that differ only in their tokens share one template, so
+  "${finalData.name} has been successfully added." and
+  "${user.name} has been successfully added." need a single translation
+
+Restoring fails (returns None) unless every sentinel survived exactly once.
+Translated templates are stored as Translation rows with category `template`;
+exports, coverage diffs and the local snapshot leave them out.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from translation_qa import placeholder_spans
+
+SENTINEL_PATTERN = re.compile(r'\{(\d+)\}')
+
+# Translation.category of stored templates
+TEMPLATE_CATEGORY = 'template'
+
+@dataclass
+class MaskedText:
+    """A text with its placeholders swapped for sentinels"""
+    text: str
+    template: str
+    tokens: List[str] = field(default_factory=list)
+    
+    @property
+    def is_templated(self) -> bool:
+        return bool(self.tokens)
+
+def mask(text: str) -> MaskedText:
+    """Replace each placeholder with `{i}`, numbered in order of appearance"""
+    tokens: List[str] = []
+    parts: List[str] = []
+    pos = 0
+    for start, end in placeholder_spans(text):
+        parts.append(text[pos:start])
+        parts.append(f"{{{len(tokens)}}}")
+        tokens.append(text[start:end])
+        pos = end
+    parts.append(text[pos:])
+    return MaskedText(text, ''.join(parts), tokens)
+
+def unmask(translated_template: str, tokens: List[str]) -> Optional[str]:
+    """Put the original tokens back, or None if any sentinel was lost, duplicated or invented"""
+    found = sorted(int(index) for index in SENTINEL_PATTERN.findall(translated_template))
+    if found != list(range(len(tokens))):
+        return None
+    return SENTINEL_PATTERN.sub(lambda match: tokens[int(match.group(1))], translated_template)
+
+def group_by_template(texts: List[str]) -> Dict[str, List[MaskedText]]:
+    """Masked texts grouped by shared template, in order of first appearance"""
+    groups: Dict[str, List[MaskedText]] = {}
+    for text in texts:
+        masked = mask(text)
+        groups.setdefault(masked.template, []).append(masked)
+    return groups
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Prompt Compiler
+===============
+
+Builds the translation prompts. The instructions for each (kind, source
+language, target languages) combination are compiled once into a compact
+header. Only the notes that apply to those languages are included: the
+European Portuguese note goes out with Portuguese requests only. Items follow
+as bare numbered lines:
+
+    Translate each numbered English text to Spanish.
+    Keep placeholders such as {0}, names, technical terms and formatting unchanged.
+    Reply with the translations only, one per line, in order.
+
+    1. Save changes
+    2. {0} items selected
+
+Token usage comes from the response's usageMetadata and is accumulated per
+language (or language set for fan-out requests), so the cost of instructions
+versus strings can be read off the per-text figures.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from response_journal import MULTI, SINGLE
+
+# Extra instructions, sent only when the language is part of the request
+LANGUAGE_NOTES = {
+    'pt': 'Use formal European Portuguese as written in Portugal, never Brazilian Portuguese.',
+}
+
+RULES = 'Keep placeholders such as {0}, names, technical terms and formatting unchanged.'
+
+@dataclass
+class TokenUsage:
+    """Billed tokens for the requests of one language key"""
+    requests: int = 0
+    texts: int = 0
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    
+    def add(self, texts: int, prompt_tokens: int, output_tokens: int) -> None:
+        self.requests += 1
+        self.texts += texts
+        self.prompt_tokens += prompt_tokens
+        self.output_tokens += output_tokens
+    
+    @property
+    def prompt_per_text(self) -> float:
+        return self.prompt_tokens / self.texts if self.texts else 0.0
+    
+    @property
+    def output_per_text(self) -> float:
+        return self.output_tokens / self.texts if self.texts else 0.0
+
+class PromptCompiler:
+    """Compact per-language prompt templates and the token usage of the requests built from them"""
+    
+    def __init__(self, language_names: Dict[str, str]):
+        self.language_names = language_names
+        self._headers: Dict[Tuple[str, str, Tuple[str, ...]], str] = {}
+        self.usage: Dict[str, TokenUsage] = {}
+    
+    def _name(self, lang: str) -> str:
+        return self.language_names.get(lang, lang)
+    
+    def _notes(self, target_langs: List[str]) -> List[str]:
+        return [LANGUAGE_NOTES[lang] for lang in target_langs if lang in LANGUAGE_NOTES]
+    
+    def header(self, kind: str, source_lang: str, target_langs: List[str]) -> str:
+        """Instructions for a request, compiled on first use"""
+        key = (kind, source_lang, tuple(target_langs))
+        if key not in self._headers:
+            self._headers[key] = self._compile(kind, source_lang, target_langs)
+        return self._headers[key]
+    
+    def _compile(self, kind: str, source_lang: str, target_langs: List[str]) -> str:
+        source = self._name(source_lang)
+        if kind == MULTI:
+            lines = [f"Translate each numbered {source} text into each language below."]
+            lines += [f"- {lang}: {self._name(lang)}" for lang in target_langs]
+            lines += self._notes(target_langs)
+            lines.append(RULES)
+            # {count} is filled in per request
+            lines.append("Reply with only a JSON object mapping each language code to an array of exactly "
+                         "{count} translations, in text order, without numbering.")
+        else:
+            lines = [f"Translate each numbered {source} text to {self._name(target_langs[0])}."]
+            lines += self._notes(target_langs)
+            lines.append(RULES)
+            lines.append("Reply with the translations only, one per line, in order.")
+        return '\n'.join(lines) + '\n\n'
+    
+    @staticmethod
+    def encode_items(texts: List[str]) -> str:
+        return '\n'.join(f"{i}. {text}" for i, text in enumerate(texts, 1))
+    
+    def single(self, texts: List[str], source_lang: str, target_lang: str) -> str:
+        """Prompt translating `texts` into one language, answered one line per text"""
+        return self.header(SINGLE, source_lang, [target_lang]) + self.encode_items(texts)
+    
+    def multi(self, texts: List[str], source_lang: str, target_langs: List[str]) -> str:
+        """Prompt translating `texts` into several languages, answered as one JSON object"""
+        header = self.header(MULTI, source_lang, target_langs).replace('{count}', str(len(texts)))
+        return header + self.encode_items(texts)
+    
+    def record(self, key: str, texts: int, prompt_tokens: int, output_tokens: int) -> TokenUsage:
+        """Add one request's billed tokens to its language key"""
+        usage = self.usage.setdefault(key, TokenUsage())
+        usage.add(texts, prompt_tokens, output_tokens)
+        return usage
+    
+    def summary(self) -> str:
+        """One line per language key, for logs and reports"""
+        return '\n'.join(
+            f"{key}: {usage.prompt_tokens} input + {usage.output_tokens} output tokens in {usage.requests} requests "
+            f"({usage.prompt_per_text:.1f} in / {usage.output_per_text:.1f} out per text)"
+            for key, usage in sorted(self.usage.items())
+        )
@@ -5,20 +5,126 @@ Quick Translation Integration Script
 
 A lightweight script to integrate the Python translator with your existing system.
 This can be called from your Node.js application or used in batch jobs.
+
+Cached translations are answered before anything heavy is loaded: first from
+the local snapshot (translation_snapshot.py) or, without one, the exported
+bundle in public/locales, then with a single database query. The
+translator (and its HTTP client) is only imported when a text still needs the
+API. With --cache-only the script never calls the API and texts without a
+cached translation are left untranslated.
+
+A local copy synced within TRANSLATION_LOCAL_MAX_AGE seconds (default 900) is
+trusted as is. An older one costs one indexed query: if the language has rows
+newer than the copy's watermark, the copy is skipped and the database answers
+instead. If the database cannot be reached, the local answers stand.
 """
 
-import asyncio
 import json
 import sys
 import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Dict, List, Optional
 
 # Add the parent directory to path to import our translator
 sys.path.append(str(Path(__file__).parent))
 
-from gemini_translator import GeminiTranslator, TranslationRequest
+LOCAL_MAX_AGE = timedelta(seconds=float(os.getenv('TRANSLATION_LOCAL_MAX_AGE', '900')))
+
+@dataclass
+class LocalLookup:
+    """Translations answered by a local copy, with what is known about its age"""
+    results: Dict[str, str] = field(default_factory=dict)
+    watermark: Optional[datetime] = None  # newest updatedAt the copy contains
+    synced_at: Optional[datetime] = None  # when the copy was last brought up to date
+    
+    @property
+    def needs_check(self) -> bool:
+        """Whether the answers must be checked against the database before use"""
+        if not self.results:
+            return False
+        return self.synced_at is None or datetime.now() - self.synced_at > LOCAL_MAX_AGE
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+def lookup_local(texts: List[str], target_lang: str) -> LocalLookup:
+    """Translations found in the local snapshot or exported bundle (no database needed)"""
+    from translation_snapshot import TranslationSnapshot
+    
+    snapshot = TranslationSnapshot(readonly=True)
+    if snapshot.exists:
+        try:
+            return LocalLookup(snapshot.get_many(texts, target_lang), snapshot.watermark, snapshot.refreshed_at)
+        finally:
+            snapshot.close()
+    
+    from export_translation_bundles import load_bundle, load_manifest_entry
+    
+    bundle = load_bundle(target_lang)
+    if bundle is None:
+        return LocalLookup()
+    
+    entry, generated_at = load_manifest_entry(target_lang)
+    local = LocalLookup(watermark=_parse_time(entry.get('watermark')), synced_at=_parse_time(generated_at))
+    for text in texts:
+        translated = bundle.get(text)
+        if translated is not None:
+            local.results[text] = translated
+    return local
+
+async def local_is_current(local: LocalLookup, target_lang: str, database_url: str) -> bool:
+    """Whether the language has no rows newer than the local copy (one index lookup)"""
+    import asyncpg
+    
+    try:
+        conn = await asyncpg.connect(database_url)
+    except (OSError, asyncpg.PostgresError) as e:
+        print(f"⚠️ Database unreachable, using local translations as they are: {e}", file=sys.stderr)
+        return True
+    
+    try:
+        newest = await conn.fetchval(
+            'SELECT MAX("updatedAt") FROM "Translation" WHERE "targetLang" = $1',
+            target_lang
+        )
+    finally:
+        await conn.close()
+    
+    return newest is None or (local.watermark is not None and newest <= local.watermark)
 
-async def quick_translate(texts, target_lang='pt', source_lang='en'):
+def get_database_url() -> str:
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable is required")
+    return database_url
+
+async def lookup_database(texts: List[str], target_lang: str, database_url: str) -> Dict[str, str]:
+    """Approved translations for the given texts, fetched with one query on a single connection"""
+    import asyncpg
+    
+    conn = await asyncpg.connect(database_url)
+    try:
+        rows = await conn.fetch(
+            """
+            SELECT DISTINCT ON ("sourceText") "sourceText", "translatedText"
+            FROM "Translation"
+            WHERE "sourceText" = ANY($1::text[]) AND "targetLang" = $2
+            AND "status" = 'approved' AND "category" <> 'template'
+            ORDER BY "sourceText", "qualityScore" DESC, "updatedAt" DESC
+            """,
+            texts, target_lang
+        )
+    finally:
+        await conn.close()
+    
+    return {row['sourceText']: row['translatedText'] for row in rows}
+
+async def quick_translate(texts, target_lang='pt', source_lang='en', cache_only=False, cached=None):
     """
     Quick translation function for integration
     
@@ -26,6 +132,8 @@ async def quick_translate(texts, target_lang='pt', source_lang='en'):
         texts: List of texts to translate or single text string
         target_lang: Target language code (default: 'pt')
         source_lang: Source language code (default: 'en')
+        cache_only: Only answer from local copies or the database, never call the API
+        cached: LocalLookup already done by the caller (skips the local lookup)
     
     Returns:
         Dictionary with original texts as keys and translations as values
@@ -34,11 +142,28 @@ async def quick_translate(texts, target_lang='pt', source_lang='en'):
     # Handle single text input
     if isinstance(texts, str):
         texts = [texts]
+    texts = list(dict.fromkeys(texts))
+    
+    local = cached if cached is not None else lookup_local(texts, target_lang)
+    results = dict(local.results)
+    missing = [text for text in texts if text not in results]
+    if not missing and not local.needs_check:
+        return results
     
     # Get configuration
-    database_url = os.getenv('DATABASE_URL')
-    if not database_url:
-        raise ValueError("DATABASE_URL environment variable is required")
+    database_url = get_database_url()
+    
+    # A local copy that is behind the database must not hide corrections made since
+    if local.needs_check and not await local_is_current(local, target_lang, database_url):
+        results = {}
+        missing = texts
+    if not missing:
+        return results
+    
+    results.update(await lookup_database(missing, target_lang, database_url))
+    missing = [text for text in texts if text not in results]
+    if not missing or cache_only:
+        return results
     
     api_keys = [
         os.getenv('GOOGLE_GENERATIVE_AI_API_KEY'),
@@ -51,6 +176,9 @@ async def quick_translate(texts, target_lang='pt', source_lang='en'):
     if not api_keys:
         raise ValueError("At least one GOOGLE_GENERATIVE_AI_API_KEY is required")
     
+    # Only now load the translator and its API client
+    from gemini_translator import GeminiTranslator, TranslationRequest
+    
     # Initialize translator
     translator = GeminiTranslator(database_url, api_keys)
     
@@ -58,32 +186,35 @@ async def quick_translate(texts, target_lang='pt', source_lang='en'):
         # Create translation requests
         requests = [
             TranslationRequest(text, target_lang, source_lang)
-            for text in texts
+            for text in missing
         ]
-        
+    
         # Translate
-        results = await translator.translate_batch(requests, batch_size=10)
-        
+        results.update(await translator.translate_batch(requests, batch_size=10))
+    
         return results
-        
+    
     finally:
-        await translator._close_database()
+        await translator.close()
 
 def main():
     """CLI interface for quick translations"""
-    if len(sys.argv) < 2:
-        print("Usage: python3 quick_translate.py <text> [target_lang] [source_lang]")
-        print("       python3 quick_translate.py --json '{\"texts\": [\"Hello\", \"World\"], \"target_lang\": \"pt\"}'")
+    cache_only = '--cache-only' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--cache-only']
+    
+    if not args:
+        print("Usage: python3 quick_translate.py [--cache-only] <text> [target_lang] [source_lang]")
+        print("       python3 quick_translate.py [--cache-only] --json '{\"texts\": [\"Hello\", \"World\"], \"target_lang\": \"pt\"}'")
         sys.exit(1)
     
-    if sys.argv[1] == '--json':
+    if args[0] == '--json':
         # JSON input mode
-        if len(sys.argv) < 3:
+        if len(args) < 2:
             print("Error: JSON data required with --json flag")
             sys.exit(1)
-        
+    
         try:
-            data = json.loads(sys.argv[2])
+            data = json.loads(args[1])
             texts = data.get('texts', [])
             target_lang = data.get('target_lang', 'pt')
             source_lang = data.get('source_lang', 'en')
@@ -92,12 +223,16 @@ def main():
             sys.exit(1)
     else:
         # Simple text mode
-        texts = [sys.argv[1]]
-        target_lang = sys.argv[2] if len(sys.argv) > 2 else 'pt'
-        source_lang = sys.argv[3] if len(sys.argv) > 3 else 'en'
+        texts = [args[0]]
+        target_lang = args[1] if len(args) > 1 else 'pt'
+        source_lang = args[2] if len(args) > 2 else 'en'
     
-    # Run translation
-    results = asyncio.run(quick_translate(texts, target_lang, source_lang))
+    # Fully cached in a recently synced local copy: answer without starting an event loop
+    local = lookup_local(texts, target_lang)
+    results = local.results
+    if local.needs_check or any(text not in results for text in texts):
+        import asyncio
+        results = asyncio.run(quick_translate(texts, target_lang, source_lang, cache_only, cached=local))
     
     # Output results
     if len(texts) == 1:
@@ -108,4 +243,4 @@ def main():
         print(json.dumps(results, ensure_ascii=False, indent=2))
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
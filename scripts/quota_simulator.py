@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Quota Simulator
+===============
+
+Runs the overnight runner for a simulated day (or more) against a modelled
+Gemini backend, on a VirtualClock (see virtual_clock.py). Rate-limit delays,
+breaker cool-downs, backoff and the wait for the midnight quota reset cost no
+real time, so a day of traffic for many keys runs in seconds and scheduling
+policies can be compared before one is deployed.
+
+The backend enforces the free tier per key the way the server does: a daily
+request cap that resets at local midnight and a per-minute limit, answered
+with the same 429 messages. Latency grows with the texts in a request, and a
+seeded share of requests fails with 503.
+
+Policies:
+- sequential: one language after another (the default overnight run)
+- fan-out:    every language in one request per batch (--fan-out)
+- prioritize: scheduler order within each day's quota (--prioritize)
+
+Each policy is re-run until the backlog is done, a pass makes no progress or
+the simulated window ends. The report shows per policy:
+- throughput:     texts translated per simulated hour
+- idle key-time:  key-hours a key had quota left but no request in flight
+- quota waste:    daily requests that expired at midnight while texts waited
+
+Usage:
+    python quota_simulator.py --keys 8 --texts 5000 --languages pt es
+    python quota_simulator.py --keys 8 --hours 48 --policy sequential fan-out prioritize
+    python quota_simulator.py --keys 4 --error-rate 0.05 --auto-batch
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Add the current directory to path for imports
+sys.path.append(str(Path(__file__).parent))
+
+from api_key_health import seconds_until_midnight
+from log_replay import ERROR_LATENCY, ReplayError, ReplayTransport, offline_translator
+from virtual_clock import SimulationDeadline, VirtualClock
+
+POLICIES = ('sequential', 'fan-out', 'prioritize')
+
+# Server answers, worded like the real API so classify_error sorts them the same way
+QUOTA_MESSAGE = ("429 RESOURCE_EXHAUSTED: Quota exceeded for metric generate_content_free_tier_requests, "
+                 "quotaId: GenerateRequestsPerDayPerProjectPerModel-FreeTier")
+RATE_MESSAGE = ("429 RESOURCE_EXHAUSTED: Quota exceeded for metric generate_content_free_tier_requests, "
+                "quotaId: GenerateRequestsPerMinutePerProjectPerModel-FreeTier")
+OVERLOADED_MESSAGE = "503 UNAVAILABLE: The model is overloaded. Please try again later."
+
+@dataclass
+class SimulationConfig:
+    """Workload, window and backend model for one simulation"""
+    keys: int = 4
+    texts: int = 2000
+    languages: List[str] = field(default_factory=lambda: ['pt'])
+    hours: float = 24.0
+    start: Optional[datetime] = None
+    batch_size: int = 15
+    auto_batch: bool = False
+    requests_per_day: int = 250
+    requests_per_minute: int = 2
+    base_latency: float = 2.0
+    latency_per_text: float = 0.15
+    error_rate: float = 0.0
+    seed: int = 1
+
+@dataclass
+class SimulationResult:
+    """What one policy achieved in the simulated window"""
+    policy: str
+    finished: bool
+    simulated_hours: float
+    texts: int
+    translated: int
+    requests: int
+    errors: int
+    quota_used: int
+    quota_wasted: int
+    busy_key_hours: float
+    exhausted_key_hours: float
+    idle_key_hours: float
+    wall_seconds: float
+    
+    @property
+    def throughput(self) -> float:
+        return self.translated / self.simulated_hours if self.simulated_hours else 0.0
+
+class SimulatedBackend:
+    """Stand-in for GeminiTransport that enforces per-key quotas on the virtual clock"""
+    
+    def __init__(self, clock: VirtualClock, config: SimulationConfig):
+        from gemini_transport import GeminiResponse
+        
+        self._response_class = GeminiResponse
+        self.clock = clock
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.used: Dict[Tuple[str, date], int] = {}
+        self.exhausted_at: Dict[Tuple[str, date], datetime] = {}
+        self.recent: Dict[str, Deque[float]] = {}
+        self.busy: Dict[str, float] = {}
+        self.requests = 0
+        self.errors = 0
+    
+    async def generate(self, api_key: str, prompt: str, generation_config: Dict):
+        self.requests += 1
+        now = self.clock.now()
+        day = now.date()
+        used = self.used.get((api_key, day), 0)
+        
+        if used >= self.config.requests_per_day:
+            await self._fail(api_key, QUOTA_MESSAGE)
+        
+        recent = self.recent.setdefault(api_key, deque())
+        while recent and recent[0] <= self.clock.time() - 60:
+            recent.popleft()
+        if len(recent) >= self.config.requests_per_minute:
+            await self._fail(api_key, RATE_MESSAGE, retry_after=recent[0] + 60 - self.clock.time())
+        
+        if self.random.random() < self.config.error_rate:
+            await self._fail(api_key, OVERLOADED_MESSAGE)
+        
+        # Accepted: counts against the key's quota from here on
+        recent.append(self.clock.time())
+        self.used[(api_key, day)] = used + 1
+        if used + 1 == self.config.requests_per_day:
+            self.exhausted_at[(api_key, day)] = now
+        
+        answer = ReplayTransport._answer(prompt)
+        items = len(re.findall(r'\[[^\]]+\] ', answer))
+        latency = (self.config.base_latency + self.config.latency_per_text * items) * self.random.uniform(0.8, 1.2)
+        await self._spend(api_key, latency)
+        return self._response_class(
+            text=answer, prompt_tokens=len(prompt) // 4, output_tokens=len(answer) // 4, finish_reason='STOP'
+        )
+    
+    async def _fail(self, api_key: str, message: str, retry_after: Optional[float] = None) -> None:
+        self.errors += 1
+        await self._spend(api_key, ERROR_LATENCY)
+        raise ReplayError(message, retry_after)
+    
+    async def _spend(self, api_key: str, seconds: float) -> None:
+        self.busy[api_key] = self.busy.get(api_key, 0.0) + seconds
+        await self.clock.sleep(seconds)
+    
+    async def close(self) -> None:
+        pass
+    
+    def key_time(self, api_keys: List[str], start: datetime, end: datetime) -> Tuple[float, float, float]:
+        """Busy, exhausted and idle key-seconds between start and end"""
+        window = (end - start).total_seconds()
+        busy = exhausted = idle = 0.0
+        for api_key in api_keys:
+            key_busy = min(self.busy.get(api_key, 0.0), window)
+            key_exhausted = 0.0
+            for (key, _), at in self.exhausted_at.items():
+                if key == api_key:
+                    reset = at + timedelta(seconds=seconds_until_midnight(at))
+                    key_exhausted += max((min(reset, end) - at).total_seconds(), 0.0)
+            busy += key_busy
+            exhausted += key_exhausted
+            idle += max(window - key_busy - key_exhausted, 0.0)
+        return busy, exhausted, idle
+    
+    def quota_wasted(self, api_keys: List[str], start: datetime, end: datetime) -> int:
+        """Requests left unused on quota days that ended (reached midnight) before `end`"""
+        wasted = 0
+        day = start.date()
+        while datetime.combine(day + timedelta(days=1), datetime.min.time()) <= end:
+            for api_key in api_keys:
+                wasted += max(self.config.requests_per_day - self.used.get((api_key, day), 0), 0)
+            day += timedelta(days=1)
+        return wasted
+
+def build_manager(workdir: Path, clock: VirtualClock, backend: SimulatedBackend, config: SimulationConfig):
+    """Overnight manager around an offline translator that talks to the simulated backend"""
+    from overnight_translator import OvernightTranslationManager
+    
+    class SimulatedManager(OvernightTranslationManager):
+        async def fetch_source_metadata(self, texts: List[str]) -> Dict[str, Tuple[str, int]]:
+            return {}
+    
+    translator = offline_translator(workdir, config.keys, backend, clock)
+    if config.auto_batch:
+        translator.enable_batch_tuning(config.batch_size)
+        translator.batch_tuner.path = None  # learned sizes from a simulation are not kept
+    manager = SimulatedManager(
+        'simulation://', translator.api_keys, log_file=str(workdir / 'overnight.log'),
+        clock=clock, translator=translator
+    )
+    # Simulated progress and watermarks must never be resumed by a real run
+    manager.progress_file = workdir / 'overnight_progress.json'
+    manager.watermark_file = workdir / 'overnight_watermarks.json'
+    return manager
+
+async def run_policy(manager, policy: str, backlog: Dict[str, List[str]], batch_size: int) -> None:
+    """One overnight pass of a policy over the backlog"""
+    if policy == 'fan-out':
+        await manager.process_fan_out_batch(backlog, batch_size)
+    elif policy == 'prioritize':
+        pending = backlog
+        while pending:
+            _, pending = await manager.process_scheduled_batches(pending, batch_size)
+            if pending:
+                # Deferred work is picked up by the next night's run
+                await manager.clock.sleep(seconds_until_midnight(manager.clock.now()))
+    else:
+        for target_lang, texts in backlog.items():
+            await manager.process_language_batch(target_lang, texts, batch_size)
+            await manager.clock.sleep(30)
+
+async def simulate(policy: str, config: SimulationConfig) -> SimulationResult:
+    """Run one policy through the simulated window and measure it"""
+    start = config.start or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    clock = VirtualClock(start, deadline=start + timedelta(hours=config.hours))
+    backlog = {
+        lang: [f"Simulated interface text {i}" for i in range(config.texts)]
+        for lang in config.languages
+    }
+    wall_started = time.monotonic()
+    
+    with tempfile.TemporaryDirectory(prefix='quota_sim_') as workdir:
+        backend = SimulatedBackend(clock, config)
+        manager = build_manager(Path(workdir), clock, backend, config)
+        translator = manager.translator
+        finished = False
+        try:
+            remaining = backlog
+            while remaining:
+                done_before = translator.snapshot.count()
+                await run_policy(manager, policy, remaining, config.batch_size)
+                if translator.snapshot.count() == done_before:
+                    break
+                remaining = {
+                    lang: [text for text in texts if translator.snapshot.get(text, lang) is None]
+                    for lang, texts in remaining.items()
+                }
+                remaining = {lang: texts for lang, texts in remaining.items() if texts}
+            finished = not remaining
+        except SimulationDeadline:
+            pass
+        finally:
+            ended = clock.now()
+            translated = translator.snapshot.count()
+            await translator.close()
+    
+    busy, exhausted, idle = backend.key_time(translator.api_keys, start, ended)
+    return SimulationResult(
+        policy=policy,
+        finished=finished,
+        simulated_hours=(ended - start).total_seconds() / 3600,
+        texts=sum(len(texts) for texts in backlog.values()),
+        translated=translated,
+        requests=backend.requests,
+        errors=backend.errors,
+        quota_used=sum(backend.used.values()),
+        quota_wasted=backend.quota_wasted(translator.api_keys, start, ended),
+        busy_key_hours=busy / 3600,
+        exhausted_key_hours=exhausted / 3600,
+        idle_key_hours=idle / 3600,
+        wall_seconds=time.monotonic() - wall_started,
+    )
+
+def format_report(config: SimulationConfig, results: List[SimulationResult]) -> str:
+    header = (f"{'Policy':<12} {'Done':>5} {'Translated':>11} {'Texts/h':>8} {'Requests':>9} {'Errors':>7} "
+              f"{'Quota used':>11} {'Wasted':>7} {'Busy key-h':>11} {'Idle key-h':>11} {'Spent key-h':>12} {'Wall':>6}")
+    rows = [
+        f"{r.policy:<12} {'yes' if r.finished else 'no':>5} {r.translated:>11} {r.throughput:>8.1f} {r.requests:>9} "
+        f"{r.errors:>7} {r.quota_used:>11} {r.quota_wasted:>7} {r.busy_key_hours:>11.1f} {r.idle_key_hours:>11.1f} "
+        f"{r.exhausted_key_hours:>12.1f} {r.wall_seconds:>5.1f}s"
+        for r in results
+    ]
+    return f"""
+🧪 QUOTA SIMULATION
+{'=' * 40}
+Keys: {config.keys} x {config.requests_per_day} requests/day, {config.requests_per_minute}/minute
+Window: {config.hours:g}h, backlog {config.texts} texts x {', '.join(config.languages)}
+Batch size: {config.batch_size}{' (auto-tuned)' if config.auto_batch else ''}, error rate {config.error_rate:.0%}
+
+{header}
+""" + '\n'.join(rows) + """
+
+Idle key-h: a key had quota left but no request in flight. Spent key-h: its daily quota was used up.
+Wasted: daily requests that expired at midnight while texts were still waiting.
+"""
+
+async def main():
+    """Main CLI interface"""
+    parser = argparse.ArgumentParser(description='Simulate a day of overnight translation on a virtual clock')
+    parser.add_argument('--policy', nargs='+', choices=POLICIES, default=['sequential'], help='Policies to compare')
+    parser.add_argument('--keys', type=int, default=4, help='Number of simulated API keys')
+    parser.add_argument('--texts', type=int, default=2000, help='Backlog size per language')
+    parser.add_argument('--languages', nargs='+', default=['pt'], help='Target languages')
+    parser.add_argument('--hours', type=float, default=24.0, help='Simulated window (default: 24)')
+    parser.add_argument('--start', help='Simulated start time, YYYY-MM-DD HH:MM (default: today 00:00)')
+    parser.add_argument('--batch-size', type=int, default=15, help='Texts per request')
+    parser.add_argument('--auto-batch', action='store_true', help='Let the batch tuner pick the size')
+    parser.add_argument('--requests-per-day', type=int, default=250, help='Server quota per key per day')
+    parser.add_argument('--requests-per-minute', type=int, default=2, help='Server limit per key per minute')
+    parser.add_argument('--latency', type=float, default=2.0, help='Base latency of a request in seconds')
+    parser.add_argument('--latency-per-text', type=float, default=0.15, help='Added latency per translated text')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests failing with 503')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for latency and errors')
+    parser.add_argument('--verbose', action='store_true', help='Show the translator log')
+    args = parser.parse_args()
+    
+    # Configure logging before the translator does; a simulated day logs thousands of lines
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.CRITICAL,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler()]
+    )
+    
+    config = SimulationConfig(
+        keys=args.keys,
+        texts=args.texts,
+        languages=args.languages,
+        hours=args.hours,
+        start=datetime.strptime(args.start, '%Y-%m-%d %H:%M') if args.start else None,
+        batch_size=args.batch_size,
+        auto_batch=args.auto_batch,
+        requests_per_day=args.requests_per_day,
+        requests_per_minute=args.requests_per_minute,
+        base_latency=args.latency,
+        latency_per_text=args.latency_per_text,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    
+    results = []
+    for policy in args.policy:
+        results.append(await simulate(policy, config))
+    print(format_report(config, results))
+
+if __name__ == '__main__':
+    asyncio.run(main())
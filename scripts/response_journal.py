@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Response Journal
+================
+
+Append-only log of raw Gemini responses (`response_journal.jsonl`), written and
+fsynced before a response is parsed. A paid response is not lost when parsing
+throws, the database write fails or the process dies before the batch is saved.
+
+- Entries are keyed by a digest of the model and the full prompt
+- When a prompt whose response is already journaled is sent again (typically
+  the same batch on the next run), the journaled response is replayed instead
+  of calling the API. Each entry is replayed at most once, so a response that
+  turned out to be unusable does not block a fresh request.
+- Every entry keeps the texts and languages of its batch, so old responses can
+  be re-parsed after a parser fix (`gemini_translator.py --reparse-journal`)
+- Entries older than RETENTION_DAYS are dropped when the journal is opened
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+DEFAULT_JOURNAL_FILE = Path(__file__).parent / 'response_journal.jsonl'
+RETENTION_DAYS = 30
+
+SINGLE = 'single'
+MULTI = 'multi'
+
+def prompt_digest(model: str, prompt: str) -> str:
+    """Key of a request: SHA-256 of the model name and prompt"""
+    return hashlib.sha256(f"{model}\0{prompt}".encode('utf-8')).hexdigest()
+
+@dataclass
+class JournalEntry:
+    """One raw response and the batch it answered"""
+    digest: str
+    response: str
+    kind: str
+    texts: List[str]
+    target_langs: List[str]
+    source_lang: str = 'en'
+    recorded_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    replayed: bool = False
+    
+    def to_record(self) -> Dict:
+        return {
+            'digest': self.digest,
+            'recordedAt': self.recorded_at,
+            'kind': self.kind,
+            'texts': self.texts,
+            'targetLangs': self.target_langs,
+            'sourceLang': self.source_lang,
+            'response': self.response,
+            'promptTokens': self.prompt_tokens,
+            'outputTokens': self.output_tokens,
+        }
+    
+    @classmethod
+    def from_record(cls, record: Dict) -> 'JournalEntry':
+        return cls(
+            digest=record['digest'],
+            response=record['response'],
+            kind=record.get('kind', SINGLE),
+            texts=record.get('texts', []),
+            target_langs=record.get('targetLangs', []),
+            source_lang=record.get('sourceLang', 'en'),
+            recorded_at=record.get('recordedAt', ''),
+            prompt_tokens=record.get('promptTokens', 0),
+            output_tokens=record.get('outputTokens', 0),
+        )
+
+class ResponseJournal:
+    """Durable store of raw model responses, keyed by prompt digest"""
+    
+    def __init__(self, model: str, path: Path = DEFAULT_JOURNAL_FILE, retention_days: int = RETENTION_DAYS):
+        self.model = model
+        self.path = Path(path)
+        self.retention = timedelta(days=retention_days)
+        self._entries: Dict[str, JournalEntry] = {}
+        self._load()
+    
+    def _load(self) -> None:
+        """Index the journal, dropping expired entries and a torn final line"""
+        if not self.path.exists():
+            return
+        
+        cutoff = (datetime.now() - self.retention).isoformat()
+        dropped = False
+        
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    dropped = True  # Partial write from a crash
+                    continue
+                
+                if 'response' in record:
+                    if record.get('recordedAt', '') < cutoff:
+                        dropped = True
+                        continue
+                    self._entries[record['digest']] = JournalEntry.from_record(record)
+                elif record.get('digest') in self._entries:
+                    self._entries[record['digest']].replayed = True
+        
+        if dropped:
+            self._rewrite()
+    
+    def _rewrite(self) -> None:
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry.to_record(), ensure_ascii=False) + '\n')
+                if entry.replayed:
+                    f.write(json.dumps({'digest': entry.digest, 'replayed': True}) + '\n')
+        os.replace(tmp_path, self.path)
+    
+    def _append(self, record: Dict) -> None:
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def digest(self, prompt: str) -> str:
+        return prompt_digest(self.model, prompt)
+    
+    def replayable(self, prompt: str) -> Optional[JournalEntry]:
+        """The journaled response to this prompt, unless it has already been replayed"""
+        entry = self._entries.get(self.digest(prompt))
+        if entry is None or entry.replayed:
+            return None
+        return entry
+    
+    def mark_replayed(self, entry: JournalEntry) -> None:
+        entry.replayed = True
+        self._append({'digest': entry.digest, 'replayedAt': datetime.now().isoformat()})
+    
+    def record(self, prompt: str, response: str, kind: str, texts: List[str], target_langs: List[str],
+               source_lang: str = 'en', prompt_tokens: int = 0, output_tokens: int = 0) -> JournalEntry:
+        """Durably append a raw response; returns once it is on disk"""
+        entry = JournalEntry(
+            self.digest(prompt), response, kind, list(texts), list(target_langs), source_lang,
+            prompt_tokens=prompt_tokens, output_tokens=output_tokens
+        )
+        self._append(entry.to_record())
+        self._entries[entry.digest] = entry
+        return entry
+    
+    def entries(self, target_lang: Optional[str] = None, since: Optional[datetime] = None) -> Iterator[JournalEntry]:
+        """Journaled responses, oldest first, optionally for one language or recorded after `since`"""
+        for entry in sorted(self._entries.values(), key=lambda e: e.recorded_at):
+            if target_lang and target_lang not in entry.target_langs:
+                continue
+            if since and entry.recorded_at < since.isoformat():
+                continue
+            yield entry
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -36,6 +36,22 @@ while [[ $# -gt 0 ]]; do
             RESUME="--resume"
             shift
             ;;
+        --fan-out)
+            FAN_OUT="--fan-out"
+            shift
+            ;;
+        --full-scan)
+            FULL_SCAN="--full-scan"
+            shift
+            ;;
+        --auto-batch)
+            AUTO_BATCH="--auto-batch"
+            shift
+            ;;
+        --fast-log)
+            FAST_LOG="--fast-log"
+            shift
+            ;;
         --help|-h)
             echo "Overnight Translation System"
             echo "Usage: $0 [options]"
@@ -46,6 +62,10 @@ while [[ $# -gt 0 ]]; do
             echo "  --batch-size SIZE    Batch size (default: 15)"
             echo "  --dry-run           Show what would be translated"
             echo "  --resume            Resume from previous run"
+            echo "  --fan-out           One request per batch for all languages"
+            echo "  --full-scan         Check all sources, not just those changed since last run"
+            echo "  --auto-batch        Tune the batch size per language from observed results"
+            echo "  --fast-log          Log from a background thread, one line per batch"
             echo "  --help              Show this help"
             echo ""
             echo "Examples:"
@@ -66,4 +86,4 @@ echo "🌙 Starting Overnight Translation System"
 echo "========================================"
 
 # Run the translator
-python3 overnight_translator.py --languages $LANGUAGES $MAX_TRANSLATIONS --batch-size $BATCH_SIZE $DRY_RUN $RESUME
\ No newline at end of file
+python3 overnight_translator.py --languages $LANGUAGES $MAX_TRANSLATIONS --batch-size $BATCH_SIZE $DRY_RUN $RESUME $FAN_OUT $FULL_SCAN $AUTO_BATCH $FAST_LOG
\ No newline at end of file
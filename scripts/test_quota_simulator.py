@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Quota Simulator Tests
+=====================
+
+Usage:
+    python -m pytest scripts/test_quota_simulator.py
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from quota_simulator import SimulationConfig, simulate
+
+def test_simulation_writes_nothing_to_the_working_directory(tmp_path, monkeypatch):
+    """A simulation cut off by its deadline leaves no progress, watermark or log files behind"""
+    monkeypatch.chdir(tmp_path)
+    config = SimulationConfig(keys=1, texts=40, hours=0.05, batch_size=5, start=datetime(2026, 1, 1))
+    
+    result = asyncio.run(simulate('sequential', config))
+    
+    assert not result.finished
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Streaming Text Input
+====================
+
+Reads texts to translate one at a time, without loading the whole input:
+
+- plain text files: one text per non-empty line
+- JSON files: the elements of a string array, parsed incrementally; either a
+  top-level array or an array field such as `texts` (extracted-ui-texts.json),
+  `missingTexts` (missing-translations.json), `criticalTerms`
+  (critical-missing.json) or `queue` (optimized-translation-queue.json)
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Iterator, Optional, TextIO
+
+# Array fields of the repo's JSON artifacts, tried in order when no key is given
+DEFAULT_JSON_KEYS = ('texts', 'missingTexts', 'criticalTerms', 'queue')
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\r\n'
+
+def iter_lines(f: TextIO) -> Iterator[str]:
+    """Non-empty, stripped lines"""
+    for line in f:
+        line = line.strip()
+        if line:
+            yield line
+
+def iter_json_array(f: TextIO, key: Optional[str] = None, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """String elements of a JSON array, decoded one element at a time
+    
+    Only the element being decoded is held in memory, so arbitrarily large
+    arrays can be read. Elements that are not strings are skipped.
+    """
+    decoder = json.JSONDecoder()
+    keys = [key] if key else list(DEFAULT_JSON_KEYS)
+    start_pattern = re.compile(r'^\s*\[|"(?:%s)"\s*:\s*\[' % '|'.join(re.escape(k) for k in keys))
+    
+    buffer = ''
+    eof = False
+    
+    def fill() -> bool:
+        nonlocal buffer, eof
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+        return not eof
+    
+    # Find the opening bracket of the array
+    while True:
+        match = start_pattern.search(buffer)
+        if match:
+            pos = match.end()
+            break
+        if not fill():
+            raise ValueError(f"No JSON array found (looked for {', '.join(keys)})")
+    
+    while True:
+        while pos < len(buffer) and buffer[pos] in WHITESPACE + ',':
+            pos += 1
+        if pos >= len(buffer):
+            buffer, pos = '', 0
+            if not fill():
+                raise ValueError("Unterminated JSON array")
+            continue
+        if buffer[pos] == ']':
+            return
+        
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Element split across chunks; read more and retry
+            buffer, pos = buffer[pos:], 0
+            if not fill():
+                raise
+            continue
+        
+        # A number at the very end of the buffer may continue in the next chunk
+        if end == len(buffer) and not isinstance(value, (str, list, dict)) and not eof:
+            buffer, pos = buffer[pos:], 0
+            fill()
+            continue
+        
+        if isinstance(value, str):
+            yield value
+        pos = end
+
+def iter_input_texts(path: Path, json_key: Optional[str] = None) -> Iterator[str]:
+    """Texts from a line-based or JSON input file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if Path(path).suffix.lower() == '.json':
+            for text in iter_json_array(f, json_key):
+                text = text.strip()
+                if text:
+                    yield text
+        else:
+            yield from iter_lines(f)
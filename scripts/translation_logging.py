@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Translation Logging
+===================
+
+Logging setup shared by the translator scripts, in two modes:
+
+- standard (default): file and console handlers on the root logger, and every
+  cache hit, template fill and translated string logged at INFO.
+  log_replay.py builds its traces from these lines.
+- fast (`--fast-log`): the handlers run on a QueueListener thread behind a
+  QueueHandler, so the event loop only enqueues records and never waits on a
+  file or terminal. Per-item lines become one summary per batch. A sampled
+  share of items (`--log-sample 0.01`) can still be logged at DEBUG.
+
+Either mode can write JSON lines instead of text (`--log-json`). Batch
+summaries then carry their counts as a structured `batch` field.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+from dataclasses import dataclass
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+CACHED = 'cached'
+TEMPLATE = 'template'
+TRANSLATED = 'translated'
+FAILED = 'failed'
+
+# Per-item messages, formatted lazily; standard mode keeps the wording log_replay.py parses
+ITEM_MESSAGES = {
+    CACHED: "Using cached translation: '%s' -> '%s'",
+    TEMPLATE: "Filled from template: '%s' -> '%s'",
+    TRANSLATED: "Translated: '%s' -> '%s'",
+}
+
+@dataclass
+class LogSettings:
+    """How the translator logs per-item outcomes"""
+    fast: bool = False
+    json_output: bool = False
+    item_sample: float = 0.0
+
+SETTINGS = LogSettings()
+_listener: Optional[QueueListener] = None
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if hasattr(record, 'batch'):
+            entry['batch'] = record.batch
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+def setup_logging(log_file: Optional[str] = None, fast: bool = False, json_output: bool = False,
+                  item_sample: float = 0.0) -> None:
+    """Configure the root logger once; later calls (e.g. from a constructor) leave it alone
+    
+    Like logging.basicConfig, this does nothing if the root logger already has
+    handlers, so a CLI or harness that configures logging first wins.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    
+    global _listener
+    SETTINGS.fast = fast
+    SETTINGS.json_output = json_output
+    SETTINGS.item_sample = item_sample if fast else 0.0
+    
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if log_file:
+        handlers.insert(0, logging.FileHandler(log_file))
+    formatter = JsonFormatter() if json_output else logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    if fast:
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        _listener = QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        root.addHandler(QueueHandler(records))
+    else:
+        for handler in handlers:
+            root.addHandler(handler)
+    
+    root.setLevel(logging.DEBUG if SETTINGS.item_sample else logging.INFO)
+
+def stop_logging() -> None:
+    """Drain the queue and stop the listener thread (fast mode)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+class BatchLog:
+    """Per-item outcomes of one batch: logged one by one, or counted and summarized in fast mode"""
+    
+    def __init__(self, logger: logging.Logger, target_lang: str, source_lang: str = 'en'):
+        self.logger = logger
+        self.target_lang = target_lang
+        self.source_lang = source_lang
+        self.counts: Dict[str, int] = {CACHED: 0, TEMPLATE: 0, TRANSLATED: 0, FAILED: 0}
+    
+    def item(self, outcome: str, source_text: str, translated_text: str) -> None:
+        self.counts[outcome] += 1
+        if not SETTINGS.fast:
+            self.logger.info(ITEM_MESSAGES[outcome], source_text, translated_text)
+        elif SETTINGS.item_sample and random.random() < SETTINGS.item_sample:
+            self.logger.debug(ITEM_MESSAGES[outcome], source_text, translated_text)
+    
+    def failed(self, count: int) -> None:
+        self.counts[FAILED] += count
+    
+    def close(self) -> None:
+        """Log the batch summary (fast mode only; standard mode already logged each item)"""
+        if not SETTINGS.fast:
+            return
+        self.logger.info(
+            "Batch %s -> %s: %d texts, %d cached, %d from templates, %d translated, %d failed",
+            self.source_lang, self.target_lang, sum(self.counts.values()),
+            self.counts[CACHED], self.counts[TEMPLATE], self.counts[TRANSLATED], self.counts[FAILED],
+            extra={'batch': dict(self.counts, targetLang=self.target_lang, sourceLang=self.source_lang)}
+        )
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Translation Run Planner
+=======================
+
+Estimates how long the translation backlog will take by simulating the
+overnight runner on a virtual clock instead of assuming a flat hourly rate.
+
+The simulation drives the translator's own `RateLimiter` on a VirtualClock
+(see virtual_clock.py), so its delays always match the real ones:
+- batches packed by size and by the output token budget of a request
+- texts sharing a masked template translated once (see placeholder_masking.py)
+- the minimum delay and per-minute limit between requests
+- each key's remaining daily quota, waiting for midnight when all are spent
+- the 30 s pause between languages (or a single pass in fan-out mode)
+
+Discovery only returns texts without an approved translation, so every
+discovered text is assumed to need a request.
+
+It reports the planned request count, when each language finishes and the
+day the backlog clears; `overnight_translator.py --dry-run` prints it.
+"""
+
+import logging
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from gemini_translator import RateLimitConfig, RateLimiter
+from placeholder_masking import mask
+from virtual_clock import VirtualClock
+
+# Prompt framing per item ("12. " plus newline) and rough chars-per-token ratio
+ITEM_FRAMING_TOKENS = 4
+CHARS_PER_TOKEN = 4
+
+# The simulated limiter's waits are not worth a log line each
+SIMULATION_LOGGER = logging.getLogger('translation_planner.simulation')
+SIMULATION_LOGGER.setLevel(logging.ERROR)
+
+@dataclass
+class PlannerConfig:
+    """Parameters of the simulated run"""
+    rate_limits: RateLimitConfig = field(default_factory=RateLimitConfig)
+    batch_size: int = 15
+    max_output_tokens: int = 8000
+    output_expansion: float = 1.3  # translations run longer than English sources
+    request_latency: float = 2.0  # seconds per successful request
+    language_pause: float = 30.0  # sleep between languages in the sequential runner
+    fan_out: bool = False
+
+@dataclass
+class RunPlan:
+    """Outcome of a simulated run"""
+    start_time: datetime
+    requests: int = 0
+    texts_to_translate: int = 0
+    shared_templates: Dict[str, int] = field(default_factory=dict)
+    completion_by_lang: Dict[str, datetime] = field(default_factory=dict)
+    requests_by_day: Dict[str, int] = field(default_factory=dict)
+    finish_time: Optional[datetime] = None
+    
+    @property
+    def hours_needed(self) -> float:
+        if self.finish_time is None:
+            return 0.0
+        return (self.finish_time - self.start_time).total_seconds() / 3600
+    
+    @property
+    def clears_on(self) -> Optional[str]:
+        """Day the backlog clears"""
+        return self.finish_time.strftime('%Y-%m-%d') if self.finish_time else None
+    
+    def format(self) -> str:
+        lines = [
+            f"🧮 Planned API requests: {self.requests} for {self.texts_to_translate} texts to translate",
+            f"⏱️ Estimated duration: {self.hours_needed:.1f} hours",
+        ]
+        for lang, finished in self.completion_by_lang.items():
+            shared = self.shared_templates.get(lang, 0)
+            lines.append(f"   {lang}: done by {finished.strftime('%Y-%m-%d %H:%M')} ({shared} texts filled from shared templates)")
+        if self.clears_on:
+            lines.append(f"🏁 Backlog clears on {self.clears_on} ({len(self.requests_by_day)} day(s) of quota)")
+        return '\n'.join(lines)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text"""
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+def pack_batches(texts: List[str], batch_size: int, max_output_tokens: int,
+                 output_expansion: float = 1.3, languages: Optional[Dict[str, int]] = None) -> List[List[str]]:
+    """Split texts into batches bounded by item count and expected output tokens
+    
+    `languages` gives the number of target languages requested per text in
+    fan-out mode, since each one adds its own output.
+    """
+    batches: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    
+    for text in texts:
+        copies = languages.get(text, 1) if languages else 1
+        tokens = math.ceil((estimate_tokens(text) * output_expansion + ITEM_FRAMING_TOKENS) * copies)
+        if current and (len(current) >= batch_size or current_tokens + tokens > max_output_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    
+    if current:
+        batches.append(current)
+    return batches
+
+def distinct_templates(texts: List[str]) -> List[str]:
+    """First text of each masked template; the others are filled from its translation"""
+    seen: Dict[str, str] = {}
+    for text in texts:
+        seen.setdefault(mask(text).template, text)
+    return list(seen.values())
+
+class PlannedRequests:
+    """Sends simulated requests through a real RateLimiter on a virtual clock, rotating keys like the translator"""
+    
+    def __init__(self, config: RateLimitConfig, key_quotas: List[int], clock: VirtualClock, latency: float):
+        self.clock = clock
+        self.limiter = RateLimiter(config, clock, SIMULATION_LOGGER)
+        self.latency = latency
+        self.keys = [f"planned-key-{index}" for index in range(len(key_quotas))]
+        self.key_index = 0
+        self.requests_by_day: Dict[str, int] = {}
+        
+        # Start from what each key has already used today
+        today = clock.now().strftime('%Y-%m-%d')
+        for key, quota in zip(self.keys, key_quotas):
+            self.limiter.daily_counts[f"{key}:{today}"] = max(config.requests_per_day - quota, 0)
+    
+    def _select_key(self) -> str:
+        for offset in range(len(self.keys)):
+            key_index = (self.key_index + offset) % len(self.keys)
+            if self.limiter.remaining_today(self.keys[key_index]) > 0:
+                self.key_index = key_index
+                break
+        # If every key is spent, the limiter waits for midnight on the current one
+        return self.keys[self.key_index]
+    
+    async def request(self) -> None:
+        """Advance the clock through one rate-limited request"""
+        key = self._select_key()
+        await self.limiter.wait_if_needed(key)
+        await self.clock.sleep(self.latency)
+        self.limiter.record_request(key)
+        day = self.clock.now().strftime('%Y-%m-%d')
+        self.requests_by_day[day] = self.requests_by_day.get(day, 0) + 1
+
+class TranslationPlanner:
+    """Simulates a run of the overnight translator against its real backlog"""
+    
+    def __init__(self, config: Optional[PlannerConfig] = None):
+        self.config = config or PlannerConfig()
+    
+    async def simulate(self, texts_by_lang: Dict[str, List[str]], key_quotas: List[int],
+                       start: Optional[datetime] = None) -> RunPlan:
+        """Run the backlog through a virtual clock and return the plan"""
+        config = self.config
+        clock = VirtualClock(start or datetime.now())
+        plan = RunPlan(start_time=clock.now())
+        
+        if not key_quotas:
+            return plan
+        
+        limiter = PlannedRequests(config.rate_limits, key_quotas, clock, config.request_latency)
+        pending: Dict[str, List[str]] = {}
+        for lang, texts in texts_by_lang.items():
+            if texts:
+                pending[lang] = distinct_templates(texts)
+                plan.shared_templates[lang] = len(texts) - len(pending[lang])
+        plan.texts_to_translate = sum(len(texts) for texts in pending.values())
+        
+        if config.fan_out and len(pending) > 1:
+            # One request per batch covers every language still missing those texts
+            needed: Dict[str, int] = {}
+            for texts in pending.values():
+                for text in texts:
+                    needed[text] = needed.get(text, 0) + 1
+            batches = pack_batches(list(needed), config.batch_size, config.max_output_tokens,
+                                   config.output_expansion, needed)
+            for _ in batches:
+                await limiter.request()
+                plan.requests += 1
+            for lang in pending:
+                plan.completion_by_lang[lang] = clock.now()
+        else:
+            for lang, texts in pending.items():
+                for _ in pack_batches(texts, config.batch_size, config.max_output_tokens, config.output_expansion):
+                    await limiter.request()
+                    plan.requests += 1
+                plan.completion_by_lang[lang] = clock.now()
+                await clock.sleep(config.language_pause)
+        
+        for lang in texts_by_lang:
+            plan.completion_by_lang.setdefault(lang, plan.start_time)
+        
+        plan.requests_by_day = limiter.requests_by_day
+        plan.finish_time = max(plan.completion_by_lang.values(), default=plan.start_time)
+        return plan
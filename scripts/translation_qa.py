@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Translation Quality Gate
+========================
+
+Automatic checks run over each batch of model output before it is saved. The
+result sets `qualityScore` and `needsReview` on the Translation row, so bad
+output can be found (and re-translated) without re-translating everything.
+
+Checks, per translation:
+- placeholders: `${...}`, `{name}`, `{{...}}` and printf tokens must survive unchanged
+- numbering:    list numbering from the prompt ("3. ") leaked into the output
+- length:       length ratio far outside what the target language produces
+- untranslated: a multi-word source came back unchanged
+- script:       characters from a non-Latin script appeared in the output
+- language:     letters that belong to another language (e.g. "ñ" in Portuguese)
+
+and per batch:
+- diacritics:   a sizeable pt/es/fr batch without a single accented letter
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+# Automatic translations top out below human-reviewed ones
+BASE_SCORE = 95
+REVIEW_THRESHOLD = 80
+
+ISSUE_PENALTIES = {
+    'placeholders': 50,
+    'numbering': 30,
+    'script': 40,
+    'language': 25,
+    'untranslated': 25,
+    'length': 20,
+    'diacritics': 10,
+}
+
+PLACEHOLDER_PATTERN = re.compile(r'\$\{[^{}]*\}|\{\{[^{}]*\}\}|\{[A-Za-z0-9_.]+\}|%(?:\d+\$)?[sdif]')
+NUMBERING_PATTERN = re.compile(r'^\s*\d+[.)]\s+')
+WORD_PATTERN = re.compile(r'[^\W\d_]{2,}')
+# Cyrillic, Hebrew/Arabic, Devanagari, kana, CJK ideographs and Hangul
+FOREIGN_SCRIPT_PATTERN = re.compile(r'[\u0400-\u04FF\u0590-\u06FF\u0900-\u097F\u3040-\u30FF\u4E00-\u9FFF\uAC00-\uD7AF]')
+
+# Typical translated/English length ratio, and the band outside which output is suspect
+EXPECTED_LENGTH_RATIO = {'pt': 1.2, 'es': 1.2, 'fr': 1.25, 'de': 1.3, 'it': 1.2, 'en': 1.0}
+LENGTH_RATIO_BAND = (0.4, 2.5)
+MIN_LENGTH_FOR_RATIO = 12
+
+# Accented letters each language uses, and ones that point to a different language
+LANGUAGE_MARKS = {
+    'pt': set('ãõçáâàêéíóôú'),
+    'es': set('ñáéíóúü¿¡'),
+    'fr': set('éèêàâçîïôûùëœ'),
+    'de': set('äöüß'),
+    'it': set('àèéìíòóù'),
+}
+FOREIGN_MARKS = {
+    'pt': set('ñ¿¡ß'),
+    'es': set('ãõçß'),
+    'fr': set('ñãõß'),
+    'de': set('ñãõç'),
+    'it': set('ñãõçß'),
+}
+# Languages whose running text is rarely free of accents
+DIACRITIC_LANGUAGES = {'pt', 'es', 'fr'}
+MIN_BATCH_LETTERS_FOR_DIACRITICS = 200
+
+@dataclass
+class QualityReport:
+    """Outcome of the automatic checks for one translation"""
+    score: int = BASE_SCORE
+    issues: List[str] = field(default_factory=list)
+    
+    @property
+    def needs_review(self) -> bool:
+        return self.score < REVIEW_THRESHOLD
+    
+    def add(self, issue: str) -> None:
+        if issue not in self.issues:
+            self.issues.append(issue)
+            self.score = max(self.score - ISSUE_PENALTIES[issue], 0)
+
+def _template_literal_end(text: str, start: int) -> Optional[int]:
+    """End of the `${...}` starting at `start`, past any braces nested inside it"""
+    depth = 0
+    for i in range(start + 1, len(text)):
+        if text[i] == '{':
+            depth += 1
+        elif text[i] == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+def placeholder_spans(text: str) -> List[Tuple[int, int]]:
+    """(start, end) of each interpolation token, in order
+    
+    A `${...}` expression runs to its matching brace, so `${a ? "{b}" : c}` is
+    one token rather than a stray `{b}`.
+    """
+    spans = []
+    pos = 0
+    while pos < len(text):
+        start = text.find('${', pos)
+        end = _template_literal_end(text, start) if start != -1 else None
+        if end is None:
+            start = len(text)
+        spans.extend(match.span() for match in PLACEHOLDER_PATTERN.finditer(text, pos, start))
+        if end is None:
+            break
+        spans.append((start, end))
+        pos = end
+    return spans
+
+def placeholders(text: str) -> List[str]:
+    """Interpolation tokens in a text, sorted so they compare as a multiset"""
+    return sorted(text[start:end] for start, end in placeholder_spans(text))
+
+def check_translation(source: str, translated: str, target_lang: str) -> QualityReport:
+    """Run the per-translation checks"""
+    report = QualityReport()
+    lang = target_lang.split('-')[0].lower()
+    
+    if placeholders(source) != placeholders(translated):
+        report.add('placeholders')
+    
+    if NUMBERING_PATTERN.match(translated) and not NUMBERING_PATTERN.match(source):
+        report.add('numbering')
+    
+    if len(source) >= MIN_LENGTH_FOR_RATIO:
+        expected = EXPECTED_LENGTH_RATIO.get(lang, 1.0)
+        ratio = len(translated) / len(source)
+        low, high = LENGTH_RATIO_BAND
+        if not expected * low <= ratio <= expected * high:
+            report.add('length')
+    
+    if lang != 'en' and translated.strip().casefold() == source.strip().casefold() \
+            and len(WORD_PATTERN.findall(source)) >= 3:
+        report.add('untranslated')
+    
+    if FOREIGN_SCRIPT_PATTERN.search(translated) and not FOREIGN_SCRIPT_PATTERN.search(source):
+        report.add('script')
+    
+    lowered = translated.lower()
+    if any(char in FOREIGN_MARKS.get(lang, ()) for char in lowered) and \
+            not any(char in FOREIGN_MARKS.get(lang, ()) for char in source.lower()):
+        report.add('language')
+    
+    return report
+
+def assess_batch(pairs: Sequence[Tuple[str, str]], target_lang: str) -> List[QualityReport]:
+    """Check a batch of (source, translated) pairs, including the batch-level signals"""
+    reports = [check_translation(source, translated, target_lang) for source, translated in pairs]
+    
+    lang = target_lang.split('-')[0].lower()
+    if lang in DIACRITIC_LANGUAGES and pairs:
+        text = ''.join(translated.lower() for _, translated in pairs)
+        # Plenty of output and not one accent: likely English or the wrong language
+        if sum(char.isalpha() for char in text) >= MIN_BATCH_LETTERS_FOR_DIACRITICS and \
+                not any(char in LANGUAGE_MARKS[lang] for char in text):
+            for report in reports:
+                report.add('diacritics')
+    
+    return reports
+
+def summarize(reports: Sequence[QualityReport]) -> Optional[str]:
+    """One-line summary of the flagged translations in a batch, or None if all passed"""
+    flagged = [report for report in reports if report.needs_review]
+    if not flagged:
+        return None
+    
+    counts = {}
+    for report in flagged:
+        for issue in report.issues:
+            counts[issue] = counts.get(issue, 0) + 1
+    details = ', '.join(f"{issue} x{count}" for issue, count in sorted(counts.items()))
+    return f"{len(flagged)}/{len(reports)} translations flagged for review ({details})"
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Translation Job Queue
+=====================
+
+Postgres-backed work queue (`TranslationJob` table) that lets several
+overnight translators, each with its own API keys, share one backlog without
+translating anything twice.
+
+- Discovery enqueues (sourceText, targetLang) jobs; queued or in-flight
+  duplicates are ignored
+- Workers lease batches with `FOR UPDATE SKIP LOCKED`, so concurrent claims
+  never overlap
+- A lease expires unless its holder heartbeats; jobs held by a crashed worker
+  become claimable again once their lease runs out
+- Failed jobs go back to pending until `max_attempts`, then stay `failed`;
+  so does a job whose lease expired on its last attempt
+
+Job status: pending -> leased -> done | failed
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+@dataclass
+class TranslationJob:
+    """A leased unit of work"""
+    id: str
+    source_text: str
+    target_lang: str
+    category: str
+    attempts: int
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class TranslationQueue:
+    """Leases translation jobs from the TranslationJob table"""
+    
+    def __init__(self, db_pool, worker_id: Optional[str] = None, lease_seconds: float = 600.0,
+                 max_attempts: int = 5, logger: Optional[logging.Logger] = None):
+        self.db_pool = db_pool
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.logger = logger or logging.getLogger(__name__)
+    
+    async def enqueue(self, texts_by_lang: Dict[str, List[str]], category: str = 'general',
+                      priorities: Optional[Dict[str, int]] = None) -> int:
+        """Queue texts, re-opening finished jobs whose translation went missing again
+        
+        Jobs that are pending, leased or failed are left as they are. Returns the
+        number of jobs added or re-opened.
+        """
+        texts, langs, job_priorities = [], [], []
+        for lang, lang_texts in texts_by_lang.items():
+            for text in lang_texts:
+                texts.append(text)
+                langs.append(lang)
+                job_priorities.append((priorities or {}).get(text, 0))
+        
+        if not texts:
+            return 0
+        
+        async with self.db_pool.acquire() as conn:
+            result = await conn.execute(
+                """
+                INSERT INTO "TranslationJob" (id, "sourceText", "targetLang", category, priority, "updatedAt")
+                SELECT 'tj_' || replace(gen_random_uuid()::text, '-', ''), s.text, s.lang, $4, s.priority, now()
+                FROM unnest($1::text[], $2::text[], $3::int[]) AS s(text, lang, priority)
+                ON CONFLICT ("sourceText", "targetLang") DO UPDATE
+                SET "status" = 'pending', attempts = 0, "updatedAt" = now()
+                WHERE "TranslationJob"."status" = 'done'
+                """,
+                texts, langs, job_priorities, category
+            )
+        return int(result.split()[-1])
+    
+    async def claim(self, target_lang: str, limit: int) -> List[TranslationJob]:
+        """Lease up to `limit` jobs for one language, including jobs whose lease expired
+        
+        An expired lease that already used its last attempt (its worker died
+        mid-batch every time) is marked failed instead of being leased again.
+        """
+        async with self.db_pool.acquire() as conn:
+            async with conn.transaction():
+                result = await conn.execute(
+                    """
+                    UPDATE "TranslationJob"
+                    SET "status" = 'failed', "leasedBy" = NULL, "leaseExpiresAt" = NULL,
+                        "lastError" = 'Lease expired on the last attempt', "updatedAt" = now()
+                    WHERE "targetLang" = $1 AND "status" = 'leased' AND "leaseExpiresAt" < now()
+                    AND attempts >= $2
+                    """,
+                    target_lang, self.max_attempts
+                )
+                expired = int(result.split()[-1])
+                if expired:
+                    self.logger.warning(f"Gave up on {expired} {target_lang} jobs whose last lease expired")
+                
+                rows = await conn.fetch(
+                    """
+                    WITH next AS (
+                        SELECT id FROM "TranslationJob"
+                        WHERE "targetLang" = $2
+                        AND ("status" = 'pending' OR ("status" = 'leased' AND "leaseExpiresAt" < now()
+                                                      AND attempts < $5))
+                        ORDER BY priority DESC, "createdAt"
+                        LIMIT $3
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    UPDATE "TranslationJob" AS j
+                    SET "status" = 'leased', "leasedBy" = $1, attempts = j.attempts + 1,
+                        "leaseExpiresAt" = now() + make_interval(secs => $4), "updatedAt" = now()
+                    FROM next
+                    WHERE j.id = next.id
+                    RETURNING j.id, j."sourceText", j."targetLang", j.category, j.attempts
+                    """,
+                    self.worker_id, target_lang, limit, self.lease_seconds, self.max_attempts
+                )
+        
+        return [
+            TranslationJob(row['id'], row['sourceText'], row['targetLang'], row['category'], row['attempts'])
+            for row in rows
+        ]
+    
+    async def heartbeat(self, jobs: List[TranslationJob]) -> int:
+        """Extend the lease on jobs this worker still holds; returns how many it still holds"""
+        async with self.db_pool.acquire() as conn:
+            result = await conn.execute(
+                """
+                UPDATE "TranslationJob"
+                SET "leaseExpiresAt" = now() + make_interval(secs => $3), "updatedAt" = now()
+                WHERE id = ANY($1::text[]) AND "leasedBy" = $2 AND "status" = 'leased'
+                """,
+                [job.id for job in jobs], self.worker_id, self.lease_seconds
+            )
+        return int(result.split()[-1])
+    
+    @asynccontextmanager
+    async def keep_alive(self, jobs: List[TranslationJob]):
+        """Heartbeat the jobs' leases while the block runs"""
+        async def beat():
+            while True:
+                await asyncio.sleep(self.lease_seconds / 3)
+                try:
+                    held = await self.heartbeat(jobs)
+                    if held < len(jobs):
+                        self.logger.warning(f"Lost the lease on {len(jobs) - held} of {len(jobs)} jobs")
+                except Exception as e:
+                    self.logger.warning(f"Lease heartbeat failed: {e}")
+        
+        task = asyncio.create_task(beat())
+        try:
+            yield
+        finally:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    
+    async def complete(self, jobs: List[TranslationJob]) -> None:
+        """Mark jobs done"""
+        if not jobs:
+            return
+        async with self.db_pool.acquire() as conn:
+            await conn.execute(
+                """
+                UPDATE "TranslationJob"
+                SET "status" = 'done', "leaseExpiresAt" = NULL, "lastError" = NULL, "updatedAt" = now()
+                WHERE id = ANY($1::text[]) AND "leasedBy" = $2
+                """,
+                [job.id for job in jobs], self.worker_id
+            )
+    
+    async def fail(self, jobs: List[TranslationJob], error: str) -> None:
+        """Return jobs to the queue, or give up on them after `max_attempts`"""
+        if not jobs:
+            return
+        async with self.db_pool.acquire() as conn:
+            await conn.execute(
+                """
+                UPDATE "TranslationJob"
+                SET "status" = CASE WHEN attempts >= $3 THEN 'failed' ELSE 'pending' END,
+                    "leasedBy" = NULL, "leaseExpiresAt" = NULL, "lastError" = $4, "updatedAt" = now()
+                WHERE id = ANY($1::text[]) AND "leasedBy" = $2
+                """,
+                [job.id for job in jobs], self.worker_id, self.max_attempts, error[:1000]
+            )
+    
+    async def release(self, jobs: List[TranslationJob]) -> None:
+        """Hand jobs back without counting the attempt (e.g. on shutdown)"""
+        if not jobs:
+            return
+        async with self.db_pool.acquire() as conn:
+            await conn.execute(
+                """
+                UPDATE "TranslationJob"
+                SET "status" = 'pending', attempts = GREATEST(attempts - 1, 0),
+                    "leasedBy" = NULL, "leaseExpiresAt" = NULL, "updatedAt" = now()
+                WHERE id = ANY($1::text[]) AND "leasedBy" = $2 AND "status" = 'leased'
+                """,
+                [job.id for job in jobs], self.worker_id
+            )
+    
+    async def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch('SELECT "status", COUNT(*) AS jobs FROM "TranslationJob" GROUP BY "status"')
+        return {row['status']: row['jobs'] for row in rows}
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Priority- and Quota-Aware Translation Scheduler
+===============================================
+
+Orders the translation backlog so the strings users see most are translated
+first, and fits the day's work into each API key's remaining daily quota.
+
+Each pending (text, language) item gets a tier and a score from:
+- criticality (`criticalTexts` in missing-translations.json, `criticalTerms`
+  in critical-missing.json)
+- the category of its English source row
+- on-screen usage (files it appears in, from ui_string_extractor.py's index)
+  and its recorded `usageCount`
+
+Quota is handed out in tier order, except that every lower tier is guaranteed
+a small share of the day's requests so it is never starved indefinitely.
+"""
+
+import json
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+TIERS = ['critical', 'high', 'normal', 'low']
+
+# Share of the day's requests reserved for each tier below 'critical'
+LOWER_TIER_SHARES = {'high': 0.10, 'normal': 0.05, 'low': 0.05}
+
+HIGH_PRIORITY_CATEGORIES = {'navigation', 'buttons', 'ui', 'forms', 'errors', 'toast', 'messages'}
+LOW_PRIORITY_CATEGORIES = {'bulk_overnight', 'email', 'reports'}
+
+# A string shown in this many files is treated as high priority
+HIGH_SCREEN_COUNT = 3
+
+@dataclass
+class PendingItem:
+    """A source text still missing a translation in one language"""
+    text: str
+    lang: str
+    category: str = 'general'
+    usage_count: int = 0
+    screen_count: int = 0
+    critical: bool = False
+    tier: str = 'low'
+    score: float = 0.0
+
+@dataclass
+class ScheduledBatch:
+    """One API request's worth of texts, assigned to a key"""
+    key_index: int
+    lang: str
+    tier: str
+    texts: List[str] = field(default_factory=list)
+
+def load_critical_texts(paths: Optional[Iterable[Path]] = None) -> Set[str]:
+    """Collect critical strings from the JSON reports written by the TS tooling"""
+    if paths is None:
+        paths = [REPO_ROOT / 'missing-translations.json', REPO_ROOT / 'critical-missing.json']
+    
+    critical: Set[str] = set()
+    for path in paths:
+        path = Path(path)
+        if not path.exists():
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        critical.update(data.get('criticalTexts', []))
+        critical.update(data.get('criticalTerms', []))
+    return critical
+
+def load_screen_counts(index_file: Optional[Path] = None) -> Dict[str, int]:
+    """Number of source files each string appears in, from the extractor index"""
+    # Imported lazily so the scheduler has no hard dependency on the extractor
+    from ui_string_extractor import DEFAULT_INDEX_FILE, UIStringIndex
+    
+    index_file = Path(index_file or DEFAULT_INDEX_FILE)
+    if not index_file.exists():
+        return {}
+    return UIStringIndex(index_file).string_counts()
+
+class TranslationScheduler:
+    """Assigns priorities to pending items and packs them into per-key quotas"""
+    
+    def __init__(self, critical_texts: Optional[Set[str]] = None, screen_counts: Optional[Dict[str, int]] = None,
+                 batch_size: int = 15, lower_tier_shares: Optional[Dict[str, float]] = None):
+        self.critical_texts = critical_texts or set()
+        self.screen_counts = screen_counts or {}
+        self.batch_size = batch_size
+        self.lower_tier_shares = LOWER_TIER_SHARES if lower_tier_shares is None else lower_tier_shares
+    
+    def prioritize(self, item: PendingItem) -> PendingItem:
+        """Set an item's tier and its score within that tier"""
+        item.critical = item.critical or item.text in self.critical_texts
+        item.screen_count = max(item.screen_count, self.screen_counts.get(item.text, 0))
+        
+        if item.critical:
+            item.tier = 'critical'
+        elif item.category in HIGH_PRIORITY_CATEGORIES or item.screen_count >= HIGH_SCREEN_COUNT:
+            item.tier = 'high'
+        elif item.category not in LOW_PRIORITY_CATEGORIES and (item.screen_count > 0 or item.usage_count > 0):
+            item.tier = 'normal'
+        else:
+            item.tier = 'low'
+        
+        # Visible and frequently used strings first; shorter labels break ties
+        item.score = (
+            2.0 * item.screen_count
+            + math.log1p(item.usage_count)
+            + (1.0 if item.category in HIGH_PRIORITY_CATEGORIES else 0.0)
+            - len(item.text) / 1000
+        )
+        return item
+    
+    def _tier_batches(self, items: List[PendingItem]) -> Dict[str, List[Tuple[float, str, List[str]]]]:
+        """Group prioritized items into single-language batches per tier, best first"""
+        batches: Dict[str, List[Tuple[float, str, List[str]]]] = {tier: [] for tier in TIERS}
+        
+        for tier in TIERS:
+            by_lang: Dict[str, List[PendingItem]] = {}
+            for item in items:
+                if item.tier == tier:
+                    by_lang.setdefault(item.lang, []).append(item)
+            
+            for lang, lang_items in by_lang.items():
+                lang_items.sort(key=lambda item: item.score, reverse=True)
+                for i in range(0, len(lang_items), self.batch_size):
+                    chunk = lang_items[i:i + self.batch_size]
+                    batches[tier].append((chunk[0].score, lang, [item.text for item in chunk]))
+            
+            batches[tier].sort(key=lambda batch: batch[0], reverse=True)
+        
+        return batches
+    
+    def plan(self, items: List[PendingItem], key_quotas: List[int]) -> Tuple[List[ScheduledBatch], List[PendingItem]]:
+        """Schedule batches into the keys' remaining requests for today
+        
+        Returns the batches in execution order and the items deferred to a later
+        day because the quota ran out.
+        """
+        for item in items:
+            self.prioritize(item)
+        
+        capacity = sum(max(quota, 0) for quota in key_quotas)
+        tier_batches = self._tier_batches(items)
+        selected: Dict[str, int] = {tier: 0 for tier in TIERS}
+        
+        # Guaranteed shares for lower tiers first, then strict tier order
+        for tier, share in self.lower_tier_shares.items():
+            selected[tier] = min(len(tier_batches[tier]), int(capacity * share))
+        
+        left = capacity - sum(selected.values())
+        for tier in TIERS:
+            extra = min(len(tier_batches[tier]) - selected[tier], left)
+            selected[tier] += extra
+            left -= extra
+        
+        # Execution order: tier by tier, best batches first, round-robin over keys with quota left
+        remaining = [max(quota, 0) for quota in key_quotas]
+        scheduled: List[ScheduledBatch] = []
+        key_index = 0
+        for tier in TIERS:
+            for _, lang, texts in tier_batches[tier][:selected[tier]]:
+                while remaining[key_index] == 0:
+                    key_index = (key_index + 1) % len(remaining)
+                remaining[key_index] -= 1
+                scheduled.append(ScheduledBatch(key_index, lang, tier, texts))
+                key_index = (key_index + 1) % len(remaining)
+        
+        scheduled_pairs = {(batch.lang, text) for batch in scheduled for text in batch.texts}
+        deferred = [item for item in items if (item.lang, item.text) not in scheduled_pairs]
+        
+        return scheduled, deferred
+    
+    @staticmethod
+    def summarize(scheduled: List[ScheduledBatch], deferred: List[PendingItem]) -> Dict[str, Dict[str, int]]:
+        """Scheduled and deferred item counts per tier"""
+        summary = {tier: {'batches': 0, 'scheduled': 0, 'deferred': 0} for tier in TIERS}
+        for batch in scheduled:
+            summary[batch.tier]['batches'] += 1
+            summary[batch.tier]['scheduled'] += len(batch.texts)
+        for item in deferred:
+            summary[item.tier]['deferred'] += 1
+        return summary
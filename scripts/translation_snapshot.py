@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Local Translation Snapshot
+==========================
+
+A read-optimized SQLite copy of the approved translations, so cache probes
+cost a local index lookup instead of a Postgres round trip and keep working
+while the database is unreachable.
+
+- Keyed by (targetLang, sourceText) in a WITHOUT ROWID table
+- Masked templates (category `template`) are left out
+- Refreshed incrementally: only rows whose `updatedAt` is at or past the stored
+  watermark are pulled; rows that are no longer approved are dropped
+- Rows saved by this process are written through immediately, if approved
+- Translators refresh it before their first read and every few minutes after
+- WAL journaling lets quick_translate.py read while a translator refreshes
+
+Rows deleted outright in Postgres are only noticed by a full refresh. The
+watermark assumes every writer stamps `updatedAt` in UTC, as Prisma does
+(gemini_translator.py uses `utc_now()`).
+
+Usage:
+    python translation_snapshot.py            # incremental refresh
+    python translation_snapshot.py --full     # rebuild from scratch
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add the current directory to path for imports
+sys.path.append(str(Path(__file__).parent))
+
+from placeholder_masking import TEMPLATE_CATEGORY
+
+DEFAULT_SNAPSHOT_FILE = Path(__file__).resolve().parent / 'translation_snapshot.db'
+SCHEMA_VERSION = '1'
+
+# Bound parameters per IN (...) lookup, under SQLite's historical limit of 999
+LOOKUP_CHUNK_SIZE = 500
+
+class TranslationSnapshot:
+    """SQLite snapshot of approved translations"""
+    
+    def __init__(self, path: Path = DEFAULT_SNAPSHOT_FILE, readonly: bool = False):
+        self.path = Path(path)
+        self.readonly = readonly
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    @property
+    def exists(self) -> bool:
+        return self.path.exists()
+    
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the snapshot; read-only handles never create the file"""
+        if self._conn is not None:
+            return self._conn
+        
+        if self.readonly:
+            if not self.exists:
+                return None
+            self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            return self._conn
+        
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                target_lang TEXT NOT NULL,
+                source_text TEXT NOT NULL,
+                translated_text TEXT NOT NULL,
+                PRIMARY KEY (target_lang, source_text)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            """
+        )
+        if self._get_meta('schema_version') != SCHEMA_VERSION:
+            self._conn.execute('DELETE FROM translations')
+            self._set_meta('schema_version', SCHEMA_VERSION)
+            self._set_meta('watermark', None)
+            self._conn.commit()
+        return self._conn
+    
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _set_meta(self, key: str, value: Optional[str]) -> None:
+        self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+    
+    @property
+    def watermark(self) -> Optional[datetime]:
+        """`updatedAt` of the newest row pulled from Postgres"""
+        conn = self._connect()
+        value = self._get_meta('watermark') if conn else None
+        return datetime.fromisoformat(value) if value else None
+    
+    @property
+    def refreshed_at(self) -> Optional[datetime]:
+        """When the snapshot was last brought up to date with Postgres"""
+        conn = self._connect()
+        value = self._get_meta('refreshed_at') if conn else None
+        return datetime.fromisoformat(value) if value else None
+    
+    def get(self, source_text: str, target_lang: str) -> Optional[str]:
+        """Look up one approved translation"""
+        conn = self._connect()
+        if conn is None:
+            return None
+        row = conn.execute(
+            'SELECT translated_text FROM translations WHERE target_lang = ? AND source_text = ?',
+            (target_lang, source_text)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def get_many(self, texts: List[str], target_lang: str) -> Dict[str, str]:
+        """Look up the translations of several texts"""
+        conn = self._connect()
+        if conn is None:
+            return {}
+        
+        results = {}
+        for i in range(0, len(texts), LOOKUP_CHUNK_SIZE):
+            chunk = texts[i:i + LOOKUP_CHUNK_SIZE]
+            rows = conn.execute(
+                f"""
+                SELECT source_text, translated_text FROM translations
+                WHERE target_lang = ? AND source_text IN ({', '.join('?' * len(chunk))})
+                """,
+                (target_lang, *chunk)
+            )
+            results.update(rows)
+        return results
+    
+    def put(self, source_text: str, target_lang: str, translated_text: str) -> None:
+        """Write through a translation this process just saved"""
+        conn = self._connect()
+        if conn is None:
+            return
+        conn.execute(
+            'INSERT OR REPLACE INTO translations (target_lang, source_text, translated_text) VALUES (?, ?, ?)',
+            (target_lang, source_text, translated_text)
+        )
+        conn.commit()
+    
+    def discard(self, source_text: str, target_lang: str) -> None:
+        """Drop a translation this process found not (or no longer) approved"""
+        conn = self._connect()
+        if conn is None:
+            return
+        conn.execute(
+            'DELETE FROM translations WHERE target_lang = ? AND source_text = ?',
+            (target_lang, source_text)
+        )
+        conn.commit()
+    
+    async def refresh(self, db_conn, full: bool = False) -> int:
+        """Pull rows changed since the watermark from Postgres and return how many were applied"""
+        conn = self._connect()
+        if conn is None:
+            raise RuntimeError("Cannot refresh a read-only snapshot")
+        
+        watermark = None if full else self.watermark
+        
+        # `>=` re-reads rows sharing the watermark's timestamp that committed late
+        rows = await db_conn.fetch(
+            """
+            SELECT "sourceText", "targetLang", "translatedText", "status", "category", "updatedAt"
+            FROM "Translation"
+            WHERE $1::timestamp IS NULL OR "updatedAt" >= $1
+            ORDER BY "updatedAt"
+            """,
+            watermark
+        )
+        
+        def servable(row) -> bool:
+            return row['status'] == 'approved' and row['category'] != TEMPLATE_CATEGORY
+        
+        with conn:
+            if full:
+                conn.execute('DELETE FROM translations')
+            conn.executemany(
+                'INSERT OR REPLACE INTO translations (target_lang, source_text, translated_text) VALUES (?, ?, ?)',
+                [(row['targetLang'], row['sourceText'], row['translatedText']) for row in rows if servable(row)]
+            )
+            conn.executemany(
+                'DELETE FROM translations WHERE target_lang = ? AND source_text = ?',
+                [(row['targetLang'], row['sourceText']) for row in rows if not servable(row)]
+            )
+            if rows:
+                self._set_meta('watermark', rows[-1]['updatedAt'].isoformat())
+            self._set_meta('refreshed_at', datetime.now().isoformat())
+        
+        return len(rows)
+    
+    def count(self) -> int:
+        conn = self._connect()
+        return conn.execute('SELECT COUNT(*) FROM translations').fetchone()[0] if conn else 0
+    
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+async def main():
+    """CLI interface for refreshing the snapshot"""
+    from dotenv import load_dotenv
+    from gemini_translator import create_db_pool
+    load_dotenv()
+    
+    parser = argparse.ArgumentParser(description='Refresh the local translation snapshot')
+    parser.add_argument('--path', default=str(DEFAULT_SNAPSHOT_FILE), help='Snapshot file')
+    parser.add_argument('--full', action='store_true', help='Rebuild the snapshot from scratch')
+    
+    args = parser.parse_args()
+    
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("❌ Error: DATABASE_URL environment variable is required")
+        sys.exit(1)
+    
+    snapshot = TranslationSnapshot(Path(args.path))
+    db_pool = await create_db_pool(database_url, max_size=1)
+    
+    try:
+        async with db_pool.acquire() as conn:
+            applied = await snapshot.refresh(conn, full=args.full)
+        print(f"✅ Applied {applied} changed row(s); {snapshot.count()} translations in {snapshot.path}")
+    finally:
+        snapshot.close()
+        await db_pool.close()
+
+if __name__ == '__main__':
+    import asyncio
+    asyncio.run(main())
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Incremental UI String Extractor
+===============================
+
+Scans `useTranslate(...)` call sites and JSX text under `src/` and keeps a
+persistent per-file index of the extracted strings keyed by content hash.
+Each run only re-reads files whose size/mtime changed, only re-extracts files
+whose content hash changed, and emits the delta of strings added to or
+removed from the UI since the last run as a JSON Lines stream:
+
+    {"op": "add", "text": "Client Added", "files": ["src/components/..."]}
+    {"op": "remove", "text": "Old Label"}
+
+The index only moves forward once the delta has been consumed. With
+`--output` that is as soon as the delta is appended to the file. On stdout
+the updated index is staged in `ui_strings_index.json.pending` and promoted by
+`--commit` after the consumer succeeded; until then every run emits the
+unconsumed strings again.
+
+Usage:
+    python ui_string_extractor.py
+    python ui_string_extractor.py --output ui_delta.jsonl
+    python ui_string_extractor.py | python overnight_translator.py --from-delta - && python ui_string_extractor.py --commit
+    python ui_string_extractor.py --full   # emit every current string as "add"
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO
+
+INDEX_VERSION = 1
+DEFAULT_SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+DEFAULT_INDEX_FILE = Path('ui_strings_index.json')
+PENDING_SUFFIX = '.pending'
+
+SOURCE_SUFFIXES = ('.ts', '.tsx', '.js', '.jsx')
+IGNORED_SUFFIXES = ('.d.ts',)
+IGNORED_MARKERS = ('.test.', '.spec.')
+
+# useTranslate('...'), useTranslate("...") and useTranslate(`...`), possibly split across lines
+USE_TRANSLATE_PATTERN = re.compile(
+    r"""useTranslate\(\s*(['"`])((?:\\.|(?!\1).)*?)\1\s*\)""",
+    re.DOTALL,
+)
+# Direct text in JSX (between > and <) on a single line
+JSX_TEXT_PATTERN = re.compile(r'>([^<>{}\n]+)<')
+
+# Text that should NOT be translated (kept in sync with extract-ui-texts.ts)
+SKIP_PATTERNS = [
+    re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'),  # Email addresses
+    re.compile(r'^\+?[\d\s\-()]+$'),  # Phone numbers
+    re.compile(r'^[A-Z]{2,10}-\d+$'),  # Product codes, SKUs
+    re.compile(r'^https?://'),  # URLs
+    re.compile(r'^/[a-zA-Z0-9/\-_]*$'),  # Paths
+    re.compile(r'^\d+(\.\d+)?\s*(px|em|rem|%|vh|vw)$'),  # CSS values
+    re.compile(r'^[0-9]{4}-[0-9]{2}-[0-9]{2}'),  # Dates
+    re.compile(r'^\$\d+(\.\d{2})?$'),  # Prices
+    re.compile(r'^#[0-9A-Fa-f]{3,6}$'),  # Hex colors
+    re.compile(r'^[A-Z_]+$'),  # Constants (all caps)
+    re.compile(r'^[a-z][a-zA-Z0-9]*$'),  # Variable names (camelCase)
+    re.compile(r'^[a-z-]+$'),  # CSS classes (kebab-case)
+    re.compile(r'^\d+$'),  # Pure numbers
+    re.compile(r'''^[.,;:!?()\[\]{}'"´`~@#$%^&*+=|\\<>/\s]*$'''),  # Only punctuation/symbols
+]
+# JSX text that is really code leaking through the `>...<` pattern
+CODE_MARKERS = ('=>', '&&', '||', '===', '!==', '();', 'return ')
+
+ESCAPES = {'\\n': ' ', '\\t': ' ', "\\'": "'", '\\"': '"', '\\`': '`', '\\\\': '\\'}
+ESCAPE_PATTERN = re.compile(r'\\[nt\'"`\\]')
+
+@dataclass
+class FileEntry:
+    """Index entry for a single source file"""
+    content_hash: str
+    size: int
+    mtime_ns: int
+    strings: List[str] = field(default_factory=list)
+
+@dataclass
+class ExtractionDelta:
+    """Strings that appeared in or disappeared from the UI since the last run"""
+    added: Dict[str, List[str]] = field(default_factory=dict)  # text -> files
+    removed: List[str] = field(default_factory=list)
+    files_scanned: int = 0
+    files_reextracted: int = 0
+    files_deleted: int = 0
+    
+    @property
+    def is_empty(self) -> bool:
+        return not self.added and not self.removed
+
+def normalize_text(text: str) -> str:
+    """Unescape JS string escapes and collapse whitespace"""
+    text = ESCAPE_PATTERN.sub(lambda m: ESCAPES[m.group(0)], text)
+    return ' '.join(text.split())
+
+def is_valid_text(text: str) -> bool:
+    """Heuristic filter for translatable text (mirrors UITextExtractor.isValidText)"""
+    if not text or len(text) < 2:
+        return False
+    
+    for pattern in SKIP_PATTERNS:
+        if pattern.search(text):
+            return False
+    
+    letter_count = sum(1 for ch in text if ch.isascii() and ch.isalpha())
+    if letter_count == 0 or letter_count < len(text) * 0.5:
+        return False
+    
+    return True
+
+def extract_strings(content: str) -> List[str]:
+    """Extract the sorted set of translatable strings from one source file"""
+    found: Set[str] = set()
+    
+    for match in USE_TRANSLATE_PATTERN.finditer(content):
+        text = normalize_text(match.group(2))
+        if is_valid_text(text):
+            found.add(text)
+    
+    for match in JSX_TEXT_PATTERN.finditer(content):
+        text = normalize_text(match.group(1))
+        if is_valid_text(text) and not any(marker in text for marker in CODE_MARKERS):
+            found.add(text)
+    
+    return sorted(found)
+
+class UIStringIndex:
+    """Persistent per-file index of extracted UI strings"""
+    
+    def __init__(self, index_file: Path = DEFAULT_INDEX_FILE, src_dir: Path = DEFAULT_SRC_DIR):
+        self.index_file = Path(index_file)
+        self.src_dir = Path(src_dir)
+        self.files: Dict[str, FileEntry] = {}
+        self.load()
+    
+    def load(self) -> None:
+        """Load the index from disk (a missing or outdated index starts empty)"""
+        if not self.index_file.exists():
+            return
+        
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        
+        if data.get('version') != INDEX_VERSION:
+            return
+        
+        self.files = {
+            path: FileEntry(
+                content_hash=entry['hash'],
+                size=entry['size'],
+                mtime_ns=entry['mtime_ns'],
+                strings=entry['strings'],
+            )
+            for path, entry in data.get('files', {}).items()
+        }
+    
+    @property
+    def pending_file(self) -> Path:
+        """Staged index of a delta that has not been consumed yet"""
+        return self.index_file.with_suffix(self.index_file.suffix + PENDING_SUFFIX)
+    
+    def save(self, path: Optional[Path] = None) -> None:
+        """Atomically write the index to disk (to `path` instead of the index file if given)"""
+        path = Path(path or self.index_file)
+        data = {
+            'version': INDEX_VERSION,
+            'srcDir': str(self.src_dir),
+            'files': {
+                path: {
+                    'hash': entry.content_hash,
+                    'size': entry.size,
+                    'mtime_ns': entry.mtime_ns,
+                    'strings': entry.strings,
+                }
+                for path, entry in sorted(self.files.items())
+            },
+        }
+        
+        tmp_file = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_file, path)
+    
+    def string_counts(self) -> Dict[str, int]:
+        """Number of files each string currently appears in"""
+        counts: Dict[str, int] = {}
+        for entry in self.files.values():
+            for text in entry.strings:
+                counts[text] = counts.get(text, 0) + 1
+        return counts
+    
+    def current_strings(self) -> Set[str]:
+        """Every string currently present in the indexed UI"""
+        return set(self.string_counts())
+    
+    def _iter_source_files(self) -> Iterator[Path]:
+        for path in self.src_dir.rglob('*'):
+            name = path.name
+            if not name.endswith(SOURCE_SUFFIXES) or name.endswith(IGNORED_SUFFIXES):
+                continue
+            if any(marker in name for marker in IGNORED_MARKERS):
+                continue
+            if 'node_modules' in path.parts:
+                continue
+            if path.is_file():
+                yield path
+    
+    def _relative(self, path: Path) -> str:
+        return path.relative_to(self.src_dir.parent).as_posix()
+    
+    def update(self) -> ExtractionDelta:
+        """Rescan the source tree and return the delta since the last run"""
+        delta = ExtractionDelta()
+        counts = self.string_counts()
+        previous = set(counts)
+        seen: Set[str] = set()
+        touched: Set[str] = set()
+        
+        def release(strings: Iterable[str]) -> None:
+            for text in strings:
+                counts[text] -= 1
+                touched.add(text)
+        
+        def acquire(strings: Iterable[str]) -> None:
+            for text in strings:
+                counts[text] = counts.get(text, 0) + 1
+                touched.add(text)
+        
+        for path in self._iter_source_files():
+            rel_path = self._relative(path)
+            seen.add(rel_path)
+            delta.files_scanned += 1
+            
+            stat = path.stat()
+            entry = self.files.get(rel_path)
+            if entry and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+                continue  # Untouched since last run - don't even read it
+            
+            raw = path.read_bytes()
+            content_hash = hashlib.sha256(raw).hexdigest()
+            if entry and entry.content_hash == content_hash:
+                entry.size, entry.mtime_ns = stat.st_size, stat.st_mtime_ns
+                continue  # Touched but unchanged
+            
+            strings = extract_strings(raw.decode('utf-8', errors='replace'))
+            delta.files_reextracted += 1
+            
+            if entry:
+                release(entry.strings)
+            acquire(strings)
+            self.files[rel_path] = FileEntry(content_hash, stat.st_size, stat.st_mtime_ns, strings)
+        
+        for rel_path in set(self.files) - seen:
+            release(self.files.pop(rel_path).strings)
+            delta.files_deleted += 1
+        
+        for text in sorted(touched):
+            present = counts.get(text, 0) > 0
+            if present and text not in previous:
+                delta.added[text] = sorted(
+                    path for path, entry in self.files.items() if text in entry.strings
+                )
+            elif not present and text in previous:
+                delta.removed.append(text)
+        
+        return delta
+    
+    def rescan(self, consume: Callable[[ExtractionDelta], None]) -> ExtractionDelta:
+        """Rescan the source tree, hand the delta to `consume` and only then persist the index
+        
+        If `consume` raises, the index is left as it was, so the next run emits
+        the same strings again instead of recording them as already seen.
+        """
+        delta = self.update()
+        consume(delta)
+        self.save()
+        self.pending_file.unlink(missing_ok=True)
+        return delta
+    
+    def stage(self) -> ExtractionDelta:
+        """Rescan the source tree and write the updated index to the pending file only"""
+        delta = self.update()
+        self.save(self.pending_file)
+        return delta
+    
+    def commit(self) -> bool:
+        """Promote a staged index once its delta has been consumed"""
+        if not self.pending_file.exists():
+            return False
+        os.replace(self.pending_file, self.index_file)
+        self.load()
+        return True
+
+def write_delta(delta: ExtractionDelta, out: TextIO) -> None:
+    """Write a delta as a JSON Lines stream"""
+    for text, files in delta.added.items():
+        out.write(json.dumps({'op': 'add', 'text': text, 'files': files}, ensure_ascii=False) + '\n')
+    for text in delta.removed:
+        out.write(json.dumps({'op': 'remove', 'text': text}, ensure_ascii=False) + '\n')
+    out.flush()
+
+def read_delta_stream(stream: TextIO, op: Optional[str] = 'add') -> Iterator[str]:
+    """Yield texts from a delta stream, optionally filtered by operation"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        if op is None or record.get('op') == op:
+            yield record['text']
+
+def main():
+    """CLI interface for incremental extraction"""
+    parser = argparse.ArgumentParser(description='Incremental UI string extractor')
+    parser.add_argument('--src', default=str(DEFAULT_SRC_DIR), help='Source directory to scan')
+    parser.add_argument('--index', default=str(DEFAULT_INDEX_FILE), help='Index file (default: ui_strings_index.json)')
+    parser.add_argument('--output', help='Append the delta stream to this file instead of stdout')
+    parser.add_argument('--full', action='store_true', help='Ignore the previous index and emit every string as added')
+    parser.add_argument('--commit', action='store_true', help='Promote the index staged by a stdout run once its delta was consumed')
+    
+    args = parser.parse_args()
+    
+    index = UIStringIndex(Path(args.index), Path(args.src))
+    
+    if args.commit:
+        if index.commit():
+            print(f"✅ Committed {index.pending_file} -> {index.index_file}", file=sys.stderr)
+        else:
+            print(f"ℹ️ No staged index at {index.pending_file}", file=sys.stderr)
+        return
+    
+    if args.full:
+        index.files = {}
+    
+    if args.output:
+        def append(delta: ExtractionDelta) -> None:
+            with open(args.output, 'a', encoding='utf-8') as f:
+                write_delta(delta, f)
+                os.fsync(f.fileno())
+        
+        delta = index.rescan(append)
+    else:
+        # The consumer is another process: stage the index until it reports success via --commit
+        delta = index.stage()
+        write_delta(delta, sys.stdout)
+    
+    print(
+        f"🔍 Scanned {delta.files_scanned} files, re-extracted {delta.files_reextracted}, "
+        f"{delta.files_deleted} deleted: +{len(delta.added)} / -{len(delta.removed)} strings",
+        file=sys.stderr,
+    )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Write-Behind Usage Aggregator
+=============================
+
+Counts translation cache hits in memory per (sourceText, targetLang) and
+periodically writes them to `Translation.usageCount` / `lastUsed` with a single
+batched `UPDATE ... FROM (VALUES ...)`, so serving a cached translation never
+costs its own database write. Pending counts are flushed on shutdown.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Rows per UPDATE statement (4 bind parameters each, well under Postgres' limit)
+FLUSH_CHUNK_SIZE = 1000
+
+class UsageAggregator:
+    """In-memory hit counter flushed to the Translation table in batches"""
+    
+    def __init__(self, flush_interval: float = 30.0, max_pending: int = 5000,
+                 logger: Optional[logging.Logger] = None):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.logger = logger or logging.getLogger(__name__)
+        self.pending: Dict[Tuple[str, str], Tuple[int, datetime]] = {}
+        self.db_pool = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        self.flushed_hits = 0
+    
+    def record_hit(self, source_text: str, target_lang: str) -> None:
+        """Count one cache hit"""
+        key = (source_text, target_lang)
+        hits, _ = self.pending.get(key, (0, None))
+        self.pending[key] = (hits + 1, datetime.now())
+        
+        if len(self.pending) >= self.max_pending and self._wake is not None:
+            self._wake.set()
+    
+    def start(self, db_pool) -> None:
+        """Start the periodic flusher (requires a running event loop)"""
+        self.db_pool = db_pool
+        if self._task is None:
+            self._stopping = False
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+    
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._stopping:
+                break
+            
+            try:
+                await self.flush()
+            except Exception as e:
+                # Keep counting; the next flush retries the merged counts
+                self.logger.warning(f"Usage flush failed: {e}")
+    
+    async def flush(self) -> int:
+        """Write pending hit counts to the database and return the rows updated"""
+        if not self.pending or self.db_pool is None:
+            return 0
+        
+        batch, self.pending = self.pending, {}
+        rows = [(text, lang, hits, last_used) for (text, lang), (hits, last_used) in batch.items()]
+        updated = 0
+        
+        try:
+            async with self.db_pool.acquire() as conn:
+                for i in range(0, len(rows), FLUSH_CHUNK_SIZE):
+                    updated += await self._update(conn, rows[i:i + FLUSH_CHUNK_SIZE])
+        except Exception:
+            # Put the counts back so they are not lost
+            for text, lang, hits, last_used in rows:
+                pending_hits, pending_last_used = self.pending.get((text, lang), (0, last_used))
+                self.pending[(text, lang)] = (hits + pending_hits, max(last_used, pending_last_used))
+            raise
+        
+        self.flushed_hits += sum(row[2] for row in rows)
+        self.logger.debug(f"Flushed usage for {len(rows)} translations")
+        return updated
+    
+    @staticmethod
+    async def _update(conn, rows: List[Tuple[str, str, int, datetime]]) -> int:
+        values = ', '.join(
+            f"(${i * 4 + 1}, ${i * 4 + 2}, ${i * 4 + 3}::int, ${i * 4 + 4}::timestamp)"
+            for i in range(len(rows))
+        )
+        args = [value for row in rows for value in row]
+        
+        result = await conn.execute(
+            f"""
+            UPDATE "Translation" AS t
+            SET "usageCount" = t."usageCount" + v.hits,
+                "lastUsed" = GREATEST(COALESCE(t."lastUsed", v.last_used), v.last_used)
+            FROM (VALUES {values}) AS v("sourceText", "targetLang", hits, last_used)
+            WHERE t."sourceText" = v."sourceText" AND t."targetLang" = v."targetLang"
+            """,
+            *args
+        )
+        return int(result.split()[-1])
+    
+    async def stop(self) -> None:
+        """Stop the flusher and write whatever is still pending"""
+        if self._task is not None:
+            # Let an in-progress flush finish rather than cancelling it halfway
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+            self._wake = None
+        
+        try:
+            await self.flush()
+        except Exception as e:
+            self.logger.warning(f"Final usage flush failed, {len(self.pending)} counts dropped: {e}")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Clocks
+======
+
+Time source for the rate limiter, key breakers and overnight runner.
+
+- SystemClock:  wall time and real `asyncio.sleep` (the default everywhere)
+- VirtualClock: simulated time; `sleep` advances the clock instantly, so a
+  day of rate-limited traffic, including waits until midnight, runs in
+  seconds. It models a single flow of work: code that sleeps in several
+  concurrent tasks at once would see each sleep added to the same timeline.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+class SimulationDeadline(BaseException):
+    """Raised by VirtualClock.sleep once simulated time passes the deadline
+    
+    A BaseException, like CancelledError, so the translator's `except Exception`
+    retry and fallback paths do not swallow the end of a simulation.
+    """
+
+class SystemClock:
+    """Real time"""
+    
+    def time(self) -> float:
+        return time.time()
+    
+    def monotonic(self) -> float:
+        return time.monotonic()
+    
+    def now(self) -> datetime:
+        return datetime.now()
+    
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+SYSTEM_CLOCK = SystemClock()
+
+class VirtualClock(SystemClock):
+    """Simulated time that only moves when something sleeps"""
+    
+    def __init__(self, start: Optional[datetime] = None, deadline: Optional[datetime] = None):
+        self.start = start or datetime.now().replace(microsecond=0)
+        self.deadline = deadline
+        self.elapsed = 0.0
+    
+    def time(self) -> float:
+        return self.start.timestamp() + self.elapsed
+    
+    def monotonic(self) -> float:
+        return self.elapsed
+    
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=self.elapsed)
+    
+    async def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            self.elapsed += seconds
+            if self.deadline is not None and self.now() >= self.deadline:
+                self.elapsed = (self.deadline - self.start).total_seconds()
+                raise SimulationDeadline()
+        # Still yield, so other tasks get to run as they would around a real sleep
+        await asyncio.sleep(0)